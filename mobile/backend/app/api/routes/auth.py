@@ -3,7 +3,8 @@ from fastapi.responses import RedirectResponse, HTMLResponse
 from app.services.google_oauth_service import GoogleOAuthHandler
 from app.services.token_manager import TokenManager
 from app.services.database_service import DatabaseService
-from app.dependencies import get_oauth_handler, get_token_manager, get_database_service
+from app.services.calendar_cache_service import CalendarCacheService
+from app.dependencies import get_oauth_handler, get_token_manager, get_database_service, get_calendar_cache_service
 from app.models.update_profile_request import UpdateProfileRequest
 from jose import jwt
 
@@ -20,7 +21,8 @@ async def google_callback(
     code: str,
     oauth_handler: GoogleOAuthHandler = Depends(get_oauth_handler),
     token_manager: TokenManager = Depends(get_token_manager),
-    db_service: DatabaseService = Depends(get_database_service)
+    db_service: DatabaseService = Depends(get_database_service),
+    calendar_cache_service: CalendarCacheService = Depends(get_calendar_cache_service)
 ):
     try:
         # Get credentials
@@ -45,6 +47,8 @@ async def google_callback(
             access_token=credentials.token,
             refresh_token=credentials.refresh_token
         )
+        # Newly connected account may see different calendars
+        await calendar_cache_service.invalidate(user['id'])
         
         # Return success page with user info
         return HTMLResponse(content=f"""
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+import hmac
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header
 from app.services.database_service import DatabaseService
 from app.services.google_calendar_service import GoogleCalendarService
 from app.services.token_manager import TokenManager
-from app.dependencies import get_database_service, get_google_calendar_service, get_token_manager
+from app.services.calendar_cache_service import CalendarCacheService
+from app.dependencies import get_database_service, get_google_calendar_service, get_token_manager, get_calendar_cache_service
 
 router = APIRouter()
 
@@ -19,5 +22,25 @@ async def get_availability(
     if not tokens:
         print("Token not found")
         raise HTTPException(status_code=401, detail="Token not found")
-    events = google_calendar_service.get_all_events(tokens['google_access_token'], start_date, end_date)
-    return events
\ No newline at end of file
+    events = await google_calendar_service.get_all_events(tokens['google_access_token'], start_date, end_date)
+    return events
+@router.delete("/cache/{user_id}")
+async def invalidate_availability_cache(
+    user_id: str,
+    authorization: Optional[str] = Header(None),
+    db_service: DatabaseService = Depends(get_database_service),
+    calendar_cache_service: CalendarCacheService = Depends(get_calendar_cache_service)
+):
+    # Only the user themselves, holding their Google access token, may drop their cache
+    scheme, _, token = (authorization or "").partition(" ")
+    tokens = await db_service.get_google_tokens(user_id)
+    if (
+        scheme.lower() != "bearer"
+        or not token
+        or not tokens
+        or not tokens.get("google_access_token")
+        or not hmac.compare_digest(token, tokens["google_access_token"])
+    ):
+        raise HTTPException(status_code=401, detail="Invalid or missing token for this user")
+    await calendar_cache_service.invalidate(user_id)
+    return {"success": True}
@@ -4,14 +4,8 @@ from typing import List, Optional, Dict, Any
 from uuid import UUID
 import json
 from app.services.database_service import DatabaseService
-from app.dependencies import get_database_service
-import re
-
-def standardize_phone_number(phone: str) -> str:
-    digits = re.sub(r'[^0-9]', '', phone)
-    if not digits.startswith('1'):
-        digits = '1' + digits
-    return f'+{digits}'
+from app.services.contact_sync_service import ContactSyncService, contact_hash
+from app.dependencies import get_database_service, get_contact_sync_service
 
 router = APIRouter()
 
@@ -31,6 +25,25 @@ class ContactsSyncRequest(BaseModel):
     user_id: str
     contacts: List[Contact]
 
+class ContactsDeltaRequest(BaseModel):
+    user_id: str
+    base_checksum: Optional[str] = None  # checksum from the handshake, rejected if stale
+    upserts: List[Contact] = []  # added or changed device contacts
+    deletes: List[str] = []  # device contact IDs removed from the device
+
+def to_sync_rows(contacts: List[Contact]) -> List[dict]:
+    # Contacts without a number can't be texted, so they aren't stored
+    return [
+        {
+            "name": contact.name,
+            "phone_number": contact.phoneNumbers[0].number,
+            "device_contact_id": contact.id,
+            "sync_hash": contact_hash(contact.name, contact.phoneNumbers[0].number)
+        }
+        for contact in contacts
+        if contact.phoneNumbers
+    ]
+
 class BestFriendsSaveRequest(BaseModel):
     user_id: str
     best_friends: List[Contact]
@@ -38,51 +51,121 @@ class BestFriendsSaveRequest(BaseModel):
 @router.post("/sync")
 async def sync_contacts(
     request: ContactsSyncRequest,
-    db_service: DatabaseService = Depends(get_database_service),
+    background: bool = True,
+    contact_sync_service: ContactSyncService = Depends(get_contact_sync_service),
 ):
-    """Sync user's device contacts with the backend"""
-    errors = []
+    """Sync user's device contacts with the backend.
+
+    By default the import runs in the background: the response carries a job ID,
+    progress is pushed as contact_sync events on /llm/ws/{user_id}, and
+    /contacts/sync/{job_id} reports the outcome. Pass background=false to wait.
+    """
     try:
-        # Get existing contacts for the user (owner_id)
-        existing_contacts = await db_service.get_user_contacts(request.user_id)
-        # Map: standardized phone number -> contact (for this owner only)
-        existing_contact_map = {standardize_phone_number(c["phone_number"]): c for c in existing_contacts}
-
-        # Process each contact from the device (no limit)
-        for contact in request.contacts:
-            if contact.phoneNumbers:
-                std_number = standardize_phone_number(contact.phoneNumbers[0].number)
-                try:
-                    if std_number in existing_contact_map:
-                        contact_data = {
-                            "name": contact.name,
-                            "phone_number": std_number
-                        }
-                        # Update existing contact for this owner/number
-                        await db_service.update_contact(existing_contact_map[std_number]["id"], contact_data)
-                    else:
-                        # Create new contact for this owner/number
-                        contact_data = {
-                            "owner_id": request.user_id,
-                            "name": contact.name,
-                            "phone_number": std_number
-                        }
-                        await db_service.create_contact(contact_data)
-                except Exception as e:
-                    # If duplicate error, skip and continue
-                    print(f"Error syncing contacts: {str(e)}")
-                    if 'duplicate key value violates unique constraint' in str(e):
-                        continue
-                    errors.append({"contact": contact.name, "error": str(e)})
+        contacts = to_sync_rows(request.contacts)
+        if background:
+            job = contact_sync_service.start_sync(request.user_id, contacts)
+            return {
+                "success": True,
+                "message": f"Syncing {len(contacts)} contacts",
+                "job_id": job["job_id"],
+                "status": job["status"]
+            }
+
+        result = await contact_sync_service.sync(request.user_id, contacts)
+        errors = [
+            {"contact": c["contact"], "device_contact_id": c.get("device_contact_id"), "error": c["error"]}
+            for c in result["conflicts"]
+        ]
         return {
             "success": True,
             "message": f"Synced {len(request.contacts) - len(errors)} contacts",
+            "created": result["created"],
+            "updated": result["updated"],
+            "unchanged": result["unchanged"],
             "errors": errors
         }
     except Exception as e:
         print(f"Error syncing contacts: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error syncing contacts: {str(e)}")
 
+@router.get("/sync/checksums/{user_id}")
+async def get_sync_checksums(
+    user_id: str,
+    contact_sync_service: ContactSyncService = Depends(get_contact_sync_service),
+):
+    """Delta sync handshake: overall and per-bucket checksums of the stored contacts.
+
+    The app hashes each contact as contact_hash(name, first phone number), buckets
+    them by hash_bucket(device_contact_id) and compares. If the overall checksum
+    matches there is nothing to send; otherwise it fetches /sync/hashes for the
+    buckets that differ and posts only the changes to /sync/delta.
+
+    Only one contact is stored per phone number, so a device contact sharing its
+    number with another is rejected with a "Duplicate phone number" error naming its
+    device_contact_id. The app leaves those out of its manifest; otherwise the
+    checksums never match.
+    """
+    try:
+        return {"success": True, **await contact_sync_service.get_checksums(user_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting contact checksums: {str(e)}")
+
+@router.get("/sync/hashes/{user_id}")
+async def get_sync_hashes(
+    user_id: str,
+    buckets: str,
+    contact_sync_service: ContactSyncService = Depends(get_contact_sync_service),
+):
+    """Per-contact hashes for a comma-separated list of buckets"""
+    try:
+        hashes = await contact_sync_service.get_bucket_hashes(user_id, [b for b in buckets.split(",") if b])
+        return {"success": True, "hashes": hashes}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting contact hashes: {str(e)}")
+
+@router.post("/sync/delta")
+async def sync_contacts_delta(
+    request: ContactsDeltaRequest,
+    contact_sync_service: ContactSyncService = Depends(get_contact_sync_service),
+):
+    """Apply only the added, changed and deleted contacts found by the handshake"""
+    try:
+        result = await contact_sync_service.apply_delta(
+            request.user_id,
+            to_sync_rows(request.upserts),
+            request.deletes,
+            request.base_checksum
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        print(f"Error syncing contacts: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error syncing contacts: {str(e)}")
+    errors = [
+        {"contact": c["contact"], "device_contact_id": c.get("device_contact_id"), "error": c["error"]}
+        for c in result["conflicts"]
+    ]
+    return {
+        "success": True,
+        "created": result["created"],
+        "updated": result["updated"],
+        "unchanged": result["unchanged"],
+        "deleted": result["deleted"],
+        "checksum": result["checksum"],
+        "errors": errors
+    }
+
+@router.get("/sync/{job_id}")
+async def get_sync_status(
+    job_id: str,
+    contact_sync_service: ContactSyncService = Depends(get_contact_sync_service),
+):
+    """Get the status of a background contact sync"""
+    job = contact_sync_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return {"success": job["status"] != "failed", **job}
+
 # TODO: not for MVP
 @router.get("/best-friends/{user_id}")
 async def get_contacts_and_best_friends(
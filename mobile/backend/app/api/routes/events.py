@@ -23,9 +23,9 @@ async def create_event(
     # Set status to 'confirmed' for direct creation
     payload["status"] = "confirmed"
     
-    resp = db.client.table("events").insert(payload).execute()
-    if resp.error:
-        raise HTTPException(500, resp.error.message)
+    resp = await db.client.table("events").insert(payload).execute()
+    if not resp.data:
+        raise HTTPException(500, "Failed to create event")
     return resp.data[0]
 
 @router.get("/{event_id}", response_model=Event)
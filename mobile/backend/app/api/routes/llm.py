@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException, status
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, HTTPException, status, Query, Header
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.services.openrouter_service import OpenRouterService
 from app.services.database_service import DatabaseService
-from app.services.google_calendar_service import GoogleCalendarService
-from app.services.token_manager import TokenManager
-from app.services.texting_service import TextingService
 from app.services.websocket_service import active_connections
-from app.dependencies import get_database_service, get_google_calendar_service, get_token_manager, get_texting_service
-from typing import Dict
+from app.dependencies import (
+    get_database_service,
+    get_openrouter_service
+)
+from typing import Dict, Optional
 import asyncio
 import json
+import re
 from datetime import datetime
 
 router = APIRouter()
@@ -52,44 +54,61 @@ async def create_event(
     title: str,
     description: str,
     creator_id: str,
-    db_service: DatabaseService = Depends(get_database_service),
-    google_calendar_service: GoogleCalendarService = Depends(get_google_calendar_service),
-    token_manager: TokenManager = Depends(get_token_manager),
-    texting_service: TextingService = Depends(get_texting_service),
+    openrouter_service: OpenRouterService = Depends(get_openrouter_service),
 ):
-    openrouter_service = OpenRouterService(
-        db_service=db_service,
-        google_calendar_service=google_calendar_service,
-        token_manager=token_manager,
-        texting_service=texting_service
-    )
     response = await openrouter_service.create_draft_event(creator_id, title, description)
     return response
 
 @router.post("/chat")
 async def chat(
     request: dict,
-    db_service: DatabaseService = Depends(get_database_service),
-    google_calendar_service: GoogleCalendarService = Depends(get_google_calendar_service),
-    token_manager: TokenManager = Depends(get_token_manager),
-    texting_service: TextingService = Depends(get_texting_service),
+    openrouter_service: OpenRouterService = Depends(get_openrouter_service),
 ):
-    openrouter_service = OpenRouterService(
-        db_service=db_service,
-        google_calendar_service=google_calendar_service,
-        token_manager=token_manager,
-        texting_service=texting_service
-    )
     # Delegate all chat session management to openrouter_service
     result = await openrouter_service.handle_chat_request(request)
     return result
 
+ENTITY_TAG_RE = re.compile(r'\s*(?:W/)?("[^"]*")\s*(?:,|$)')
+
+def if_none_match_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag (RFC 9110 13.1.2).
+
+    The header may be "*" or a comma-separated list of strong or weak entity tags;
+    W/ prefixes are ignored on both sides.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(match.group(1) == opaque for match in ENTITY_TAG_RE.finditer(if_none_match))
+
 @router.get("/chat/messages/{user_id}")
 async def get_chat_messages(
     user_id: str,
+    before: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    if_none_match: Optional[str] = Header(None),
     db_service: DatabaseService = Depends(get_database_service)
 ):
+    """Get a page of the user's chat history, newest page first.
+
+    Pass the returned next_before as before to load older messages. The ETag
+    changes whenever the page's contents do, so clients can revalidate with
+    If-None-Match and get a 304 instead of the page.
+    """
     # Get or create the chat session for this user
     chat_session = await db_service.get_or_create_chat_session(user_id)
-    messages = chat_session.get("messages", [])
-    return {"messages": messages}
\ No newline at end of file
+    page = await db_service.get_chat_session_messages_page(chat_session["id"], before, limit)
+    newest = page["seqs"][-1] if page["seqs"] else 0
+    etag = f'W/"{chat_session["id"]}:{before}:{limit}:{newest}:{len(page["seqs"])}"'
+    if if_none_match_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(
+        content={
+            "messages": page["messages"],
+            "next_before": page["next_before"],
+            "has_more": page["next_before"] is not None
+        },
+        headers={"ETag": etag}
+    )
\ No newline at end of file
@@ -17,9 +17,9 @@ async def create_participant(
     payload = participant.dict()
     payload["status"] = "confirmed"
     
-    resp = db.client.table("event_participants").insert(payload).execute()
-    if resp.error:
-        raise HTTPException(500, resp.error.message)
+    resp = await db.client.table("event_participants").insert(payload).execute()
+    if not resp.data:
+        raise HTTPException(500, "Failed to create participant")
     return resp.data[0]
 
 @router.get("/event/{event_id}")
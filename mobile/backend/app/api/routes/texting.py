@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
 from app.services.texting_service import TextingService
-from app.dependencies import get_texting_service
+from app.services.openrouter_service import OpenRouterService
+from app.dependencies import get_texting_service, get_openrouter_service
 from app.models.conversation import Message
 
 router = APIRouter()
@@ -13,6 +14,11 @@ async def send_text(message: Message, texting_service: TextingService = Depends(
 async def handle_text_reply(request: dict, texting_service: TextingService = Depends(get_texting_service)):
     return await texting_service.handle_text_reply(request)
 
+@router.get("/metrics/confirmations")
+async def get_confirmation_metrics(openrouter_service: OpenRouterService = Depends(get_openrouter_service)):
+    """How many invitation replies were settled by rules instead of the LLM (this process only)"""
+    return openrouter_service.confirmation_classifier.metrics()
+
 @router.post("/test")
 async def send_test_text(texting_service: TextingService = Depends(get_texting_service)):
     return await texting_service.send_test_text("+16265905589", "BINK")
\ No newline at end of file
@@ -8,6 +8,13 @@ class Settings(BaseSettings):
     
     BACKEND_URL: str
     OPENROUTER_API_KEY: str
+    OPENROUTER_TIMEOUT: float = 60.0
+    OPENROUTER_CONNECT_TIMEOUT: float = 10.0
+    OPENROUTER_MAX_RETRIES: int = 2
+    OPENROUTER_MAX_CONNECTIONS: int = 50
+    OPENROUTER_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENROUTER_KEEPALIVE_EXPIRY: float = 30.0
+    OPENROUTER_MAX_CONCURRENCY: int = 20
     # Google OAuth settings
     GOOGLE_CLIENT_ID: str
     GOOGLE_CLIENT_SECRET: str
@@ -22,10 +29,47 @@ class Settings(BaseSettings):
     GOOGLE_AUTH_URI: str = "https://accounts.google.com/o/oauth2/auth"
     GOOGLE_TOKEN_URI: str = "https://oauth2.googleapis.com/token"
     GOOGLE_LOGIN_URI: str = "https://coffy.app/auth/google/login"
+    GOOGLE_CALENDAR_TIMEOUT: float = 15.0
+    GOOGLE_CALENDAR_MAX_CONNECTIONS: int = 50
+    GOOGLE_CALENDAR_MAX_CONCURRENCY: int = 8
+    GOOGLE_CALENDAR_USE_FREEBUSY: bool = True
+    CALENDAR_CACHE_ENABLED: bool = True
+    CALENDAR_CACHE_TTL_SECONDS: int = 300
+    CALENDAR_CACHE_MAX_AGE_HOURS: int = 168
+    CALENDAR_CACHE_HORIZON_DAYS: int = 90
+    # Groups this large are ranked on the NumPy availability bitmap
+    SCHEDULING_BITMAP_MIN_PARTICIPANTS: int = 20
+    # Rows per upsert request when syncing contacts
+    CONTACT_SYNC_BATCH_SIZE: int = 500
+    CONTACT_INDEX_TTL_SECONDS: int = 600
+    # "memory" for the in-process index, "database" for the indexed Postgres RPC
+    CONTACT_SEARCH_BACKEND: str = "memory"
+    # Chat context: this many recent messages verbatim, older ones as a rolling summary
+    CHAT_MEMORY_RECENT_MESSAGES: int = 10
+    CHAT_MEMORY_MAX_MESSAGE_CHARS: int = 2000
+    CHAT_MEMORY_SUMMARY_MAX_WORDS: int = 250
+    # Aged-out messages folded into the summary per update
+    CHAT_MEMORY_SUMMARY_BATCH: int = 40
+    # Inbound SMS queue: texts processed at once per process, poll interval for texts
+    # queued by other processes, and when a claimed text is considered abandoned
+    INBOUND_QUEUE_CONCURRENCY: int = 8
+    INBOUND_QUEUE_POLL_SECONDS: float = 2.0
+    INBOUND_QUEUE_STALE_SECONDS: int = 300
+    INBOUND_QUEUE_MAX_ATTEMPTS: int = 3
+    # Invitation replies classified at least this confidently skip the LLM
+    CONFIRMATION_RULES_ENABLED: bool = True
+    CONFIRMATION_RULES_MIN_CONFIDENCE: float = 0.85
+    # Parse unregistered participants' availability replies locally before trying the LLM
+    AVAILABILITY_PARSER_ENABLED: bool = True
+    # IANA name used when an event has no timezone; empty for the server's local time
+    AVAILABILITY_DEFAULT_TIMEZONE: str = ""
     
     # Supabase settings
     SUPABASE_URL: str
     SUPABASE_KEY: str
+    SUPABASE_TIMEOUT: float = 10.0
+    SUPABASE_MAX_CONNECTIONS: int = 100
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
     TEXTING_API_KEY: str
     
     class Config:
@@ -3,14 +3,23 @@ from app.services.database_service import DatabaseService
 from app.services.google_oauth_service import GoogleOAuthHandler
 from app.services.token_manager import TokenManager
 from app.services.google_calendar_service import GoogleCalendarService
+from app.services.calendar_cache_service import CalendarCacheService
+from app.services.contact_sync_service import ContactSyncService
+from app.services.contact_search_index import ContactSearchService
+from app.services.chat_memory_service import ChatMemoryService
 from app.services.texting_service import TextingService
-from app.services.openrouter_service import OpenRouterService
+from app.services.openrouter_service import OpenRouterService, MODEL
+from app.services.llm_client import close_llm_client
 
 # Global instances to handle circular dependency
 _db_service = None
 _oauth_handler = None
 _token_manager = None
 _google_calendar_service = None
+_calendar_cache_service = None
+_contact_sync_service = None
+_contact_search_service = None
+_chat_memory_service = None
 _texting_service = None
 _openrouter_service = None
 
@@ -41,6 +50,36 @@ def get_google_calendar_service():
         _google_calendar_service = GoogleCalendarService()
     return _google_calendar_service
 
+def get_calendar_cache_service():
+    global _calendar_cache_service
+    if _calendar_cache_service is None:
+        db = get_database_service()
+        calendar = get_google_calendar_service()
+        _calendar_cache_service = CalendarCacheService(db, calendar)
+    return _calendar_cache_service
+
+def get_contact_search_service():
+    global _contact_search_service
+    if _contact_search_service is None:
+        db = get_database_service()
+        _contact_search_service = ContactSearchService(db)
+    return _contact_search_service
+
+def get_chat_memory_service():
+    global _chat_memory_service
+    if _chat_memory_service is None:
+        db = get_database_service()
+        _chat_memory_service = ChatMemoryService(db, MODEL)
+    return _chat_memory_service
+
+def get_contact_sync_service():
+    global _contact_sync_service
+    if _contact_sync_service is None:
+        db = get_database_service()
+        contact_search = get_contact_search_service()
+        _contact_sync_service = ContactSyncService(db, contact_search)
+    return _contact_sync_service
+
 def get_texting_service():
     global _texting_service
     if _texting_service is None:
@@ -56,7 +95,10 @@ def get_openrouter_service():
         db = get_database_service()
         calendar = get_google_calendar_service()
         token = get_token_manager()
-        _openrouter_service = OpenRouterService(db, calendar, token, None)  # Initialize without TextingService
+        calendar_cache = get_calendar_cache_service()
+        contact_search = get_contact_search_service()
+        chat_memory = get_chat_memory_service()
+        _openrouter_service = OpenRouterService(db, calendar, token, None, calendar_cache, contact_search, chat_memory)  # Initialize without TextingService
     return _openrouter_service
 
 # FastAPI dependency functions
@@ -72,6 +114,12 @@ def get_token_manager_dependency():
 def get_google_calendar_service_dependency():
     return get_google_calendar_service()
 
+def get_calendar_cache_service_dependency():
+    return get_calendar_cache_service()
+
+def get_contact_sync_service_dependency():
+    return get_contact_sync_service()
+
 def get_texting_service_dependency():
     return get_texting_service()
 
@@ -86,6 +134,7 @@ def initialize_services():
     oauth = get_oauth_handler()
     calendar = get_google_calendar_service()
     token = get_token_manager()
+    calendar_cache = get_calendar_cache_service()
     # Initialize OpenRouter first
     openrouter = get_openrouter_service()
     # Then initialize Texting with OpenRouter
@@ -98,5 +147,24 @@ def initialize_services():
     assert oauth is not None, "OAuth handler not initialized"
     assert calendar is not None, "Calendar service not initialized"
     assert token is not None, "Token manager not initialized"
+    assert calendar_cache is not None, "Calendar cache service not initialized"
     assert text is not None, "Texting service not initialized"
-    assert openrouter is not None, "OpenRouter service not initialized"
\ No newline at end of file
+    assert openrouter is not None, "OpenRouter service not initialized"
+
+async def start_services():
+    """Start background workers once the event loop is running"""
+    get_texting_service().start()
+
+async def shutdown_services():
+    """Release pooled connections held by services at application shutdown"""
+    if _contact_sync_service is not None:
+        await _contact_sync_service.close()
+    if _chat_memory_service is not None:
+        await _chat_memory_service.close()
+    if _texting_service is not None:
+        await _texting_service.close()
+    if _db_service is not None:
+        await _db_service.close()
+    if _google_calendar_service is not None:
+        await _google_calendar_service.close()
+    await close_llm_client()
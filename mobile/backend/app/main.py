@@ -15,6 +15,8 @@ from app.api.routes.legal import router as legal_router
 from app.services.texting_service import TextingService
 from app.dependencies import (
     initialize_services,
+    start_services,
+    shutdown_services,
     get_texting_service_dependency
 )
 
@@ -50,6 +52,14 @@ app.add_middleware(
 # Initialize all services at startup
 initialize_services()
 
+@app.on_event("startup")
+async def on_startup():
+    await start_services()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await shutdown_services()
+
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(events_router, prefix="/events", tags=["events"])
 app.include_router(availability_router, prefix="/availability", tags=["availability"])
@@ -0,0 +1,42 @@
+"""Per-invocation state for the agent, kept out of the shared OpenRouterService instance."""
+import functools
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+@dataclass
+class AgentContext:
+    """The event, owner and participant cache one agent run or inbound message works on.
+
+    Tools read and update the context through OpenRouterService.context. Tools run
+    concurrently by the ToolExecutor get copies of the contextvars, but all point at
+    this same object, so changes made by one tool (e.g. create_draft_event setting
+    event_id) are seen by the rest of the run.
+    """
+    event_id: Optional[str] = None
+    owner_id: Optional[str] = None
+    participants: Optional[dict[str, dict]] = None  # phone_number -> participant for event_id
+    # Effects outside our database made so far (texts sent, calendar events added);
+    # rerunning the run after any of these would repeat them
+    side_effects: list[str] = field(default_factory=list)
+
+_agent_context: ContextVar[Optional[AgentContext]] = ContextVar("agent_context", default=None)
+
+def get_agent_context() -> AgentContext:
+    """Get the context of the current run, starting one if none is active."""
+    context = _agent_context.get()
+    if context is None:
+        context = AgentContext()
+        _agent_context.set(context)
+    return context
+
+def with_agent_context(fn):
+    """Run an async method with a fresh AgentContext, restoring the caller's afterwards."""
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = _agent_context.set(AgentContext())
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _agent_context.reset(token)
+    return wrapper
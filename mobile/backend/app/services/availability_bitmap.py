@@ -0,0 +1,158 @@
+"""NumPy bitmaps of participant availability over fixed-size time buckets."""
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from app.services.scheduling_engine import (
+    CandidateSlot,
+    DEFAULT_DURATION_MINUTES,
+    DEFAULT_SEARCH_DAYS,
+    DEFAULT_TOP_K,
+    SLOT_ALIGNMENT_MINUTES,
+    align_slot_start,
+    parse_time
+)
+
+DEFAULT_BUCKET_MINUTES = 15
+
+def _timestamp(value) -> float:
+    # Naive values are taken as server local time, matching scheduling_engine.parse_time
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+def slot_bounds(slots: list[dict]) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end of each slot as POSIX seconds, parsed once into two arrays."""
+    starts = np.fromiter((_timestamp(s["start_time"]) for s in slots), dtype=np.float64, count=len(slots))
+    ends = np.fromiter((_timestamp(s["end_time"]) for s in slots), dtype=np.float64, count=len(slots))
+    return starts, ends
+
+class AvailabilityBitmap:
+    """Free/busy state of a group as a (participants x buckets) boolean matrix.
+
+    Each row is one participant and each column one bucket of bucket_minutes
+    starting at window_start. A bucket is free only if the participant has no busy
+    slot touching it and, when they gave available slots, it lies inside one of
+    them. Ranking candidate slots is then whole-matrix cumulative sums instead of
+    per-slot Python loops.
+    """
+
+    def __init__(self, keys: list[str], free: np.ndarray, window_start: datetime, bucket_minutes: int):
+        self.keys = keys
+        self.free = free
+        self.window_start = window_start
+        self.bucket_minutes = bucket_minutes
+
+    @classmethod
+    def from_slots(
+        cls,
+        participant_slots: dict[str, list[dict]],
+        window_start: datetime,
+        window_end: datetime,
+        bucket_minutes: int = DEFAULT_BUCKET_MINUTES
+    ) -> "AvailabilityBitmap":
+        """Build the bitmap from participant key -> busy/available slots."""
+        window_start, window_end = parse_time(window_start), parse_time(window_end)
+        bucket_seconds = bucket_minutes * 60
+        n_buckets = max(0, int(np.ceil((window_end - window_start).total_seconds() / bucket_seconds)))
+        keys = list(participant_slots)
+        origin = window_start.timestamp()
+
+        def mark(slot_type: str) -> tuple[np.ndarray, np.ndarray]:
+            # Every participant's slots of this type in flat arrays, tagged with their row
+            rows, slots = [], []
+            for row, key in enumerate(keys):
+                for slot in participant_slots[key] or []:
+                    if slot.get("slot_type", "busy") == slot_type:
+                        rows.append(row)
+                        slots.append(slot)
+            rows = np.asarray(rows, dtype=np.int64)
+            has_slots = np.zeros(len(keys), dtype=bool)
+            has_slots[rows] = True
+            starts, ends = slot_bounds(slots)
+            if slot_type == "busy":
+                # Any overlap makes the bucket busy
+                first = np.floor((starts - origin) / bucket_seconds)
+                last = np.ceil((ends - origin) / bucket_seconds)
+            else:
+                # Only buckets entirely inside the window count as available
+                first = np.ceil((starts - origin) / bucket_seconds)
+                last = np.floor((ends - origin) / bucket_seconds)
+            first = np.clip(first, 0, n_buckets).astype(np.int64)
+            last = np.clip(last, 0, n_buckets).astype(np.int64)
+            keep = first < last
+            # Difference array: +1 at the first covered bucket, -1 after the last
+            diff = np.zeros((len(keys), n_buckets + 1), dtype=np.int32)
+            np.add.at(diff, (rows[keep], first[keep]), 1)
+            np.add.at(diff, (rows[keep], last[keep]), -1)
+            return np.cumsum(diff, axis=1)[:, :n_buckets] > 0, has_slots
+
+        busy, _ = mark("busy")
+        available, has_available = mark("available")
+        free = ~busy
+        # Participants who gave available windows are free only inside them
+        free[has_available] &= available[has_available]
+        return cls(keys, free, window_start, bucket_minutes)
+
+    def bucket_time(self, index: int) -> datetime:
+        return self.window_start + timedelta(minutes=index * self.bucket_minutes)
+
+    def free_for_window(self, n_buckets: int) -> np.ndarray:
+        """(participants x starts) matrix: free for n_buckets in a row from each start."""
+        busy = np.concatenate(
+            [np.zeros((len(self.keys), 1), dtype=np.int32), np.cumsum(~self.free, axis=1, dtype=np.int32)],
+            axis=1
+        )
+        return (busy[:, n_buckets:] - busy[:, :-n_buckets]) == 0
+
+    def find_candidate_slots(
+        self,
+        duration_minutes: int = DEFAULT_DURATION_MINUTES,
+        top_k: int = DEFAULT_TOP_K
+    ) -> list[CandidateSlot]:
+        """Rank slots like scheduling_engine.find_candidate_slots, trying every aligned start."""
+        n_buckets = -(-duration_minutes // self.bucket_minutes)
+        if not self.keys or n_buckets > self.free.shape[1]:
+            return []
+        free = self.free_for_window(n_buckets)
+        counts = free.sum(axis=0)
+        starts = np.arange(counts.size)
+        # Start only on the alignment grid, like the sweep engine
+        step = max(1, SLOT_ALIGNMENT_MINUTES // self.bucket_minutes)
+        offset = int(self.window_start.minute % SLOT_ALIGNMENT_MINUTES // self.bucket_minutes)
+        on_grid = ((starts + offset) % step == 0) & (counts > 0)
+        ordered = starts[on_grid][np.lexsort((starts[on_grid], -counts[on_grid]))]
+
+        candidates: list[CandidateSlot] = []
+        taken: list[int] = []
+        for start in ordered:
+            # Skip starts overlapping an already chosen slot
+            if any(abs(int(start) - t) < n_buckets for t in taken):
+                continue
+            taken.append(int(start))
+            members = free[:, start]
+            slot_start = self.bucket_time(int(start))
+            candidates.append(CandidateSlot(
+                start=slot_start,
+                end=slot_start + timedelta(minutes=duration_minutes),
+                available=sorted(k for k, f in zip(self.keys, members) if f),
+                unavailable=sorted(k for k, f in zip(self.keys, members) if not f)
+            ))
+            if len(candidates) == top_k:
+                break
+        return candidates
+
+def find_candidate_slots_bitmap(
+    participant_slots: dict[str, list[dict]],
+    window_start: Optional[datetime] = None,
+    window_end: Optional[datetime] = None,
+    duration_minutes: int = DEFAULT_DURATION_MINUTES,
+    top_k: int = DEFAULT_TOP_K,
+    bucket_minutes: int = DEFAULT_BUCKET_MINUTES
+) -> list[CandidateSlot]:
+    """Bitmap-backed candidate search for large groups over long windows."""
+    window_start = align_slot_start(parse_time(window_start or datetime.now()))
+    window_end = parse_time(window_end) if window_end else window_start + timedelta(days=DEFAULT_SEARCH_DAYS)
+    bitmap = AvailabilityBitmap.from_slots(participant_slots, window_start, window_end, bucket_minutes)
+    return bitmap.find_candidate_slots(duration_minutes, top_k)
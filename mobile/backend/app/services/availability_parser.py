@@ -0,0 +1,340 @@
+"""Local parser for availability replies such as "free Tue after 6 or Thursday noon-2".
+
+parse_availability turns common English phrasing into time slots without the LLM.
+It only succeeds when every word of the reply is understood; anything else returns
+None so the caller can fall back to the LLM.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+# Hours used when a reply gives a day but no time, or an open-ended "after"/"before"
+DAY_START_HOUR = 8
+DAY_END_HOUR = 23
+# Length of a slot given as a single time ("Thursday at 7")
+POINT_SLOT_MINUTES = 60
+
+WEEKDAYS = {
+    "mon": 0, "monday": 0,
+    "tue": 1, "tues": 1, "tuesday": 1,
+    "wed": 2, "weds": 2, "wednesday": 2,
+    "thu": 3, "thur": 3, "thurs": 3, "thursday": 3,
+    "fri": 4, "friday": 4,
+    "sat": 5, "saturday": 5,
+    "sun": 6, "sunday": 6,
+}
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3, "apr": 4, "april": 4,
+    "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7, "aug": 8, "august": 8,
+    "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10, "nov": 11, "november": 11,
+    "dec": 12, "december": 12,
+}
+# (start hour, end hour) for parts of the day
+DAY_PARTS = {
+    "morning": (8, 12),
+    "afternoon": (12, 17),
+    "evening": (17, 22),
+    "night": (18, 23),
+    "tonight": (18, 23),
+    "lunch": (12, 13),
+    "all day": (DAY_START_HOUR, DAY_END_HOUR),
+    "anytime": (DAY_START_HOUR, DAY_END_HOUR),
+    "any time": (DAY_START_HOUR, DAY_END_HOUR),
+    "whenever": (DAY_START_HOUR, DAY_END_HOUR),
+}
+# Words that carry no availability information
+FILLER_WORDS = {
+    "i", "im", "am", "on", "the", "or", "and", "also", "either", "is", "are", "me", "for", "pretty",
+    "much", "would", "be", "should", "fine", "great", "too", "as", "well", "only", "then", "hey", "hi",
+    "yes", "yeah", "yep", "sure", "ok", "okay", "so", "thanks", "day", "days", "time", "times", "works",
+    "work", "good", "both", "any", "of", "those", "in", "at", "around", "this", "that", "it", "totally",
+    "probably", "could", "do", "can",
+}
+
+_WEEKDAY_RE = "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+_MONTH_RE = "|".join(sorted(MONTHS, key=len, reverse=True))
+_TIME_RE = r"(?:noon|midnight|\d{1,2}(?::\d{2})?(?:\s*(?:am|pm)|[ap](?![a-z]))?)(?![\w/:])"
+_DAY_PART_RE = "|".join(re.escape(p) for p in sorted(DAY_PARTS, key=len, reverse=True))
+
+# Tried in order at each position; the first match wins
+PATTERNS = [
+    ("busy", re.compile(
+        r"busy|not\s+(?:free|available|around)|unavailable|cant\s+do|cannot\s+do|cant|cannot|booked|"
+        r"(?:does\s*nt|doesnt|dont|wont)\s+work|no\s+good"
+    )),
+    ("free", re.compile(r"free|available|open|down|can\s+do|could\s+do|works\s+for\s+me")),
+    ("day", re.compile(
+        rf"(?:day\s+after\s+tomorrow)|today|tonight|tomorrow|tmrw|tmr|"
+        rf"(?:this\s+)?weekends?|weekdays|"
+        rf"(?:this\s+)?(?:{_WEEKDAY_RE})s?(?![a-z])|"
+        rf"(?:{_MONTH_RE})\s+\d{{1,2}}(?:st|nd|rd|th)?(?![\w:])|"
+        rf"\d{{1,2}}/\d{{1,2}}(?![\w/])"
+    )),
+    ("range", re.compile(
+        rf"(?:from\s+)?(?P<t1>{_TIME_RE})\s*(?:-|to|until|till|til)\s*(?P<t2>{_TIME_RE})|"
+        rf"between\s+(?P<b1>{_TIME_RE})\s+and\s+(?P<b2>{_TIME_RE})"
+    )),
+    ("after", re.compile(rf"(?:after|from|past|any\s*time\s+after)\s+(?P<t>{_TIME_RE})")),
+    ("before", re.compile(rf"(?:before|until|till|til|by)\s+(?P<t>{_TIME_RE})")),
+    ("part", re.compile(rf"(?:in\s+the\s+)?(?P<p>{_DAY_PART_RE})s?(?![a-z])")),
+    ("point", re.compile(rf"(?:at\s+|around\s+|@\s*)?(?P<t>{_TIME_RE})")),
+]
+
+@dataclass
+class _Item:
+    kind: str  # "day" or "time"
+    value: object  # list[date] for days, (start minutes, end minutes) for times
+    slot_type: str
+    default_span: tuple[int, int] = (DAY_START_HOUR * 60, DAY_END_HOUR * 60)  # days given without a time
+
+def normalize_availability(text: str) -> str:
+    text = (text or "").lower()
+    text = re.sub(r"[’'`]", "", text)
+    text = re.sub(r"[–—]", "-", text)
+    text = re.sub(r"(\d)\s*(a|p)\.m\.?", r"\1\2m", text)
+    text = re.sub(r"[^\w\s:/@-]", " ", text)
+    return " ".join(text.split())
+
+def parse_availability(text: str, now: datetime) -> Optional[list[dict]]:
+    """Parse an availability reply into slots relative to now (an aware datetime).
+
+    Returns:
+        List of {start_time, end_time, slot_type} dicts with ISO times in now's
+        timezone, or None if any part of the reply isn't understood
+    """
+    normalized = normalize_availability(text)
+    if not normalized:
+        return None
+    items = _scan(normalized, now.date())
+    if items is None or not any(item.kind == "time" or item.kind == "day" for item in items):
+        return None
+
+    pairs = _pair(items, now)
+    if pairs is None:
+        return None
+    slots = []
+    for days, times, slot_type in pairs:
+        for day in days:
+            for start, end in times:
+                start_dt = datetime.combine(day, time(0), now.tzinfo) + timedelta(minutes=start)
+                end_dt = datetime.combine(day, time(0), now.tzinfo) + timedelta(minutes=end)
+                if end_dt > now:
+                    slots.append({
+                        "start_time": max(start_dt, now).replace(second=0, microsecond=0).isoformat(),
+                        "end_time": end_dt.isoformat(),
+                        "slot_type": slot_type
+                    })
+    return slots or None
+
+def _scan(text: str, today: date) -> Optional[list[_Item]]:
+    """Tokenize into day and time items, or None on any word that isn't understood."""
+    items: list[_Item] = []
+    slot_type = "available"
+    pos = 0
+    while pos < len(text):
+        if text[pos] in " -,":
+            pos += 1
+            continue
+        for kind, pattern in PATTERNS:
+            match = pattern.match(text, pos)
+            if not match or not _ends_word(text, match.end()):
+                continue
+            token = match.group(0)
+            if kind in ("busy", "free"):
+                slot_type = "busy" if kind == "busy" else "available"
+            elif kind == "day":
+                days = _resolve_day(token, today)
+                if days is None:
+                    return None
+                item = _Item("day", days, slot_type)
+                if token == "tonight":
+                    item.default_span = (DAY_PARTS["tonight"][0] * 60, DAY_PARTS["tonight"][1] * 60)
+                items.append(item)
+            else:
+                span = _resolve_time(kind, match)
+                if span is None:
+                    return None
+                items.append(_Item("time", span, slot_type))
+            pos = match.end()
+            break
+        else:
+            word = re.match(r"\S+", text[pos:]).group(0)
+            if word not in FILLER_WORDS:
+                return None
+            pos += len(word)
+    # A closing free/busy that changes nothing read so far ("busy until 5 then free",
+    # "Tuesday busy") has no times of its own; let the LLM read it rather than drop it
+    if items and items[-1].slot_type != slot_type:
+        return None
+    return items
+
+def _ends_word(text: str, end: int) -> bool:
+    return end == len(text) or not text[end].isalnum()
+
+def _pair(items: list[_Item], now: datetime) -> Optional[list[tuple[list[date], list[tuple[int, int]], str]]]:
+    """Attach each group of days to the times right after it (or right before it).
+
+    Returns None when times lead the reply but the days after them have their own
+    times ("after 6 Tue, Wed noon-2"), as it's unclear which days they belong to.
+    """
+    # Consecutive days share times only while free/busy doesn't change ("busy Tue, free Wed 6-8")
+    groups: list[list[_Item]] = []
+    for item in items:
+        if groups and groups[-1][0].kind == item.kind and (
+            item.kind == "time" or groups[-1][-1].slot_type == item.slot_type
+        ):
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+
+    pairs = []
+    claimed = set()
+    day_groups = [i for i, g in enumerate(groups) if g[0].kind == "day"]
+    for i in day_groups:
+        days = [d for item in groups[i] for d in item.value]
+        time_group = None
+        if i + 1 < len(groups) and groups[i + 1][0].kind == "time":
+            time_group = i + 1
+        elif i > 0 and i - 1 not in claimed and groups[i - 1][0].kind == "time":
+            time_group = i - 1
+        if time_group is None:
+            for item in groups[i]:
+                pairs.append((item.value, [item.default_span], item.slot_type))
+            continue
+        claimed.add(time_group)
+        tonight = all(item.default_span[0] >= 17 * 60 for item in groups[i])
+        for item in groups[time_group]:
+            start, end = item.value
+            if tonight and start < 12 * 60:
+                # "tonight after 8" is 8pm
+                start, end = start + 12 * 60, end + 12 * 60 if end <= 12 * 60 else end
+            pairs.append((days, [(start, end)], item.slot_type))
+
+    for i, group in enumerate(groups):
+        if group[0].kind != "time" or i in claimed:
+            continue
+        # Times with no day apply to today (tomorrow once passed)
+        if day_groups:
+            return None
+        days = [now.date()]
+        if all(item.value[1] <= now.hour * 60 + now.minute for item in group):
+            days = [now.date() + timedelta(days=1)]
+        for item in group:
+            pairs.append((days, [item.value], item.slot_type))
+    return pairs
+
+def _resolve_day(token: str, today: date) -> Optional[list[date]]:
+    token = re.sub(r"^this\s+", "", token)
+    if token in ("today", "tonight"):
+        return [today]
+    if token in ("tomorrow", "tmrw", "tmr"):
+        return [today + timedelta(days=1)]
+    if token == "day after tomorrow" or re.fullmatch(r"day\s+after\s+tomorrow", token):
+        return [today + timedelta(days=2)]
+    if token.startswith("weekend"):
+        return [d for d in (_next_weekday(today, 5), _next_weekday(today, 6)) if d is not None]
+    if token == "weekdays":
+        return [today + timedelta(days=i) for i in range(7) if (today + timedelta(days=i)).weekday() < 5]
+    name = token[:-1] if token.endswith("s") and token[:-1] in WEEKDAYS else token
+    if name in WEEKDAYS:
+        return [_next_weekday(today, WEEKDAYS[name])]
+    match = re.fullmatch(rf"({_MONTH_RE})\s+(\d{{1,2}})(?:st|nd|rd|th)?", token)
+    if match:
+        return _dated(today, MONTHS[match.group(1)], int(match.group(2)))
+    match = re.fullmatch(r"(\d{1,2})/(\d{1,2})", token)
+    if match:
+        return _dated(today, int(match.group(1)), int(match.group(2)))
+    return None
+
+def _next_weekday(today: date, weekday: int) -> date:
+    """The next date with this weekday, today included."""
+    return today + timedelta(days=(weekday - today.weekday()) % 7)
+
+def _dated(today: date, month: int, day: int) -> Optional[list[date]]:
+    """A month/day in the current year, or next year if it has already passed."""
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = date(year, month, day)
+        except ValueError:
+            return None
+        if candidate >= today:
+            return [candidate]
+    return None
+
+def _parse_clock(token: str) -> tuple[int, int, Optional[str]]:
+    """(hour, minute, "am"/"pm"/None) for a time token."""
+    token = token.replace(" ", "")
+    if token == "noon":
+        return 12, 0, "pm"
+    if token == "midnight":
+        return 12, 0, "am"
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?(am|pm|a|p)?", token)
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        meridiem = "am" if meridiem.startswith("a") else "pm"
+    return hour, minute, meridiem
+
+def _to_minutes(hour: int, minute: int, meridiem: Optional[str]) -> Optional[int]:
+    if meridiem is None:
+        if hour > 23 or minute > 59:
+            return None
+        # Bare hours: 1-7 mean afternoon/evening, 8-12 as written ("after 6" is 6pm)
+        if 1 <= hour <= 7:
+            hour += 12
+        return hour * 60 + minute
+    if not 1 <= hour <= 12 or minute > 59:
+        return None
+    hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    return hour * 60 + minute
+
+def _resolve_time(kind: str, match: re.Match) -> Optional[tuple[int, int]]:
+    if kind == "part":
+        start_hour, end_hour = DAY_PARTS[match.group("p")]
+        return start_hour * 60, end_hour * 60
+    if kind == "range":
+        first = _parse_clock(match.group("t1") or match.group("b1"))
+        second = _parse_clock(match.group("t2") or match.group("b2"))
+        return _resolve_range(first, second)
+    clock = _parse_clock(match.group("t"))
+    minutes = _to_minutes(*clock)
+    if minutes is None:
+        return None
+    if clock[:2] == (12, 0) and clock[2] == "am":
+        minutes = 24 * 60  # midnight as an end point
+    if kind == "after":
+        start, end = minutes, min(max(DAY_END_HOUR * 60, minutes + POINT_SLOT_MINUTES), 24 * 60)
+    elif kind == "before":
+        start, end = DAY_START_HOUR * 60, minutes
+    else:
+        start, end = minutes, min(minutes + POINT_SLOT_MINUTES, 24 * 60)
+    # Empty spans ("at midnight", "before 8am") can't be stored as slots
+    return (start, end) if end > start else None
+
+def _resolve_range(first: tuple, second: tuple) -> Optional[tuple[int, int]]:
+    """Resolve a start-end pair, borrowing am/pm across ends ("6-8pm", "11-1")."""
+    (h1, m1, mer1), (h2, m2, mer2) = first, second
+    if mer2 and not mer1:
+        end = _to_minutes(h2, m2, mer2)
+        if end is None or h1 > 12:
+            return None
+        # Latest reading of the start that is still before the end
+        options = [t for t in (_to_minutes(h1, m1, "am"), _to_minutes(h1, m1, "pm")) if t is not None and t < end]
+        start = max(options) if options else None
+    else:
+        start = _to_minutes(h1, m1, mer1)
+        if start is None:
+            return None
+        if mer2:
+            end = _to_minutes(h2, m2, mer2)
+        else:
+            # Earliest reading of the end that is after the start
+            options = [
+                t for t in (_to_minutes(h2, m2, "am"), _to_minutes(h2, m2, "pm")) if t is not None and t > start
+            ] if h2 <= 12 else [h2 * 60 + m2]
+            end = min(options) if options else None
+    if end == 0:
+        end = 24 * 60  # "10pm-12am"
+    if start is None or end is None or end <= start:
+        return None
+    return start, end
@@ -0,0 +1,164 @@
+"""Per-user busy-interval cache kept fresh with Google Calendar incremental sync."""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.services.database_service import DatabaseService
+from app.services.google_calendar_service import (
+    GoogleCalendarService,
+    CalendarAPIError,
+    HOLIDAY_CALENDAR_ID,
+    merge_busy_intervals,
+    to_rfc3339_range
+)
+
+logger = logging.getLogger(__name__)
+
+class CalendarCacheService:
+    """Caches each user's busy intervals per calendar in the database.
+
+    Freshness is explicit:
+      - Within CALENDAR_CACHE_TTL_SECONDS of the last sync, lookups are served from the
+        database without contacting Google.
+      - After that, each calendar is brought up to date with its syncToken, which only
+        transfers events changed since the previous sync.
+      - A calendar's cache expires CALENDAR_CACHE_MAX_AGE_HOURS after its last full sync,
+        or when Google rejects the token (410), and is then rebuilt from scratch.
+      - A full sync covers from the requested start to CALENDAR_CACHE_HORIZON_DAYS ahead
+        (or the requested end, if later), so open-ended recurring events aren't expanded
+        indefinitely; lookups outside the covered window trigger a full sync.
+      - invalidate() drops a user's cache immediately, e.g. after they reconnect Google.
+    """
+
+    def __init__(self, db_service: DatabaseService, google_calendar_service: GoogleCalendarService):
+        self.db_service = db_service
+        self.google_calendar_service = google_calendar_service
+        self.ttl = timedelta(seconds=settings.CALENDAR_CACHE_TTL_SECONDS)
+        self.max_age = timedelta(hours=settings.CALENDAR_CACHE_MAX_AGE_HOURS)
+        self.horizon = timedelta(days=settings.CALENDAR_CACHE_HORIZON_DAYS)
+        # One sync per user at a time; concurrent lookups wait and then hit the fresh cache
+        self._locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def get_busy_intervals(self, user_id: str, access_token: str, start_date: str, end_date: str) -> list[dict]:
+        """Get a user's merged busy intervals within a date range, syncing stale calendars first."""
+        start_date, end_date = to_rfc3339_range(start_date, end_date)
+        start, end = datetime.fromisoformat(start_date), datetime.fromisoformat(end_date)
+        if start.tzinfo is None:
+            start = start.astimezone()
+        if end.tzinfo is None:
+            end = end.astimezone()
+        async with self._locks[user_id]:
+            await self._refresh(user_id, access_token, start, end)
+        rows = await self.db_service.get_calendar_busy_intervals(user_id, start_date, end_date)
+        return merge_busy_intervals([{"start": r["start_time"], "end": r["end_time"]} for r in rows])
+
+    async def invalidate(self, user_id: str, calendar_id: str = None) -> None:
+        """Drop the cached intervals and sync state for one or all of a user's calendars."""
+        async with self._locks[user_id]:
+            await self.db_service.delete_calendar_cache(user_id, calendar_id)
+        logger.info(f"Invalidated calendar cache for user {user_id}")
+
+    async def _refresh(self, user_id: str, access_token: str, start: datetime, end: datetime) -> None:
+        now = datetime.now().astimezone()
+        states = {
+            s["calendar_id"]: s
+            for s in await self.db_service.get_calendar_sync_states(user_id)
+        }
+        if states and all(self._is_fresh(s, now, start, end) for s in states.values()):
+            return
+
+        calendar_ids = [
+            cal_id for cal_id in await self.google_calendar_service.get_calendar_ids(access_token)
+            if cal_id != HOLIDAY_CALENDAR_ID
+        ]
+        # Calendars the user no longer has
+        for cal_id in set(states) - set(calendar_ids):
+            await self.db_service.delete_calendar_cache(user_id, cal_id)
+
+        semaphore = asyncio.Semaphore(settings.GOOGLE_CALENDAR_MAX_CONCURRENCY)
+
+        async def sync(cal_id: str) -> None:
+            state = states.get(cal_id)
+            if state and self._is_fresh(state, now, start, end):
+                return
+            async with semaphore:
+                await self._sync_calendar(user_id, access_token, cal_id, state, start, end, now)
+
+        await asyncio.gather(*(sync(cal_id) for cal_id in calendar_ids))
+
+    def _is_fresh(self, state: dict, now: datetime, start: datetime, end: datetime) -> bool:
+        return (
+            datetime.fromisoformat(state["synced_at"]) + self.ttl > now
+            and self._can_sync_incrementally(state, now, start, end)
+        )
+
+    @staticmethod
+    def _can_sync_incrementally(state: dict, now: datetime, start: datetime, end: datetime) -> bool:
+        return (
+            bool(state.get("sync_token"))
+            and bool(state.get("covered_to"))
+            and datetime.fromisoformat(state["expires_at"]) > now
+            and datetime.fromisoformat(state["covered_from"]) <= start
+            and datetime.fromisoformat(state["covered_to"]) >= end
+        )
+
+    async def _sync_calendar(
+        self,
+        user_id: str,
+        access_token: str,
+        calendar_id: str,
+        state: dict,
+        start: datetime,
+        end: datetime,
+        now: datetime
+    ) -> None:
+        if state is not None and self._can_sync_incrementally(state, now, start, end):
+            covered_to = datetime.fromisoformat(state["covered_to"])
+            try:
+                changes = await self.google_calendar_service.sync_events(
+                    access_token, calendar_id, sync_token=state["sync_token"]
+                )
+                # Incremental changes aren't bounded by time; keep the cache within the covered
+                # window, dropping the cached interval of any event that moved past it
+                events, beyond = [], []
+                for event in changes["events"]:
+                    (events if datetime.fromisoformat(event["start"]) < covered_to else beyond).append(event)
+                await self.db_service.delete_calendar_busy_intervals(
+                    user_id, calendar_id, changes["removed"] + [e["id"] for e in beyond]
+                )
+                await self.db_service.upsert_calendar_busy_intervals(user_id, calendar_id, events)
+                await self.db_service.upsert_calendar_sync_state(
+                    user_id,
+                    calendar_id,
+                    changes["next_sync_token"],
+                    datetime.fromisoformat(state["covered_from"]),
+                    covered_to,
+                    datetime.fromisoformat(state["expires_at"])
+                )
+                return
+            except CalendarAPIError as e:
+                if e.status != 410:
+                    raise
+                logger.info(f"Sync token expired for user {user_id} calendar {calendar_id}, doing a full sync")
+
+        # Full sync from the earlier of the requested start and the previous coverage,
+        # up to the horizon or the requested end, whichever is later
+        covered_from = start
+        if state is not None:
+            covered_from = min(covered_from, datetime.fromisoformat(state["covered_from"]))
+        covered_to = max(end, now + self.horizon)
+        snapshot = await self.google_calendar_service.sync_events(
+            access_token, calendar_id, start_date=covered_from.isoformat(), end_date=covered_to.isoformat()
+        )
+        await self.db_service.delete_calendar_cache(user_id, calendar_id)
+        await self.db_service.upsert_calendar_busy_intervals(user_id, calendar_id, snapshot["events"])
+        await self.db_service.upsert_calendar_sync_state(
+            user_id,
+            calendar_id,
+            snapshot["next_sync_token"],
+            covered_from,
+            covered_to,
+            now + self.max_age
+        )
@@ -0,0 +1,112 @@
+"""Bounded conversation memory for chat sessions: recent turns verbatim plus a rolling summary."""
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.services.database_service import DatabaseService
+from app.services.llm_client import get_llm_client, get_llm_semaphore
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain the memory of a chat between a user and Joe, an event planning assistant.
+Update the summary with the new messages. Keep people, phone numbers, events, dates, times
+and decisions that may matter later; drop small talk. Reply with the updated summary only,
+at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+
+class ChatMemoryService:
+    """Builds agent context from a chat session without growing with its length.
+
+    The last CHAT_MEMORY_RECENT_MESSAGES messages are passed verbatim. Older ones
+    are folded into chat_sessions.summary once, as they age out of that window;
+    summarized_through_seq records how far the summary reaches, so each update only
+    reads the newly aged-out messages.
+    """
+
+    def __init__(self, db_service: DatabaseService, model: str):
+        self.db_service = db_service
+        self.model = model
+        self.recent_messages = settings.CHAT_MEMORY_RECENT_MESSAGES
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    async def build_context(self, chat_session_id: str) -> list[dict]:
+        """Messages to place between the system prompt and the new user message."""
+        summary, recent = await asyncio.gather(
+            self.db_service.get_chat_session_summary(chat_session_id),
+            self.db_service.get_last_k_chat_session_messages(chat_session_id, self.recent_messages)
+        )
+        context = []
+        if summary.get("summary"):
+            context.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation with this user:\n{summary['summary']}"
+            })
+        for message in recent:
+            if message.get("role") in ("user", "assistant") and message.get("content"):
+                context.append({
+                    "role": message["role"],
+                    "content": message["content"][:settings.CHAT_MEMORY_MAX_MESSAGE_CHARS]
+                })
+        return context
+
+    def schedule_update(self, chat_session_id: str) -> None:
+        """Fold aged-out messages into the summary in the background, one update per session at a time."""
+        task = self._tasks.get(chat_session_id)
+        if task and not task.done():
+            return
+        self._tasks[chat_session_id] = asyncio.create_task(self._update_summary(chat_session_id))
+
+    async def close(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _update_summary(self, chat_session_id: str) -> None:
+        try:
+            recent = await self.db_service.get_chat_session_messages_page(chat_session_id, None, self.recent_messages)
+            if not recent["seqs"] or recent["next_before"] is None:
+                return  # Everything still fits in the verbatim window
+            summary = await self.db_service.get_chat_session_summary(chat_session_id)
+            aged_out = await self.db_service.get_chat_session_messages_between(
+                chat_session_id,
+                summary.get("summarized_through_seq") or 0,
+                recent["seqs"][0],
+                settings.CHAT_MEMORY_SUMMARY_BATCH
+            )
+            if not aged_out:
+                return
+            updated = await self._summarize(summary.get("summary"), [row["message"] for row in aged_out])
+            if updated:
+                await self.db_service.update_chat_session_summary(chat_session_id, updated, aged_out[-1]["seq"])
+        except Exception as e:
+            # The previous summary stays valid; the next turn retries
+            logger.warning(f"Failed to update summary for chat session {chat_session_id}: {str(e)}")
+        finally:
+            self._tasks.pop(chat_session_id, None)
+
+    async def _summarize(self, summary: Optional[str], messages: list[dict]) -> Optional[str]:
+        lines = "\n".join(
+            f"{m.get('role')}: {str(m.get('content'))[:settings.CHAT_MEMORY_MAX_MESSAGE_CHARS]}"
+            for m in messages if m.get("content")
+        )
+        if not lines:
+            return summary
+        prompt = SUMMARY_PROMPT.format(
+            max_words=settings.CHAT_MEMORY_SUMMARY_MAX_WORDS,
+            summary=summary or "(empty)",
+            messages=lines
+        )
+        async with get_llm_semaphore():
+            response = await get_llm_client().chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=settings.CHAT_MEMORY_SUMMARY_MAX_WORDS * 2
+            )
+        return (response.choices[0].message.content or "").strip() or summary
@@ -0,0 +1,155 @@
+"""Rule-based classification of replies to event invitations."""
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Whole replies (after normalization) that settle the invitation on their own
+AFFIRMATIVE_PHRASES = {
+    "y", "yes", "ye", "yeah", "yea", "yah", "ya", "yep", "yup", "sure", "ok", "okay", "k", "kk",
+    "absolutely", "definitely", "of course", "for sure", "sounds good", "sounds great", "sounds fun",
+    "im in", "i am in", "count me in", "im down", "i am down", "down", "im there", "ill be there",
+    "i will be there", "see you there", "see you then", "will do", "works for me", "totally",
+    "yes please", "sure thing", "lets do it", "lets go", "bet", "i can make it", "i can come",
+    "i can go", "id love to", "i would love to", "love to", "would love to", "confirmed", "confirm",
+}
+NEGATIVE_PHRASES = {
+    "n", "no", "nope", "nah", "na", "no thanks", "no thank you", "not this time", "pass", "ill pass",
+    "i will pass", "im out", "count me out", "cant", "i cant", "cant make it", "i cant make it",
+    "cannot make it", "i cannot make it", "cant come", "i cant come", "cant go", "i cant go",
+    "wont make it", "i wont make it", "not going", "im not going", "i wont be there", "not gonna make it",
+    "im busy", "busy", "sorry cant", "sorry i cant", "unfortunately not", "unfortunately i cant",
+    "decline", "not available", "im not available", "i am not available", "cant do it", "i cant do it",
+}
+# Negative phrases that decline only as the whole reply; as part of a longer one they
+# often don't ("no, I'd love to", "I can't miss it", "not going to miss it")
+WHOLE_REPLY_NEGATIVES = {
+    "n", "no", "nope", "nah", "na", "pass", "decline", "busy", "im busy", "cant", "i cant", "sorry cant",
+    "sorry i cant", "unfortunately i cant", "not going", "im not going", "im out",
+}
+# Softeners that may precede or follow a decisive phrase ("sorry, can't make it")
+FILLER_WORDS = {"oh", "hey", "hi", "sorry", "thanks", "thank", "you", "ty", "so", "um", "uh", "well", "haha", "lol"}
+# Idioms built from negative words that don't decline anything ("no worries", "can't wait")
+NON_NEGATIVE_IDIOMS = {"no problem", "no prob", "no probs", "not a problem", "no worries", "no doubt", "cant wait", "can not wait"}
+# Words that make a reply too uncertain to settle without the LLM; time qualifiers
+# ("busy until 5") mean the reply is about availability, not a plain yes or no
+HEDGE_WORDS = {
+    "maybe", "might", "perhaps", "possibly", "probably", "unsure", "idk", "depends", "tentatively",
+    "if", "unless", "but", "check", "let", "later", "when", "what", "where", "who",
+    "until", "till", "til", "after", "before", "except",
+}
+AFFIRMATIVE_EMOJI = {"👍", "✅", "👌", "🙌", "💯", "🎉", "🥳", "🙋", "✔", "☑"}
+NEGATIVE_EMOJI = {"👎", "❌", "🙅", "🚫", "😢", "😞", "✖"}
+
+# Replies longer than this usually carry more than a yes or no
+MAX_WORDS = 12
+
+@dataclass
+class ConfirmationDecision:
+    """Outcome of classifying a reply: confirmed is None when the rules can't tell."""
+    confirmed: Optional[bool]
+    confidence: float
+    reason: str
+
+def normalize_reply(text: str) -> str:
+    """Lowercase, drop apostrophes and punctuation, squeeze letters repeated for emphasis."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = re.sub(r"[’'`]", "", text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = re.sub(r"(\w)\1{2,}", r"\1", text)  # "yesss" -> "yes", "noooo" -> "no"
+    return " ".join(text.split())
+
+def classify_confirmation(text: str) -> ConfirmationDecision:
+    """Classify a reply to an invitation as yes, no or unsure, with a confidence."""
+    raw = text or ""
+    emoji_yes = any(e in raw for e in AFFIRMATIVE_EMOJI)
+    emoji_no = any(e in raw for e in NEGATIVE_EMOJI)
+    with_idioms = normalize_reply(raw)
+    normalized = _strip_idioms(with_idioms)
+    words = normalized.split()
+
+    if not words:
+        if emoji_yes != emoji_no:
+            return ConfirmationDecision(emoji_yes, 0.9, "emoji")
+        if with_idioms:
+            return ConfirmationDecision(None, 0.0, "idiom only")
+        return ConfirmationDecision(None, 0.0, "empty" if not (emoji_yes or emoji_no) else "mixed emoji")
+    if len(words) > MAX_WORDS:
+        return ConfirmationDecision(None, 0.0, "long reply")
+    if any(w in HEDGE_WORDS for w in words) or "not sure" in normalized or "?" in raw:
+        return ConfirmationDecision(None, 0.0, "hedged or question")
+
+    core = " ".join(w for w in words if w not in FILLER_WORDS)
+    if core in AFFIRMATIVE_PHRASES and not emoji_no:
+        return ConfirmationDecision(True, 0.97, "phrase")
+    if core in NEGATIVE_PHRASES and not emoji_yes:
+        return ConfirmationDecision(False, 0.97, "phrase")
+
+    # A decisive phrase at the start or end, with a short remainder ("yes see you then")
+    yes = _edge_match(core, AFFIRMATIVE_PHRASES)
+    no = _edge_match(core, NEGATIVE_PHRASES - WHOLE_REPLY_NEGATIVES)
+    yes = yes or emoji_yes
+    no = no or emoji_no
+    if yes and no:
+        return ConfirmationDecision(None, 0.0, "conflicting")
+    if yes or no:
+        # A negation elsewhere makes an affirmative phrase unreliable ("absolutely, can't wait")
+        if yes and any(w in ("not", "no", "never", "cant", "wont", "dont") for w in words):
+            return ConfirmationDecision(None, 0.4, "negated")
+        confidence = 0.9 if len(words) <= 6 else 0.8
+        return ConfirmationDecision(bool(yes), confidence, "leading or trailing phrase")
+    return ConfirmationDecision(None, 0.0, "no match")
+
+def _strip_idioms(normalized: str) -> str:
+    for idiom in NON_NEGATIVE_IDIOMS:
+        normalized = re.sub(rf"\b{idiom}\b", " ", normalized)
+    return " ".join(normalized.split())
+
+def _edge_match(core: str, phrases: set[str]) -> bool:
+    words = core.split()
+    for n in range(min(len(words), 5), 0, -1):
+        if " ".join(words[:n]) in phrases or " ".join(words[-n:]) in phrases:
+            return True
+    return False
+
+class ConfirmationClassifier:
+    """Resolves confident replies with classify_confirmation and counts how often the LLM is skipped."""
+
+    def __init__(self, min_confidence: float = 0.85):
+        self.min_confidence = min_confidence
+        self.total = 0
+        self.confirmed = 0
+        self.declined = 0
+        self.fallbacks = 0
+        self.fallback_reasons: dict[str, int] = {}
+
+    def resolve(self, text: str) -> Optional[bool]:
+        """True/False when the rules are confident enough, None to fall back to the LLM."""
+        decision = classify_confirmation(text)
+        self.total += 1
+        if decision.confirmed is not None and decision.confidence >= self.min_confidence:
+            if decision.confirmed:
+                self.confirmed += 1
+            else:
+                self.declined += 1
+            logger.info(f"Confirmation resolved by rules ({decision.reason}): {decision.confirmed}")
+            return decision.confirmed
+        self.fallbacks += 1
+        reason = decision.reason if decision.confirmed is None else "low confidence"
+        self.fallback_reasons[reason] = self.fallback_reasons.get(reason, 0) + 1
+        return None
+
+    def metrics(self) -> dict:
+        resolved = self.confirmed + self.declined
+        return {
+            "total": self.total,
+            "resolved_by_rules": resolved,
+            "confirmed": self.confirmed,
+            "declined": self.declined,
+            "llm_fallbacks": self.fallbacks,
+            "hit_rate": resolved / self.total if self.total else 0.0,
+            "fallback_reasons": dict(self.fallback_reasons)
+        }
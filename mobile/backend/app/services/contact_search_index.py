@@ -0,0 +1,166 @@
+"""In-process search index over each user's contacts for the search_contacts tool."""
+import asyncio
+import bisect
+import logging
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Optional
+
+from app.core.config import settings
+from app.services.database_service import DatabaseService
+
+logger = logging.getLogger(__name__)
+
+# Minimum edit similarity (difflib ratio) for a fuzzy name match
+FUZZY_THRESHOLD = 0.75
+# Trigrams a name must share with the query before it is compared for fuzzy matching
+MIN_SHARED_TRIGRAMS = 2
+# Queries with at least this many digits are treated as phone numbers
+MIN_PHONE_DIGITS = 3
+
+def normalize_name(value: str) -> str:
+    """Lowercase, strip accents and collapse whitespace."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", value.lower()).split())
+
+def trigrams(value: str) -> set[str]:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class ContactSearchIndex:
+    """Prefix, trigram and phone-suffix index over one owner's contacts.
+
+    Match quality ranks first (exact name, exact word, name/word prefix, substring,
+    then fuzzy matches found through shared trigrams), then relationship_score.
+    """
+
+    def __init__(self, contacts: list[dict]):
+        self.contacts = contacts
+        self.names = [normalize_name(c.get("name") or "") for c in contacts]
+        # Sorted (token, position) pairs for prefix lookups on any word of the name
+        self.tokens = sorted(
+            (token, i) for i, name in enumerate(self.names) for token in {name, *name.split()} if token
+        )
+        self.trigram_index: dict[str, set[int]] = defaultdict(set)
+        for i, name in enumerate(self.names):
+            for gram in trigrams(name):
+                self.trigram_index[gram].add(i)
+        # Reversed digit strings, sorted, so a phone suffix becomes a prefix lookup
+        self.reversed_phones = sorted(
+            (re.sub(r"[^0-9]", "", c.get("phone_number") or "")[::-1], i) for i, c in enumerate(contacts)
+        )
+        self.loaded_at = time.monotonic()
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        min_relationship_score: Optional[float] = None,
+        limit: int = 15
+    ) -> list[dict]:
+        """Find contacts matching a name or phone number query, best first."""
+        scores = self._match(query) if query else {i: 0.0 for i in range(len(self.contacts))}
+        results = []
+        for i, score in scores.items():
+            relationship_score = self.contacts[i].get("relationship_score") or 0
+            if min_relationship_score is not None and relationship_score < min_relationship_score:
+                continue
+            results.append((-score, -relationship_score, i))
+        results.sort()
+        return [self.contacts[i] for _, _, i in results[:limit]]
+
+    def _match(self, query: str) -> dict[int, float]:
+        scores: dict[int, float] = {}
+
+        def hit(i: int, score: float) -> None:
+            if score > scores.get(i, 0.0):
+                scores[i] = score
+
+        digits = re.sub(r"[^0-9]", "", query)
+        if len(digits) >= MIN_PHONE_DIGITS:
+            # Phone numbers are matched on their trailing digits, ignoring country code and formatting
+            suffix = digits[::-1]
+            start = bisect.bisect_left(self.reversed_phones, (suffix,))
+            for reversed_phone, i in self.reversed_phones[start:]:
+                if not reversed_phone.startswith(suffix):
+                    break
+                hit(i, 1.0)
+
+        name = normalize_name(query)
+        if not name:
+            return scores
+
+        start = bisect.bisect_left(self.tokens, (name,))
+        for token, i in self.tokens[start:]:
+            if not token.startswith(name):
+                break
+            if self.names[i] == name:
+                hit(i, 1.0)
+            else:
+                hit(i, 0.95 if token == name else 0.9)
+
+        # Trigram candidates cover substrings and misspellings
+        grams = trigrams(name)
+        overlap: dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for i in self.trigram_index.get(gram, ()):
+                overlap[i] += 1
+        for i, shared in overlap.items():
+            if name in self.names[i]:
+                hit(i, 0.8)
+                continue
+            if shared < MIN_SHARED_TRIGRAMS:
+                continue
+            # Misspellings: compare against the whole name and each word
+            similarity = max(
+                SequenceMatcher(None, name, candidate).ratio()
+                for candidate in (self.names[i], *self.names[i].split())
+            )
+            if similarity >= FUZZY_THRESHOLD:
+                hit(i, 0.7 * similarity)
+        return scores
+
+class ContactSearchService:
+    """Lazily built per-owner ContactSearchIndex cache.
+
+    Indexes are loaded from get_user_contacts on first use, rebuilt after
+    CONTACT_INDEX_TTL_SECONDS, and dropped by invalidate() whenever contacts sync.
+    """
+
+    def __init__(self, db_service: DatabaseService):
+        self.db_service = db_service
+        self.ttl = settings.CONTACT_INDEX_TTL_SECONDS
+        self._indexes: dict[str, ContactSearchIndex] = {}
+        self._locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def get_index(self, owner_id: str) -> ContactSearchIndex:
+        index = self._indexes.get(owner_id)
+        if index and time.monotonic() - index.loaded_at < self.ttl:
+            return index
+        async with self._locks[owner_id]:
+            index = self._indexes.get(owner_id)
+            if index and time.monotonic() - index.loaded_at < self.ttl:
+                return index
+            contacts = await self.db_service.get_user_contacts(owner_id)
+            index = ContactSearchIndex(contacts)
+            self._indexes[owner_id] = index
+            logger.info(f"Indexed {len(contacts)} contacts for user {owner_id}")
+            return index
+
+    async def search(
+        self,
+        owner_id: str,
+        query: Optional[str] = None,
+        min_relationship_score: Optional[float] = None,
+        limit: int = 15
+    ) -> list[dict]:
+        """Search an owner's contacts by name or phone number."""
+        index = await self.get_index(owner_id)
+        return index.search(query, min_relationship_score, limit)
+
+    def invalidate(self, owner_id: str) -> None:
+        """Drop an owner's index so the next search reloads it."""
+        self._indexes.pop(owner_id, None)
@@ -0,0 +1,185 @@
+"""Background contact imports with progress pushed over the chat WebSocket."""
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import uuid4
+
+from app.services.database_service import DatabaseService
+from app.services.contact_search_index import ContactSearchService
+from app.services.websocket_service import send_event
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs stay queryable for this long
+JOB_RETENTION = timedelta(hours=1)
+
+def contact_hash(name: str, phone_number: str) -> str:
+    """Hash of a device contact as uploaded; the app computes the same value locally."""
+    return hashlib.sha256(f"{name}\n{phone_number}".encode()).hexdigest()[:16]
+
+def hash_bucket(device_contact_id: str) -> str:
+    """One of 256 buckets a device contact ID falls into."""
+    return hashlib.sha256(device_contact_id.encode()).hexdigest()[:2]
+
+def manifest_checksums(hashes: dict[str, str]) -> tuple[str, dict[str, str]]:
+    """Checksum of a whole device_contact_id -> hash manifest, and of each bucket.
+
+    Both sides compare the overall checksum first, then bucket checksums, and only
+    exchange per-contact hashes for buckets that differ.
+    """
+    buckets: dict[str, list[str]] = {}
+    for device_contact_id in sorted(hashes):
+        buckets.setdefault(hash_bucket(device_contact_id), []).append(f"{device_contact_id}:{hashes[device_contact_id]}")
+    bucket_checksums = {
+        bucket: hashlib.sha256("\n".join(lines).encode()).hexdigest()[:16]
+        for bucket, lines in sorted(buckets.items())
+    }
+    root = hashlib.sha256(
+        "\n".join(f"{bucket}:{checksum}" for bucket, checksum in bucket_checksums.items()).encode()
+    ).hexdigest()[:16]
+    return root, bucket_checksums
+
+class ContactSyncService:
+    """Runs contact syncs as asyncio tasks and tracks their status.
+
+    Jobs live in process memory, so the status endpoint must be served by the
+    same worker that accepted the upload.
+    """
+
+    def __init__(self, db_service: DatabaseService, contact_search_service: ContactSearchService):
+        self.db_service = db_service
+        self.contact_search_service = contact_search_service
+        self.jobs: dict[str, dict] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def start_sync(self, user_id: str, contacts: list[dict]) -> dict:
+        """Queue a sync and return its job right away."""
+        self._prune_jobs()
+        job_id = str(uuid4())
+        job = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "status": "queued",
+            "total": len(contacts),
+            "processed": 0,
+            "created": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "errors": [],
+            "created_at": datetime.now().isoformat(),
+            "finished_at": None
+        }
+        self.jobs[job_id] = job
+        self._tasks[job_id] = asyncio.create_task(self._run(job, contacts))
+        return job
+
+    async def sync(self, user_id: str, contacts: list[dict], on_progress=None) -> dict:
+        """Sync contacts in the foreground and drop the owner's search index."""
+        try:
+            return await self.db_service.sync_contacts(user_id, contacts, on_progress)
+        finally:
+            self.contact_search_service.invalidate(user_id)
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        return self.jobs.get(job_id)
+
+    async def get_checksums(self, user_id: str) -> dict:
+        """Overall and per-bucket checksums of the server's copy of a user's contacts."""
+        checksum, buckets = manifest_checksums(await self.db_service.get_contact_sync_hashes(user_id))
+        return {"checksum": checksum, "buckets": buckets}
+
+    async def get_bucket_hashes(self, user_id: str, buckets: list[str]) -> dict[str, str]:
+        """device_contact_id -> hash for the contacts in the given buckets."""
+        wanted = set(buckets)
+        hashes = await self.db_service.get_contact_sync_hashes(user_id)
+        return {
+            device_contact_id: value
+            for device_contact_id, value in hashes.items()
+            if hash_bucket(device_contact_id) in wanted
+        }
+
+    async def apply_delta(
+        self,
+        user_id: str,
+        upserts: list[dict],
+        deletes: list[str],
+        base_checksum: Optional[str] = None
+    ) -> dict:
+        """Apply added/changed and deleted contacts from the app.
+
+        Raises:
+            ValueError: If base_checksum no longer matches the server, so the app
+                must redo the handshake
+        """
+        if base_checksum is not None:
+            current = await self.get_checksums(user_id)
+            if current["checksum"] != base_checksum:
+                raise ValueError("Contacts changed since the checksum handshake")
+
+        # Deletes go first so a contact removed and re-added with the same number isn't a duplicate
+        deleted = await self.db_service.delete_contacts_by_device_ids(user_id, deletes) if deletes else 0
+        result = await self.sync(user_id, upserts) if upserts else {
+            "created": 0, "updated": 0, "unchanged": 0, "conflicts": []
+        }
+        self.contact_search_service.invalidate(user_id)
+        checksums = await self.get_checksums(user_id)
+        return {**result, "deleted": deleted, "checksum": checksums["checksum"]}
+
+    async def close(self) -> None:
+        """Cancel imports still running at shutdown."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run(self, job: dict, contacts: list[dict]) -> None:
+        user_id = job["user_id"]
+
+        async def on_progress(processed: int, total: int) -> None:
+            job["processed"] = processed
+            await self._notify(job)
+
+        job["status"] = "running"
+        await self._notify(job)
+        try:
+            result = await self.sync(user_id, contacts, on_progress)
+            job.update({
+                "status": "completed",
+                "processed": job["total"],
+                "created": result["created"],
+                "updated": result["updated"],
+                "unchanged": result["unchanged"],
+                "errors": [
+                    {"contact": c["contact"], "device_contact_id": c.get("device_contact_id"), "error": c["error"]}
+                    for c in result["conflicts"]
+                ]
+            })
+        except asyncio.CancelledError:
+            job["status"] = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Contact sync {job['job_id']} for user {user_id} failed: {str(e)}")
+            job.update({"status": "failed", "errors": [{"error": str(e)}]})
+        finally:
+            job["finished_at"] = datetime.now().isoformat()
+            self._tasks.pop(job["job_id"], None)
+        await self._notify(job)
+
+    async def _notify(self, job: dict) -> None:
+        await send_event(job["user_id"], {
+            "type": "contact_sync",
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "processed": job["processed"],
+            "total": job["total"]
+        })
+
+    def _prune_jobs(self) -> None:
+        cutoff = (datetime.now() - JOB_RETENTION).isoformat()
+        for job_id in [
+            job_id for job_id, job in self.jobs.items()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]:
+            del self.jobs[job_id]
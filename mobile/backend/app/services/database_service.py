@@ -1,26 +1,63 @@
 """Database service for Supabase operations."""
 #TODO: ADD A WAY TO UPDATE CONTACTS ON USER SIGN UP (TO BE REGISTERED)
-from supabase import create_client, Client
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from app.core.config import settings
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Awaitable, Callable
 from uuid import uuid4
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+def standardize_phone_number(phone: str) -> str:
+    """Normalize a phone number to +1XXXXXXXXXX form."""
+    digits = re.sub(r'[^0-9]', '', phone)
+    if not digits.startswith('1'):
+        digits = '1' + digits
+    return f'+{digits}'
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client backed by a single pooled HTTP/2 session."""
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+
 class DatabaseService:
     # Handles all database operations with Supabase
     
     def __init__(self):
         try:
-            self.client: Client = create_client(
-                settings.SUPABASE_URL,
-                settings.SUPABASE_KEY
+            self.client: AsyncPostgrestClient = PooledPostgrestClient(
+                f"{settings.SUPABASE_URL}/rest/v1",
+                headers={
+                    **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                    "apikey": settings.SUPABASE_KEY,
+                    "Authorization": f"Bearer {settings.SUPABASE_KEY}"
+                },
+                timeout=settings.SUPABASE_TIMEOUT
             )
         except Exception as e:
             logger.error(f"Failed to initialize Supabase client: {str(e)}")
             raise RuntimeError(f"Database connection failed: {str(e)}")
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session."""
+        await self.client.aclose()
     
     async def store_google_tokens(
         self,
@@ -36,12 +73,12 @@ class DatabaseService:
             "google_token_expiry": token_expiry,
             "updated_at": datetime.now()
         })
-        response = self.client.table("users").update(update_data).eq("id", user_id).execute()
+        response = await self.client.table("users").update(update_data).eq("id", user_id).execute()
         return self.from_iso_strings(response.data[0])
     
     async def get_google_tokens(self, user_id: str) -> dict:
         # Get Google OAuth tokens for a user
-        response = self.client.table("users").select(
+        response = await self.client.table("users").select(
             "google_access_token",
             "google_refresh_token",
             "google_token_expiry"
@@ -96,19 +133,19 @@ class DatabaseService:
             "updated_at": datetime.now().isoformat(),
             "contacts_loaded": False
         }
-        response = self.client.table("users").insert(data).execute()
+        response = await self.client.table("users").insert(data).execute()
         return self.from_iso_strings(response.data[0])
     
     async def get_user_by_email(self, email: str) -> dict:
         # Get user by email address
-        response = self.client.table("users").select("*").eq("email", email).execute()
+        response = await self.client.table("users").select("*").eq("email", email).execute()
         if not response.data:
             return None
         return self.from_iso_strings(response.data[0])
     
     async def get_or_create_user_by_email(self, email: str, name: str) -> dict:
         # Get existing user or create new one if not found
-        response = self.client.table("users").select("*").eq("email", email).execute()
+        response = await self.client.table("users").select("*").eq("email", email).execute()
         
         if response.data:
             return self.from_iso_strings(response.data[0])
@@ -117,7 +154,7 @@ class DatabaseService:
     
     async def get_user_by_id(self, user_id: str) -> Optional[dict]:
         """Get a user by their ID."""
-        response = self.client.table("users").select("*").eq("id", user_id).execute()
+        response = await self.client.table("users").select("*").eq("id", user_id).execute()
         if not response.data:
             return None
         return self.from_iso_strings(response.data[0])
@@ -133,42 +170,44 @@ class DatabaseService:
             update_data["phone_number"] = phone_number
         if contacts_loaded:
             update_data["contacts_loaded"] = contacts_loaded
-        response = self.client.table("users").update(update_data).eq("id", user_id).execute()
+        response = await self.client.table("users").update(update_data).eq("id", user_id).execute()
         if not response.data:
             return None
         
-        contact_response = self.client.table("contacts").select("*").eq("phone_number", phone_number).execute()
-        if contact_response.data:
-            for contact in contact_response.data:
-                contact["updated_at"] = datetime.now().isoformat()
-                self.client.table("contacts").update(contact).eq("recipient_id", user_id).execute()
+        # Link every contact with this number to the user in one update; writing whole
+        # rows back would also touch generated columns
+        if phone_number:
+            await self.client.table("contacts").update({
+                "recipient_id": user_id,
+                "updated_at": datetime.now().isoformat()
+            }).eq("phone_number", phone_number).execute()
 
         return response.data[0]
     
     async def get_user_by_google_id(self, google_id: str) -> dict:
         # Get user by Google ID
-        response = self.client.table("users").select("*").eq("google_id", google_id).execute()
+        response = await self.client.table("users").select("*").eq("google_id", google_id).execute()
         if not response.data:
             return None
         return self.from_iso_strings(response.data[0])
 
     async def get_user_by_phone(self, phone_number: str) -> dict:
         # Get user by phone number
-        response = self.client.table("users").select("*").eq("phone_number", phone_number).execute()
+        response = await self.client.table("users").select("*").eq("phone_number", phone_number).execute()
         if not response.data:
             return None
         return response.data[0]
     
     async def get_availiability(self, event_id: str, start_date: str, end_date: str) -> dict:
         # Get availability for an event within date range
-        response = self.client.table("availability").select("*").eq("event_id", event_id).eq("start_date", start_date).eq("end_date", end_date).execute()
+        response = await self.client.table("availability").select("*").eq("event_id", event_id).eq("start_date", start_date).eq("end_date", end_date).execute()
         if not response.data:
             return None
         return self.from_iso_strings(response.data[0])
 
     async def get_event_by_id(self, event_id: str) -> Optional[dict]:
         """Get an event by its ID."""
-        response = self.client.table("events").select("*").eq("id", event_id).execute()
+        response = await self.client.table("events").select("*").eq("id", event_id).execute()
         if not response.data:
             return None
         return self.from_iso_strings(response.data[0])
@@ -179,7 +218,7 @@ class DatabaseService:
         update_data["updated_at"] = now.isoformat()
         update_data = self.to_iso_strings(update_data)
         
-        response = self.client.table("events").update(update_data).eq("id", event_id).execute()
+        response = await self.client.table("events").update(update_data).eq("id", event_id).execute()
         
         if not response.data:
             raise RuntimeError(f"Event not found: {event_id}")
@@ -210,7 +249,7 @@ class DatabaseService:
             "updated_at": now.isoformat()
         }
         
-        response = self.client.table("event_participants").insert(event_participant).execute()
+        response = await self.client.table("event_participants").insert(event_participant).execute()
         
         if not response.data:
             raise RuntimeError(f"Failed to create event participant for event {event_id} and phone {phone_number}")
@@ -219,7 +258,7 @@ class DatabaseService:
     
     async def get_event_participants(self, event_id: str) -> list[dict]:
         # Get all participants for an event
-        response = self.client.table("event_participants").select("*").eq("event_id", event_id).execute()
+        response = await self.client.table("event_participants").select("*").eq("event_id", event_id).execute()
         return [p for p in response.data]
 
     async def create_draft_event(
@@ -246,7 +285,7 @@ class DatabaseService:
         
         # Convert all datetime objects to ISO format strings
 
-        response = self.client.table("events").insert(event).execute()
+        response = await self.client.table("events").insert(event).execute()
         
         if not response.data:
             raise RuntimeError("Failed to create event: No data returned from database")
@@ -262,37 +301,49 @@ class DatabaseService:
         limit: int = 15,
         days_ago: int = 30
     ) -> list[dict]:
-        """Search contacts with flexible filtering and pagination."""
+        """Search contacts by name or phone number, ranked in Postgres.
+
+        Uses the search_contacts_ranked RPC (pg_trgm name similarity and an indexed
+        phone-suffix match). Each result carries a similarity score in [0, 1].
+        """
+        # TODO: add recent only and last interaction query
         try:
-            query_builder = self.client.table("contacts").select("*").eq("owner_id", owner_id)
-            
-            if query:
-                # Search in name and phone number using Postgres full-text search
-                query_builder = query_builder.or_(f"name.ilike.%{query}%,phone_number.ilike.%{query}%")
-                
-            if min_relationship_score is not None:
-                query_builder = query_builder.gte("relationship_score", min_relationship_score)
-                
-            # TODO: add recent only and last interaction query (implemented using datetime in isoformat and then logic handled here)
-            # Order by relationship score and last interaction
-            query_builder = query_builder.order("relationship_score", desc=True)
-            
-            # Apply limit
-            query_builder = query_builder.limit(limit)
-            
-            response = query_builder.execute()
-            
-            # The response.data will be None if there was an error
-            if response.data is None:
-                print("response.data is None")
-                raise RuntimeError("Failed to search contacts: No data returned")
-                
+            response = await self.client.rpc("search_contacts_ranked", {
+                "p_owner_id": owner_id,
+                "p_query": query or None,
+                "p_min_relationship_score": min_relationship_score,
+                "p_limit": limit
+            }).execute()
         except Exception as e:
             print("exception", e)
             raise RuntimeError(f"Failed to search contacts: {e}")
-            
-        # Convert all datetime fields in the response
-        return [c for c in response.data]
+
+        if response.data is None:
+            raise RuntimeError("Failed to search contacts: No data returned")
+        return [{**row["contact"], "similarity": row["similarity"]} for row in response.data]
+
+    async def search_contacts_batch(
+        self,
+        owner_id: str,
+        queries: list[str],
+        limit_per_query: int = 5
+    ) -> dict[str, list[dict]]:
+        """Search contacts for several queries in one round trip, grouped by query."""
+        if not queries:
+            return {}
+        try:
+            response = await self.client.rpc("search_contacts_ranked_batch", {
+                "p_owner_id": owner_id,
+                "p_queries": queries,
+                "p_limit_per_query": limit_per_query
+            }).execute()
+        except Exception as e:
+            raise RuntimeError(f"Failed to search contacts: {e}")
+
+        results: dict[str, list[dict]] = {query: [] for query in queries}
+        for row in response.data or []:
+            results.setdefault(row["query"], []).append({**row["contact"], "similarity": row["similarity"]})
+        return results
 
     async def store_participant_busy_times(
         self,
@@ -312,7 +363,7 @@ class DatabaseService:
         data = self.to_iso_strings(data)
         
         # Upsert to handle both new and existing records
-        response = self.client.table("availability").upsert(data).execute()
+        response = await self.client.table("availability").upsert(data).execute()
         
         if not response.data:
             raise RuntimeError(f"Failed to store busy times for event {event_id} and participant {participant_id}")
@@ -325,7 +376,7 @@ class DatabaseService:
         participant_id: str
     ) -> list[dict]:
         """Get stored busy time slots for an event participant."""
-        response = self.client.table("availability").select("*").eq("event_id", event_id).eq("participant_id", participant_id).execute()
+        response = await self.client.table("availability").select("*").eq("event_id", event_id).eq("participant_id", participant_id).execute()
         
         if not response.data:
             return []
@@ -341,7 +392,7 @@ class DatabaseService:
         Returns:
             Dictionary mapping participant IDs to their busy time slots
         """
-        response = self.client.table("availability").select("*").eq("event_id", event_id).execute()
+        response = await self.client.table("availability").select("*").eq("event_id", event_id).execute()
         
         if not response.data:
             return {}
@@ -352,6 +403,34 @@ class DatabaseService:
             for record in response.data
         }
 
+    async def _get_slots_in_range(
+        self,
+        event_id: str,
+        source_table: str,
+        owner_keys: list[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> dict[str, list[dict]]:
+        """Get the slots of the given owners overlapping a time range, filtered in Postgres.
+
+        Uses the GiST-indexed availability_slot_ranges table via RPC, so only
+        overlapping slots come back regardless of the event's history.
+        """
+        if not owner_keys:
+            return {}
+        response = await self.client.rpc("get_availability_slots_in_range", {
+            "p_event_id": event_id,
+            "p_source_table": source_table,
+            "p_owner_keys": [str(key) for key in owner_keys],
+            "p_start": start_time.isoformat(),
+            "p_end": end_time.isoformat()
+        }).execute()
+
+        result: dict[str, list[dict]] = {}
+        for row in response.data or []:
+            result.setdefault(row["owner_key"], []).append(row["slot"])
+        return result
+
     async def get_participants_busy_times_in_range(
         self,
         event_id: str,
@@ -360,36 +439,7 @@ class DatabaseService:
         end_time: datetime
     ) -> dict[str, list[dict]]:
         """Get busy time slots for specific participants within a time range."""
-        # Get all busy times for the event
-        response = self.client.table("availability").select("*").eq("event_id", event_id).execute()
-        
-        if not response.data:
-            return {}
-            
-        # Filter and process the results
-        result = {}
-        for record in response.data:
-            participant_id = record["participant_id"]
-            if participant_id not in participant_ids:
-                continue
-                
-            # Get busy slots and convert to datetime objects
-            busy_slots = self.from_iso_strings(record).get("busy_slots", [])
-            
-            # Filter slots that overlap with the time range
-            overlapping_slots = []
-            for slot in busy_slots:
-                slot_start = datetime.fromisoformat(slot["start_time"])
-                slot_end = datetime.fromisoformat(slot["end_time"])
-                
-                # Check if the slot overlaps with our time range
-                if (slot_start <= end_time and slot_end >= start_time):
-                    overlapping_slots.append(slot)
-                    
-            if overlapping_slots:
-                result[participant_id] = overlapping_slots
-                
-        return result
+        return await self._get_slots_in_range(event_id, "availability", participant_ids, start_time, end_time)
 
     async def get_event_participant_by_phone(
         self,
@@ -397,7 +447,7 @@ class DatabaseService:
         phone_number: str
     ) -> Optional[dict]:
         """Get an event participant by their phone number."""
-        response = self.client.table("event_participants").select("*").eq("event_id", event_id).eq("phone_number", phone_number).execute()
+        response = await self.client.table("event_participants").select("*").eq("event_id", event_id).eq("phone_number", phone_number).execute()
         if not response.data:
             return None
         return response.data[0]
@@ -435,7 +485,7 @@ class DatabaseService:
             "created_at": now.isoformat(),
             "updated_at": now.isoformat(),
         }
-        response = self.client.table("conversations").insert(conversation).execute()
+        response = await self.client.table("conversations").insert(conversation).execute()
         
         if not response.data:
             raise RuntimeError(f"Failed to create conversation for event {event_id} and phone {phone_number}")
@@ -459,7 +509,7 @@ class DatabaseService:
         }
         
         # Upsert to handle both new and existing records
-        response = self.client.table("unregistered_time_slots").upsert(
+        response = await self.client.table("unregistered_time_slots").upsert(
             data,
             on_conflict="event_id,phone_number"
         ).execute()
@@ -475,7 +525,7 @@ class DatabaseService:
         phone_number: str
     ) -> list[dict]:
         """Get stored time slots for an unregistered user."""
-        response = self.client.table("unregistered_time_slots").select("*").eq("event_id", event_id).eq("phone_number", phone_number).execute()
+        response = await self.client.table("unregistered_time_slots").select("*").eq("event_id", event_id).eq("phone_number", phone_number).execute()
         
         if not response.data:
             return []
@@ -487,7 +537,7 @@ class DatabaseService:
         event_id: str
     ) -> dict[str, list[dict]]:
         """Get all unregistered users' time slots for an event, returned as phone_number -> slots dict."""
-        response = self.client.table("unregistered_time_slots").select("*").eq("event_id", event_id).execute()
+        response = await self.client.table("unregistered_time_slots").select("*").eq("event_id", event_id).execute()
         
         if not response.data:
             return {}
@@ -503,7 +553,7 @@ class DatabaseService:
         event_id: str
     ) -> dict:
         """Delete all unregistered users' time slots for an event."""
-        response = self.client.table("unregistered_time_slots").delete().eq("event_id", event_id).execute()
+        response = await self.client.table("unregistered_time_slots").delete().eq("event_id", event_id).execute()
         
         if not response.data:
             return None
@@ -518,36 +568,7 @@ class DatabaseService:
         end_time: datetime
     ) -> dict[str, list[dict]]:
         """Get time slots for specific unregistered users within a time range."""
-        # Get all time slots for the event
-        response = self.client.table("unregistered_time_slots").select("*").eq("event_id", event_id).execute()
-        
-        if not response.data:
-            return {}
-            
-        # Filter and process the results
-        result = {}
-        for record in response.data:
-            phone_number = record["phone_number"]
-            if phone_number not in phone_numbers:
-                continue
-                
-            # Get time slots and convert to datetime objects
-            time_slots = record.get("time_slots", [])
-            
-            # Filter slots that overlap with the time range
-            overlapping_slots = []
-            for slot in time_slots:
-                slot_start = datetime.fromisoformat(slot["start_time"])
-                slot_end = datetime.fromisoformat(slot["end_time"])
-                
-                # Check if the slot overlaps with our time range
-                if (slot_start <= end_time and slot_end >= start_time):
-                    overlapping_slots.append(slot.isoformat())
-                    
-            if overlapping_slots:
-                result[phone_number] = overlapping_slots
-                
-        return result
+        return await self._get_slots_in_range(event_id, "unregistered_time_slots", phone_numbers, start_time, end_time)
 
     async def get_conversations(
         self,
@@ -555,7 +576,7 @@ class DatabaseService:
         phone_number: str
     ) -> list[dict]:
         """Get all conversations for an unregistered user in an event."""
-        response = self.client.table("conversations").select("*").eq("event_id", event_id).eq("phone_number", phone_number).execute()
+        response = await self.client.table("conversations").select("*").eq("event_id", event_id).eq("phone_number", phone_number).execute()
         return [self.from_iso_strings(c) for c in response.data]
 
     VALID_CONVERSATION_STATUSES = {
@@ -587,7 +608,7 @@ class DatabaseService:
         if last_message:
             conversation["last_message"] = last_message
         
-        response = self.client.table("conversations").update(conversation).eq("event_id", event_id).eq("phone_number", phone_number).execute()
+        response = await self.client.table("conversations").update(conversation).eq("event_id", event_id).eq("phone_number", phone_number).execute()
         
         if not response.data:
             raise RuntimeError(f"Failed to update conversation for event {event_id} and phone {phone_number}")
@@ -621,7 +642,7 @@ class DatabaseService:
 
         now = datetime.now()
         update_data["updated_at"] = now.isoformat()
-        response = self.client.table("event_participants").update(update_data).eq("event_id", event_id).eq("phone_number", phone_number).execute()
+        response = await self.client.table("event_participants").update(update_data).eq("event_id", event_id).eq("phone_number", phone_number).execute()
         
         if not response.data:
             raise RuntimeError(f"Failed to update event participant for event {event_id} and phone {phone_number}")
@@ -647,7 +668,7 @@ class DatabaseService:
         else:
             contact["recipient_id"] = None
 
-        response = self.client.table("contacts").insert(contact).execute()
+        response = await self.client.table("contacts").insert(contact).execute()
         if not response.data:
             raise RuntimeError(f"Failed to create contact for owner {contact_data['owner_id']} and phone {contact_data['phone_number']}")
             
@@ -668,7 +689,7 @@ class DatabaseService:
         else:
             update_data["recipient_id"] = None
         
-        response = self.client.table("contacts").update(update_data).eq("id", contact_id).execute()
+        response = await self.client.table("contacts").update(update_data).eq("id", contact_id).execute()
         if not response.data:
             raise RuntimeError(f"Failed to update contact {contact_id}")
             
@@ -676,7 +697,7 @@ class DatabaseService:
 
     async def get_contact_by_device_id(self, owner_id: str, device_contact_id: str) -> dict:
         """Get contact by device contact ID"""
-        response = self.client.table("contacts").select("*").eq("owner_id", owner_id).eq("device_contact_id", device_contact_id).execute()
+        response = await self.client.table("contacts").select("*").eq("owner_id", owner_id).eq("device_contact_id", device_contact_id).execute()
         
         if not response.data:
             return None
@@ -685,11 +706,184 @@ class DatabaseService:
 
     async def get_user_contacts(self, owner_id: str) -> list[dict]:
         """Get all contacts for a user"""
-        response = self.client.table("contacts").select("*").eq("owner_id", owner_id).execute()
+        response = await self.client.table("contacts").select("*").eq("owner_id", owner_id).execute()
         if not response.data:
             return []
         return [c for c in response.data]
 
+    async def sync_contacts(
+        self,
+        owner_id: str,
+        contacts: list[dict],
+        on_progress: Optional[Callable[[int, int], Awaitable[Any]]] = None
+    ) -> dict:
+        """Bulk sync a user's device contacts with chunked upserts.
+
+        Numbers are normalized once and diffed against the stored contacts; only new
+        or changed rows are written, CONTACT_SYNC_BATCH_SIZE per request. A contact is
+        matched to its stored row by device_contact_id first, so a changed number
+        replaces the old one, and by phone number otherwise.
+
+        A user has one stored contact per phone number, so of several device contacts
+        sharing a number only the first is stored; the others are reported as
+        conflicts carrying their device_contact_id.
+
+        Args:
+            owner_id: ID of the user who owns the contact list
+            contacts: Dicts with name, phone_number and optional device_contact_id and sync_hash
+            on_progress: Optional callback receiving (processed, total) after each batch
+
+        Returns:
+            Counts of created/updated/unchanged contacts and per-row conflicts
+        """
+        now = datetime.now().isoformat()
+        conflicts = []
+
+        # Normalize and dedupe the upload; the first contact for a number wins
+        incoming: dict[str, dict] = {}
+        for contact in contacts:
+            number = standardize_phone_number(contact["phone_number"])
+            if number in incoming:
+                conflicts.append({
+                    "contact": contact["name"],
+                    "phone_number": number,
+                    "device_contact_id": contact.get("device_contact_id"),
+                    "error": f"Duplicate phone number, already synced as {incoming[number]['name']}"
+                })
+                continue
+            incoming[number] = {**contact, "phone_number": number}
+
+        stored = await self.get_user_contacts(owner_id)
+        by_number = {standardize_phone_number(c["phone_number"]): c for c in stored}
+        by_device = {c["device_contact_id"]: c for c in stored if c.get("device_contact_id")}
+        matched = {number: by_device.get(contact.get("device_contact_id")) for number, contact in incoming.items()}
+        # Numbers given up by device contacts whose number changed in this upload
+        released = {
+            standardize_phone_number(current["phone_number"])
+            for number, current in matched.items()
+            if current and standardize_phone_number(current["phone_number"]) != number
+        }
+        registered = await self.get_user_ids_by_phone(list(incoming))
+
+        inserts, updates, replaced, unchanged = [], [], [], 0
+        for number, contact in incoming.items():
+            row = {
+                "owner_id": owner_id,
+                "name": contact["name"],
+                "phone_number": number,
+                "device_contact_id": contact.get("device_contact_id"),
+                "sync_hash": contact.get("sync_hash"),
+                "recipient_id": registered.get(number),
+                "updated_at": now
+            }
+            current = matched[number]
+            holder = None if number in released else by_number.get(number)
+            if holder is not None and (current is None or holder["id"] != current["id"]):
+                if holder.get("device_contact_id") and row["device_contact_id"]:
+                    conflicts.append({
+                        "contact": contact["name"],
+                        "phone_number": number,
+                        "device_contact_id": row["device_contact_id"],
+                        "error": f"Duplicate phone number, already synced as {holder['name']}"
+                    })
+                    continue
+                # The number is stored without a device ID (synced before they were tracked):
+                # take that row over and drop the row under the contact's old number
+                if current is not None:
+                    replaced.append(current["id"])
+                current = holder
+            if current is None:
+                inserts.append({"id": str(uuid4()), "created_at": now, **row})
+            elif any(current.get(k) != row[k] for k in ("name", "phone_number", "device_contact_id", "sync_hash", "recipient_id")):
+                updates.append({"id": current["id"], "created_at": current.get("created_at") or now, **row})
+            else:
+                unchanged += 1
+
+        total = len(contacts)
+        progress = {"processed": total - len(inserts) - len(updates)}
+
+        async def report(batch: int) -> None:
+            progress["processed"] += batch
+            if on_progress:
+                await on_progress(progress["processed"], total)
+
+        await report(0)
+        if replaced:
+            await self.client.table("contacts").delete().eq("owner_id", owner_id).in_("id", replaced).execute()
+        # Updates go first so numbers they give up are free for new rows. Matched rows are
+        # keyed by id since their stored number may not be normalized yet
+        updated = await self._upsert_contacts(updates, "id", conflicts, report)
+        created = await self._upsert_contacts(inserts, "owner_id,phone_number", conflicts, report)
+        return {
+            "created": created,
+            "updated": updated,
+            "unchanged": unchanged,
+            "conflicts": conflicts
+        }
+
+    async def _upsert_contacts(
+        self,
+        rows: list[dict],
+        on_conflict: str,
+        conflicts: list[dict],
+        report: Callable[[int], Awaitable[None]]
+    ) -> int:
+        written = 0
+        batch_size = settings.CONTACT_SYNC_BATCH_SIZE
+        for i in range(0, len(rows), batch_size):
+            chunk = rows[i:i + batch_size]
+            try:
+                await self.client.table("contacts").upsert(chunk, on_conflict=on_conflict).execute()
+                written += len(chunk)
+            except Exception as e:
+                logger.warning(f"Contact batch upsert failed, retrying rows individually: {str(e)}")
+                # Isolate the rows that fail so the rest of the chunk still lands
+                for row in chunk:
+                    try:
+                        await self.client.table("contacts").upsert(row, on_conflict=on_conflict).execute()
+                        written += 1
+                    except Exception as e:
+                        conflicts.append({
+                            "contact": row["name"],
+                            "phone_number": row["phone_number"],
+                            "device_contact_id": row.get("device_contact_id"),
+                            "error": str(e)
+                        })
+            await report(len(chunk))
+        return written
+
+    async def get_contact_sync_hashes(self, owner_id: str) -> dict[str, str]:
+        """Map device_contact_id -> sync_hash for a user's synced contacts."""
+        response = await self.client.table("contacts").select("device_contact_id,sync_hash").eq("owner_id", owner_id).execute()
+        return {
+            c["device_contact_id"]: c["sync_hash"]
+            for c in response.data or []
+            if c.get("device_contact_id") and c.get("sync_hash")
+        }
+
+    async def delete_contacts_by_device_ids(self, owner_id: str, device_contact_ids: list[str]) -> int:
+        """Delete a user's contacts by device contact ID, in chunks. Returns the number deleted."""
+        deleted = 0
+        batch_size = settings.CONTACT_SYNC_BATCH_SIZE
+        for i in range(0, len(device_contact_ids), batch_size):
+            response = await self.client.table("contacts").delete().eq("owner_id", owner_id).in_(
+                "device_contact_id", device_contact_ids[i:i + batch_size]
+            ).execute()
+            deleted += len(response.data or [])
+        return deleted
+
+    async def get_user_ids_by_phone(self, phone_numbers: list[str]) -> dict[str, str]:
+        """Map phone numbers of registered users to their user IDs, in chunked lookups."""
+        result = {}
+        batch_size = settings.CONTACT_SYNC_BATCH_SIZE
+        for i in range(0, len(phone_numbers), batch_size):
+            response = await self.client.table("users").select("id,phone_number").in_(
+                "phone_number", phone_numbers[i:i + batch_size]
+            ).execute()
+            for user in response.data or []:
+                result[user["phone_number"]] = user["id"]
+        return result
+
     # TODO: not for MVP
     async def add_best_friend(self, user_id: str, contact_id: str) -> dict:
         """Add a contact as a best friend"""
@@ -702,7 +896,7 @@ class DatabaseService:
             "updated_at": now.isoformat()
         }
         
-        response = self.client.table("best_friends").insert(best_friend).execute()
+        response = await self.client.table("best_friends").insert(best_friend).execute()
         
         if not response.data:
             raise RuntimeError(f"Failed to add best friend")
@@ -712,19 +906,19 @@ class DatabaseService:
     # TODO: not for MVP
     async def clear_best_friends(self, user_id: str) -> bool:
         """Clear all best friends for a user"""
-        response = self.client.table("best_friends").delete().eq("user_id", user_id).execute()
+        response = await self.client.table("best_friends").delete().eq("user_id", user_id).execute()
         return True
 
     # TODO: not for MVP
     async def get_best_friends(self, user_id: str) -> list[dict]:
         """Get all best friends for a user"""
-        response = self.client.table("best_friends").select("*").eq("user_id", user_id).execute()
+        response = await self.client.table("best_friends").select("*").eq("user_id", user_id).execute()
         return [self.from_iso_strings(bf) for bf in response.data]
 
     # TODO: not for MVP
     async def get_best_friends_with_details(self, user_id: str) -> list[dict]:
         """Get all best friends with contact details"""
-        response = self.client.table("best_friends").select(
+        response = await self.client.table("best_friends").select(
             """
             *,
             contacts:contact_id (
@@ -756,7 +950,7 @@ class DatabaseService:
     async def get_events_by_participant_phone(self, phone_number: str) -> list[dict]:
         """Get all events where a phone number is a participant."""
         # First get all event participants with this phone number
-        response = self.client.table("event_participants").select(
+        response = await self.client.table("event_participants").select(
             "event_id"
         ).eq("phone_number", phone_number).execute()
         
@@ -765,7 +959,7 @@ class DatabaseService:
             
         # Get the events for these participants
         event_ids = [p["event_id"] for p in response.data]
-        events_response = self.client.table("events").select("*").in_("id", event_ids).execute()
+        events_response = await self.client.table("events").select("*").in_("id", event_ids).execute()
         
         if not events_response.data:
             return []
@@ -774,53 +968,148 @@ class DatabaseService:
 
     async def get_conversation_by_phone(self, phone_number: str) -> list[dict]:
         """Get all conversations for a phone number."""
-        response = self.client.table("conversations").select("*").eq("phone_number", phone_number).execute()
+        response = await self.client.table("conversations").select("*").eq("phone_number", phone_number).execute()
         return response.data[0] if response.data else None
 
     async def get_conversations_by_phone(self, phone_number: str) -> list[dict]:
         """Get all conversations for a phone number."""
-        response = self.client.table("conversations").select("*").eq("phone_number", phone_number).execute()
+        response = await self.client.table("conversations").select("*").eq("phone_number", phone_number).execute()
         return [self.from_iso_strings(c) for c in response.data]
 
-    K = 10  # Number of messages to keep per conversation
+    # Inbound SMS queue methods
+    async def enqueue_inbound_message(self, idempotency_key: str, phone_number: str, body: str, payload: dict) -> bool:
+        """Persist an inbound text for the workers. Returns False if the key was already queued."""
+        response = await self.client.table("inbound_messages").upsert(
+            {
+                "idempotency_key": idempotency_key,
+                "phone_number": phone_number,
+                "body": body,
+                "payload": payload
+            },
+            on_conflict="idempotency_key",
+            ignore_duplicates=True
+        ).execute()
+        return bool(response.data)
+
+    async def claim_inbound_messages(self, limit: int, stale_seconds: int) -> list[dict]:
+        """Claim up to limit queued texts, at most one per event (see claim_inbound_messages)."""
+        response = await self.client.rpc("claim_inbound_messages", {
+            "p_limit": limit,
+            "p_stale_seconds": stale_seconds
+        }).execute()
+        return response.data or []
+
+    async def finish_inbound_message(self, message_id: int, status: str, error: str = None) -> None:
+        """Record the outcome of a claimed text: done, failed, or pending to retry."""
+        update = {"status": status, "last_error": error, "locked_at": None}
+        if status != "pending":
+            update["processed_at"] = datetime.now().isoformat()
+        await self.client.table("inbound_messages").update(update).eq("id", message_id).execute()
 
-    async def append_conversation_message(self, conversation_id: str, message: dict, k: int = K) -> dict:
-        """Append a message to the conversation's messages array, keeping only the last k messages."""
-        response = self.client.table("conversations").select("messages").eq("id", conversation_id).execute()
-        messages = response.data[0]["messages"] if response.data and response.data[0].get("messages") else []
-        messages.append(message)
-        messages = messages[-k:]
-        update_resp = self.client.table("conversations").update({"messages": messages}).eq("id", conversation_id).execute()
-        return update_resp.data[0] if update_resp.data else None
+    K = 10  # Number of recent messages returned by get_last_k_*
+
+    # Messages are stored one row each in the append-only messages table, ordered by
+    # seq within (session_type, session_id); appends never rewrite earlier history.
+    async def _append_messages(self, session_type: str, session_id: str, messages: list) -> list[dict]:
+        if not messages:
+            return []
+        rows = [
+            {"session_type": session_type, "session_id": session_id, "message": message}
+            for message in messages
+        ]
+        response = await self.client.table("messages").insert(rows).execute()
+        if not response.data:
+            raise RuntimeError(f"Failed to append messages to {session_type} {session_id}")
+        return response.data
+
+    async def _get_last_k_messages(self, session_type: str, session_id: str, k: int) -> list:
+        response = await self.client.table("messages").select("message").eq(
+            "session_type", session_type
+        ).eq("session_id", session_id).order("seq", desc=True).limit(k).execute()
+        return [row["message"] for row in reversed(response.data or [])]
+
+    async def append_conversation_message(self, conversation_id: str, message: dict) -> list[dict]:
+        """Append a message to the conversation's history."""
+        return await self._append_messages("conversation", conversation_id, [message])
     
-    async def extend_conversation_message(self, conversation_id: str, messages: list) -> dict:
-        response = self.client.table("conversations").select("messages").eq("id", conversation_id).execute()
-        old_messages = response.data[0]["messages"] if response.data and response.data[0].get("messages") else []
-        old_messages.extend(messages)
-        response = self.client.table("conversations").update({"messages": old_messages}).eq("id", conversation_id).execute()
-        return response.data[0] if response.data else None
+    async def extend_conversation_message(self, conversation_id: str, messages: list) -> list[dict]:
+        """Append messages to the conversation's history, in order."""
+        return await self._append_messages("conversation", conversation_id, messages)
 
     async def get_last_k_conversation_messages(self, conversation_id: str, k: int = K) -> list:
-        response = self.client.table("conversations").select("messages").eq("id", conversation_id).execute()
-        messages = response.data[0]["messages"] if response.data and response.data[0].get("messages") else []
-        return messages[-k:]
+        return await self._get_last_k_messages("conversation", conversation_id, k)
     
     async def get_last_k_chat_session_messages(self, chat_session_id: str, k: int = K) -> list:
-        response = self.client.table("chat_sessions").select("messages").eq("id", chat_session_id).execute()
-        messages = response.data[0]["messages"] if response.data and response.data[0].get("messages") else []
-        return messages[-k:]
-
-    async def extend_chat_session_message(self, chat_session_id: str, messages: list) -> dict:
-        """Extend the chat session's messages array."""
-        response = self.client.table("chat_sessions").select("messages").eq("id", chat_session_id).execute()
-        old_messages = response.data[0]["messages"] if response.data and response.data[0].get("messages") else []
-        old_messages.extend(messages)
-        response = self.client.table("chat_sessions").update({"messages": old_messages}).eq("id", chat_session_id).execute()
-        return response.data[0] if response.data else None
+        return await self._get_last_k_messages("chat_session", chat_session_id, k)
+
+    async def extend_chat_session_message(self, chat_session_id: str, messages: list) -> list[dict]:
+        """Append messages to the chat session's history, in order."""
+        return await self._append_messages("chat_session", chat_session_id, messages)
+
+    async def get_chat_session_messages_page(
+        self,
+        chat_session_id: str,
+        before: Optional[int] = None,
+        limit: int = 50
+    ) -> dict:
+        """Get one page of a chat session's history, walking back from the newest message.
+
+        Args:
+            chat_session_id: Chat session to read
+            before: Only return messages with seq below this cursor (None for the latest page)
+            limit: Maximum number of messages in the page
+
+        Returns:
+            Dictionary with the page's messages (oldest first), their seqs, and the
+            cursor for the next older page (None when there is no more history)
+        """
+        query = self.client.table("messages").select("seq,message").eq(
+            "session_type", "chat_session"
+        ).eq("session_id", chat_session_id)
+        if before is not None:
+            query = query.lt("seq", before)
+        # One extra row tells us whether an older page exists
+        response = await query.order("seq", desc=True).limit(limit + 1).execute()
+        rows = response.data or []
+        has_more = len(rows) > limit
+        rows = list(reversed(rows[:limit]))
+        return {
+            "messages": [row["message"] for row in rows],
+            "seqs": [row["seq"] for row in rows],
+            "next_before": rows[0]["seq"] if has_more and rows else None
+        }
+
+    async def get_chat_session_messages_between(
+        self,
+        chat_session_id: str,
+        after: int,
+        before: int,
+        limit: int = 50
+    ) -> list[dict]:
+        """Get up to limit {seq, message} rows with after < seq < before, oldest first."""
+        response = await self.client.table("messages").select("seq,message").eq(
+            "session_type", "chat_session"
+        ).eq("session_id", chat_session_id).gt("seq", after).lt("seq", before).order("seq").limit(limit).execute()
+        return response.data or []
+
+    async def get_chat_session_summary(self, chat_session_id: str) -> dict:
+        """Get a chat session's rolling summary and the seq of the last message it covers."""
+        response = await self.client.table("chat_sessions").select(
+            "summary,summarized_through_seq"
+        ).eq("id", chat_session_id).execute()
+        return response.data[0] if response.data else {}
+
+    async def update_chat_session_summary(self, chat_session_id: str, summary: str, summarized_through_seq: int) -> None:
+        """Store a chat session's rolling summary. Never moves summarized_through_seq backwards."""
+        await self.client.table("chat_sessions").update({
+            "summary": summary,
+            "summarized_through_seq": summarized_through_seq,
+            "updated_at": datetime.now().isoformat()
+        }).eq("id", chat_session_id).lt("summarized_through_seq", summarized_through_seq).execute()
 
     async def get_or_create_chat_session(self, user_id: str, event_id: str = None) -> dict:
         # First try to get existing session
-        response = self.client.table("chat_sessions").select("*").eq("user_id", user_id).execute()
+        response = await self.client.table("chat_sessions").select("*").eq("user_id", user_id).execute()
         
         if response.data and len(response.data) > 0:
             return response.data[0]
@@ -835,5 +1124,79 @@ class DatabaseService:
             "created_at": now,
             "updated_at": now
         }
-        insert_resp = self.client.table("chat_sessions").insert(chat_session).execute()
-        return insert_resp.data[0] if insert_resp.data else chat_session
\ No newline at end of file
+        insert_resp = await self.client.table("chat_sessions").insert(chat_session).execute()
+        return insert_resp.data[0] if insert_resp.data else chat_session
+    # Calendar busy-interval cache methods
+    async def get_calendar_sync_states(self, user_id: str) -> list[dict]:
+        """Get the sync state of every cached calendar for a user."""
+        response = await self.client.table("calendar_sync_state").select("*").eq("user_id", user_id).execute()
+        return response.data or []
+
+    async def upsert_calendar_sync_state(
+        self,
+        user_id: str,
+        calendar_id: str,
+        sync_token: Optional[str],
+        covered_from: datetime,
+        covered_to: datetime,
+        expires_at: datetime
+    ) -> dict:
+        """Record the sync token and coverage window for a user's calendar."""
+        data = self.to_iso_strings({
+            "user_id": user_id,
+            "calendar_id": calendar_id,
+            "sync_token": sync_token,
+            "covered_from": covered_from,
+            "covered_to": covered_to,
+            "synced_at": datetime.now().astimezone(),
+            "expires_at": expires_at
+        })
+        response = await self.client.table("calendar_sync_state").upsert(
+            data,
+            on_conflict="user_id,calendar_id"
+        ).execute()
+        if not response.data:
+            raise RuntimeError(f"Failed to store calendar sync state for user {user_id} and calendar {calendar_id}")
+        return response.data[0]
+
+    async def upsert_calendar_busy_intervals(self, user_id: str, calendar_id: str, intervals: list[dict]) -> None:
+        """Insert or update cached busy intervals, keyed by Google event ID."""
+        if not intervals:
+            return
+        rows = [
+            {
+                "user_id": user_id,
+                "calendar_id": calendar_id,
+                "event_id": interval["id"],
+                "start_time": interval["start"],
+                "end_time": interval["end"]
+            }
+            for interval in intervals
+        ]
+        await self.client.table("calendar_busy_intervals").upsert(
+            rows,
+            on_conflict="user_id,calendar_id,event_id"
+        ).execute()
+
+    async def delete_calendar_busy_intervals(self, user_id: str, calendar_id: str, event_ids: list[str]) -> None:
+        """Remove cached busy intervals for cancelled or freed events."""
+        if not event_ids:
+            return
+        await self.client.table("calendar_busy_intervals").delete().eq("user_id", user_id).eq("calendar_id", calendar_id).in_("event_id", event_ids).execute()
+
+    async def get_calendar_busy_intervals(self, user_id: str, start_time: str, end_time: str) -> list[dict]:
+        """Get a user's cached busy intervals overlapping a time range."""
+        response = await self.client.table("calendar_busy_intervals").select(
+            "calendar_id", "event_id", "start_time", "end_time"
+        ).eq("user_id", user_id).lt("start_time", end_time).gt("end_time", start_time).execute()
+        return response.data or []
+
+    async def delete_calendar_cache(self, user_id: str, calendar_id: str = None) -> None:
+        """Drop cached intervals and sync state for one or all of a user's calendars."""
+        intervals = self.client.table("calendar_busy_intervals").delete().eq("user_id", user_id)
+        states = self.client.table("calendar_sync_state").delete().eq("user_id", user_id)
+        if calendar_id:
+            intervals = intervals.eq("calendar_id", calendar_id)
+            states = states.eq("calendar_id", calendar_id)
+        await intervals.execute()
+        await states.execute()
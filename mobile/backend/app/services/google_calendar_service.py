@@ -1,72 +1,106 @@
-import requests
+import asyncio
 from datetime import datetime, timedelta
 import icalendar
-from typing import Optional
+from typing import Optional, AsyncIterator
+from urllib.parse import quote
 import aiohttp
+from app.core.config import settings
+
+HOLIDAY_CALENDAR_ID = "en.usa#holiday@group.v.calendar.google.com"
+MAX_RESULTS_PER_PAGE = 2500  # Largest page the events.list endpoint allows
+MAX_FREEBUSY_ITEMS = 50  # Calendars a single freeBusy.query request may include
+
+class CalendarAPIError(Exception):
+    """Non-200 response from the Google Calendar API"""
+    def __init__(self, message: str, status: int):
+        self.message = message
+        self.status = status
+        super().__init__(self.message)
+
+def to_rfc3339_range(start_date: str, end_date: str) -> tuple[str, str]:
+    """Ensure a date range is in RFC3339 format, adding a time component to bare YYYY-MM-DD dates."""
+    if len(start_date) == 10:
+        start_date = f"{start_date}T00:00:00+00:00"
+    if len(end_date) == 10:
+        end_date = f"{end_date}T23:59:59+00:00"
+    return start_date, end_date
+
+def merge_busy_intervals(intervals: list[dict]) -> list[dict]:
+    """Merge overlapping or touching {"start", "end"} intervals into a sorted, disjoint list."""
+    parsed = sorted(
+        (datetime.fromisoformat(i["start"]), datetime.fromisoformat(i["end"]))
+        for i in intervals
+    )
+    merged: list[list[datetime]] = []
+    for start, end in parsed:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [{"start": start.isoformat(), "end": end.isoformat()} for start, end in merged]
 
 class GoogleCalendarService:
     def __init__(self):
         self.base_url = "https://www.googleapis.com/calendar/v3"
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=settings.GOOGLE_CALENDAR_MAX_CONNECTIONS),
+                timeout=aiohttp.ClientTimeout(total=settings.GOOGLE_CALENDAR_TIMEOUT)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _get_pages(self, access_token: str, url: str, params: dict) -> AsyncIterator[dict]:
+        """Yield every page of a paginated Calendar API list, following nextPageToken."""
+        session = await self._get_session()
+        headers = {"Authorization": f"Bearer {access_token}"}
+        params = dict(params)
+        while True:
+            async with session.get(url, headers=headers, params=params) as resp:
+                if resp.status != 200:
+                    error_text = await resp.text()
+                    raise CalendarAPIError(f"Calendar API request failed ({resp.status}): {error_text}", resp.status)
+                page = await resp.json()
+            yield page
+            if not page.get("nextPageToken"):
+                return
+            params["pageToken"] = page["nextPageToken"]
 
     async def get_calendar_ids(self, access_token: str) -> list[str]:
         """Get list of calendar IDs for the user"""
-        response = requests.get(
-            f"{self.base_url}/users/me/calendarList",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-        return [calendar["id"] for calendar in response.json()["items"]]
+        calendar_ids = []
+        async for page in self._get_pages(access_token, f"{self.base_url}/users/me/calendarList", {}):
+            calendar_ids.extend(calendar["id"] for calendar in page.get("items", []))
+        return calendar_ids
 
     async def get_events(self, access_token: str, calendar_id: str, start_date: str, end_date: str) -> list[dict]:
         """Get events from a specific calendar"""
-        # Ensure dates are in RFC3339 format with timezone
-        try:
-            # Add time component if only date is provided
-            if len(start_date) == 10:  # YYYY-MM-DD format
-                start_date = f"{start_date}T00:00:00+00:00"
-            if len(end_date) == 10:  # YYYY-MM-DD format
-                end_date = f"{end_date}T23:59:59+00:00"
-                
-        except ValueError as e:
-            print(f"Error parsing dates: {e}")
-            return []
+        start_date, end_date = to_rfc3339_range(start_date, end_date)
 
-        url = f"{self.base_url}/calendars/{calendar_id}/events"
-        headers = {"Authorization": f"Bearer {access_token}"}
+        url = f"{self.base_url}/calendars/{quote(calendar_id, safe='')}/events"
         params = {
             "timeMin": start_date,
             "timeMax": end_date,
-            "singleEvents": True,
+            "singleEvents": "true",
             "orderBy": "startTime",
-            "maxResults": 100  # Add a reasonable limit
+            "maxResults": MAX_RESULTS_PER_PAGE
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
-            if response.status_code != 200:
-                print(f"Error response: {response.text}")
-                return []
-            
-            response_json = response.json()
-            events = response_json.get("items", [])
-            
             formatted_events = []
-            for event in events:
-                if "start" not in event or "end" not in event:
-                    continue
-                    
-                # Handle all-day events
-                if "date" in event["start"]:
-                    start_time = f"{event['start']['date']}T00:00:00+00:00"
-                    end_time = f"{event['end']['date']}T23:59:59+00:00"
-                else:
-                    start_time = event["start"]["dateTime"]
-                    end_time = event["end"]["dateTime"]
-                
-                formatted_events.append({
-                    "summary": event.get("summary", "(No Title)"),
-                    "start": start_time,
-                    "end": end_time
-                })
+            async for page in self._get_pages(access_token, url, params):
+                for event in page.get("items", []):
+                    formatted_event = self._format_event(event)
+                    if formatted_event:
+                        formatted_events.append(formatted_event)
             
             print(f"Formatted events: {formatted_events}")
             return formatted_events
@@ -75,6 +109,65 @@ class GoogleCalendarService:
             print(f"Error fetching events: {str(e)}")
             return []
 
+    async def sync_events(
+        self,
+        access_token: str,
+        calendar_id: str,
+        sync_token: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> dict:
+        """Run a full or incremental events.list sync for one calendar.
+
+        Without a sync_token this lists every event between start_date and end_date; with
+        one it returns only changes since that token (Google doesn't bound these by time).
+        Raises CalendarAPIError with status 410 when the token has expired and a full sync
+        is required.
+
+        Returns:
+            Dictionary with "events" (busy events, formatted as in get_events plus "id"),
+            "removed" (IDs of cancelled or free events) and "next_sync_token"
+        """
+        url = f"{self.base_url}/calendars/{quote(calendar_id, safe='')}/events"
+        params = {"singleEvents": "true", "maxResults": MAX_RESULTS_PER_PAGE}
+        if sync_token:
+            params["syncToken"] = sync_token
+        else:
+            params["timeMin"], params["timeMax"] = to_rfc3339_range(start_date, end_date)
+
+        events, removed, next_sync_token = [], [], None
+        async for page in self._get_pages(access_token, url, params):
+            for event in page.get("items", []):
+                formatted_event = self._format_event(event)
+                # Cancelled events and ones marked "free" don't block time
+                if event.get("status") == "cancelled" or event.get("transparency") == "transparent" or not formatted_event:
+                    removed.append(event["id"])
+                    continue
+                formatted_event["id"] = event["id"]
+                events.append(formatted_event)
+            next_sync_token = page.get("nextSyncToken", next_sync_token)
+        return {"events": events, "removed": removed, "next_sync_token": next_sync_token}
+
+    @staticmethod
+    def _format_event(event: dict) -> Optional[dict]:
+        """Reduce a Calendar API event to summary/start/end, or None if it has no times."""
+        if "start" not in event or "end" not in event:
+            return None
+            
+        # Handle all-day events
+        if "date" in event["start"]:
+            start_time = f"{event['start']['date']}T00:00:00+00:00"
+            end_time = f"{event['end']['date']}T23:59:59+00:00"
+        else:
+            start_time = event["start"]["dateTime"]
+            end_time = event["end"]["dateTime"]
+        
+        return {
+            "summary": event.get("summary", "(No Title)"),
+            "start": start_time,
+            "end": end_time
+        }
+
     async def get_all_events(self, access_token: str, start_date: str = None, end_date: str = None) -> list[dict]:
         """Get events from all calendars"""
         # If no dates provided, use next 7 days
@@ -83,18 +176,82 @@ class GoogleCalendarService:
         if not end_date:
             end_date = (datetime.now() + timedelta(days=7)).isoformat()
             
-        calendar_ids = await self.get_calendar_ids(access_token)
-        all_events = []
-        for cal_id in calendar_ids:
-            if cal_id == "en.usa#holiday@group.v.calendar.google.com":
-                continue
-            events = await self.get_events(access_token, cal_id, start_date, end_date)
+        calendar_ids = [
+            cal_id for cal_id in await self.get_calendar_ids(access_token)
+            if cal_id != HOLIDAY_CALENDAR_ID
+        ]
+        # Fetch every calendar concurrently, capped so large calendar lists don't flood the API
+        semaphore = asyncio.Semaphore(settings.GOOGLE_CALENDAR_MAX_CONCURRENCY)
+
+        async def fetch(cal_id: str) -> list[dict]:
+            async with semaphore:
+                events = await self.get_events(access_token, cal_id, start_date, end_date)
             print(f"Found {len(events)} events for calendar {cal_id}")
             for event in events:
                 event["calendar_id"] = cal_id
+            return events
+
+        all_events = []
+        for events in await asyncio.gather(*(fetch(cal_id) for cal_id in calendar_ids)):
             all_events.extend(events)
         return all_events
 
+    async def get_free_busy(
+        self,
+        access_token: str,
+        start_date: str = None,
+        end_date: str = None,
+        calendar_ids: Optional[list[str]] = None
+    ) -> list[dict]:
+        """Get merged busy intervals across the user's calendars via freeBusy.query.
+
+        Unlike get_events, failures (including per-calendar errors) raise so callers
+        can fall back to the events path rather than mistaking them for free time.
+        """
+        if not start_date:
+            start_date = datetime.now().astimezone().isoformat()
+        if not end_date:
+            end_date = (datetime.now().astimezone() + timedelta(days=7)).isoformat()
+        start_date, end_date = to_rfc3339_range(start_date, end_date)
+
+        if calendar_ids is None:
+            calendar_ids = [
+                cal_id for cal_id in await self.get_calendar_ids(access_token)
+                if cal_id != HOLIDAY_CALENDAR_ID
+            ]
+        if not calendar_ids:
+            return []
+
+        session = await self._get_session()
+        headers = {"Authorization": f"Bearer {access_token}"}
+
+        async def query(batch: list[str]) -> list[dict]:
+            body = {
+                "timeMin": start_date,
+                "timeMax": end_date,
+                "items": [{"id": cal_id} for cal_id in batch]
+            }
+            async with session.post(f"{self.base_url}/freeBusy", headers=headers, json=body) as resp:
+                if resp.status != 200:
+                    error_text = await resp.text()
+                    raise Exception(f"FreeBusy query failed ({resp.status}): {error_text}")
+                data = await resp.json()
+            busy = []
+            for cal_id, calendar in data.get("calendars", {}).items():
+                if calendar.get("errors"):
+                    raise Exception(f"FreeBusy query failed for calendar {cal_id}: {calendar['errors']}")
+                busy.extend(calendar.get("busy", []))
+            return busy
+
+        batches = [
+            calendar_ids[i:i + MAX_FREEBUSY_ITEMS]
+            for i in range(0, len(calendar_ids), MAX_FREEBUSY_ITEMS)
+        ]
+        intervals = []
+        for busy in await asyncio.gather(*(query(batch) for batch in batches)):
+            intervals.extend(busy)
+        return merge_busy_intervals(intervals)
+
     async def add_event(
         self,
         access_token: str,
@@ -132,17 +289,17 @@ class GoogleCalendarService:
             if description:
                 event_data["description"] = description
             print("continuing to make request")
-            async with aiohttp.ClientSession() as session:
-                print("Making request to Google Calendar API...")
-                async with session.post(url, headers=headers, json=event_data) as resp:
-                    print(f"Response status: {resp.status}")
-                    if resp.status != 200:
-                        error_text = await resp.text()
-                        print(f"Error response: {error_text}")
-                        raise Exception(f"Failed to create event: {error_text}")
-                    response_data = await resp.json()
-                    print("Successfully created event")
-                    return response_data
+            session = await self._get_session()
+            print("Making request to Google Calendar API...")
+            async with session.post(url, headers=headers, json=event_data) as resp:
+                print(f"Response status: {resp.status}")
+                if resp.status != 200:
+                    error_text = await resp.text()
+                    print(f"Error response: {error_text}")
+                    raise Exception(f"Failed to create event: {error_text}")
+                response_data = await resp.json()
+                print("Successfully created event")
+                return response_data
         except Exception as e:
             print(f"Error in add_event: {str(e)}")
             raise
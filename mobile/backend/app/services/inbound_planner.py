@@ -0,0 +1,64 @@
+"""Plans the stages an inbound text goes through, so each reply costs as few LLM turns as possible."""
+from dataclasses import dataclass
+from typing import Optional
+
+# Local steps
+STEP_CONFIRM = "confirm"  # record a yes/no settled by the confirmation rules
+STEP_CALENDAR = "calendar"  # fetch a registered participant's busy times from their calendar
+STEP_STORE_SLOTS = "store_slots"  # store availability parsed from the reply
+STEP_READY = "ready"  # mark the participant pending_scheduling
+# LLM turns
+STEP_CONFIRMATION_TURN = "confirmation_turn"  # confirm and, for unregistered participants, ask for or store availability
+STEP_ASK_AVAILABILITY = "ask_availability"  # text an unregistered participant asking when they're free
+STEP_AVAILABILITY_TURN = "availability_turn"  # read availability the parser couldn't
+STEP_SCHEDULE = "schedule"  # schedule the event once every participant is ready
+
+LLM_STEPS = {STEP_CONFIRMATION_TURN, STEP_ASK_AVAILABILITY, STEP_AVAILABILITY_TURN, STEP_SCHEDULE}
+
+@dataclass
+class InboundState:
+    """What is known about a participant while their reply is processed.
+
+    Updated from local steps and from the results of the tools an LLM turn ran,
+    so the participant doesn't need to be read again between stages.
+    """
+    status: str
+    registered: bool
+    confirmed: Optional[bool] = None  # yes/no settled by rules for this reply
+    has_slots: bool = False  # the reply parsed into time slots locally
+    confirming: bool = False  # the participant confirmed with this reply
+    asked: bool = False  # an LLM turn already texted them this reply
+    stored: bool = False  # an LLM turn already stored their time slots
+
+def plan_inbound_stages(state: InboundState) -> list[str]:
+    """Steps left for this reply, in order.
+
+    The plan ends at an LLM turn whose outcome decides what follows
+    (STEP_CONFIRMATION_TURN); the caller updates the state from that turn's
+    tool results and plans again.
+    """
+    if state.status == "pending_confirmation":
+        if state.confirmed is None:
+            return [STEP_CONFIRMATION_TURN]
+        if not state.confirmed:
+            return [STEP_CONFIRM]
+        return [STEP_CONFIRM, *_plan_availability(state, confirming=True)]
+    if state.status == "pending_availability":
+        return _plan_availability(state, confirming=state.confirming)
+    if state.status == "pending_scheduling":
+        return [STEP_SCHEDULE]
+    return []
+
+def _plan_availability(state: InboundState, confirming: bool) -> list[str]:
+    if state.registered:
+        # Registered participants' availability comes from their calendar, not the reply
+        first = STEP_CALENDAR if confirming else STEP_AVAILABILITY_TURN
+        return [first, STEP_READY, STEP_SCHEDULE]
+    if state.stored:
+        return [STEP_READY, STEP_SCHEDULE]
+    if state.has_slots:
+        return [STEP_STORE_SLOTS, STEP_READY, STEP_SCHEDULE]
+    if confirming:
+        # Their availability is the next reply
+        return [] if state.asked else [STEP_ASK_AVAILABILITY]
+    return [STEP_AVAILABILITY_TURN, STEP_READY, STEP_SCHEDULE]
@@ -0,0 +1,121 @@
+"""Durable inbound SMS queue: the webhook persists texts, a worker pool processes them."""
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.services.database_service import DatabaseService
+
+logger = logging.getLogger(__name__)
+
+# Provider message IDs, checked in order; retries of a delivery repeat the same ID
+MESSAGE_ID_FIELDS = ("MessageSid", "SmsSid", "messageId")
+
+class InboundMessageNotRetryable(Exception):
+    """Raised by the handler when processing failed after it already texted someone or
+    changed a calendar, so running the message again would repeat that."""
+
+def idempotency_key(payload: dict) -> str:
+    """Key identifying one delivery of an inbound text.
+
+    Uses the provider's message ID when the payload has one, otherwise a hash of the
+    whole payload, so a retried webhook with identical content is only queued once.
+    """
+    for field in MESSAGE_ID_FIELDS:
+        if payload.get(field):
+            return f"{field}:{payload[field]}"
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return "sha256:" + hashlib.sha256(body.encode()).hexdigest()
+
+class InboundQueueService:
+    """Queues inbound texts in the inbound_messages table and drains them with a worker pool.
+
+    A poller claims up to INBOUND_QUEUE_CONCURRENCY messages at a time through the
+    claim_inbound_messages RPC, which hands out at most one message per event and
+    none for an event already in flight, so each event's texts are processed in
+    order across all processes while different events run in parallel. Failed
+    messages are retried up to INBOUND_QUEUE_MAX_ATTEMPTS times, unless the handler
+    raises InboundMessageNotRetryable.
+    """
+
+    def __init__(self, db_service: DatabaseService, handler: Callable[[str, str], Awaitable[Any]]):
+        self.db_service = db_service
+        self.handler = handler
+        self.concurrency = settings.INBOUND_QUEUE_CONCURRENCY
+        self.stale_seconds = settings.INBOUND_QUEUE_STALE_SECONDS
+        self._poller: Optional[asyncio.Task] = None
+        self._in_flight: set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+
+    async def enqueue(self, payload: dict, phone_number: str, body: str) -> dict:
+        """Persist an inbound text and wake the workers. Safe to call again for a retried webhook."""
+        key = idempotency_key(payload)
+        created = await self.db_service.enqueue_inbound_message(key, phone_number, body, payload)
+        if created:
+            self._wake.set()
+        else:
+            logger.info(f"Ignoring duplicate inbound message {key}")
+        return {"queued": created, "duplicate": not created}
+
+    def start(self) -> None:
+        """Start the poller; call from a running event loop."""
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+
+    async def close(self) -> None:
+        """Stop claiming and cancel messages in progress; they are reclaimed once stale."""
+        tasks = [t for t in (self._poller, *self._in_flight) if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._poller = None
+        self._in_flight.clear()
+
+    async def _poll(self) -> None:
+        while True:
+            self._wake.clear()
+            free = self.concurrency - len(self._in_flight)
+            claimed = 0
+            if free > 0:
+                try:
+                    rows = await self.db_service.claim_inbound_messages(free, self.stale_seconds)
+                except Exception as e:
+                    logger.error(f"Failed to claim inbound messages: {str(e)}")
+                    rows = []
+                for row in rows:
+                    task = asyncio.create_task(self._process(row))
+                    self._in_flight.add(task)
+                    task.add_done_callback(self._on_done)
+                claimed = len(rows)
+            if free > 0 and claimed == free:
+                continue  # There may be more; the next pass waits for a free slot
+            try:
+                # New messages and finished ones (which may unblock their event) wake us early;
+                # the timeout picks up messages queued by other processes
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.INBOUND_QUEUE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        self._wake.set()
+
+    async def _process(self, row: dict) -> None:
+        try:
+            # Give up before the claim goes stale so no other worker picks it up meanwhile
+            await asyncio.wait_for(self.handler(row["phone_number"], row["body"]), timeout=self.stale_seconds)
+            await self.db_service.finish_inbound_message(row["id"], "done")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            retry = row["attempts"] < settings.INBOUND_QUEUE_MAX_ATTEMPTS and not isinstance(e, InboundMessageNotRetryable)
+            logger.error(
+                f"Inbound message {row['id']} failed (attempt {row['attempts']}"
+                f"{', will retry' if retry else ''}): {str(e)}"
+            )
+            try:
+                await self.db_service.finish_inbound_message(row["id"], "pending" if retry else "failed", str(e))
+            except Exception as update_error:
+                logger.error(f"Failed to record outcome of inbound message {row['id']}: {str(update_error)}")
@@ -0,0 +1,56 @@
+"""Process-wide async client for the OpenRouter API."""
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from app.core.config import settings
+
+API_URL = "https://openrouter.ai/api/v1"
+
+logger = logging.getLogger(__name__)
+
+# One pooled client and one concurrency gate shared by every OpenRouterService
+_llm_client: Optional[AsyncOpenAI] = None
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+
+def get_llm_client() -> AsyncOpenAI:
+    """Get the shared AsyncOpenAI client, creating it on first use."""
+    global _llm_client
+    if _llm_client is None:
+        timeout = httpx.Timeout(
+            settings.OPENROUTER_TIMEOUT,
+            connect=settings.OPENROUTER_CONNECT_TIMEOUT
+        )
+        _llm_client = AsyncOpenAI(
+            api_key=settings.OPENROUTER_API_KEY,
+            base_url=API_URL,
+            timeout=timeout,
+            max_retries=settings.OPENROUTER_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.OPENROUTER_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENROUTER_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.OPENROUTER_KEEPALIVE_EXPIRY
+                )
+            )
+        )
+    return _llm_client
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore bounding concurrent in-flight completions."""
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(settings.OPENROUTER_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+async def close_llm_client() -> None:
+    """Close the shared client and its connection pool."""
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
+        logger.info("Closed OpenRouter client")
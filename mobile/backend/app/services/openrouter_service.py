@@ -1,14 +1,33 @@
 import os
-import requests
 import json
 from typing import Optional, Dict, List, Any
 from .tools import AVAILABLE_TOOLS, TOOL_INDICES
 from app.services.database_service import DatabaseService
 from app.core.config import settings
 from app.services.google_calendar_service import GoogleCalendarService
+from app.services.calendar_cache_service import CalendarCacheService
+from app.services.contact_search_index import ContactSearchService
+from app.services.chat_memory_service import ChatMemoryService
+from app.services.agent_context import AgentContext, get_agent_context, with_agent_context
+from app.services.confirmation_classifier import ConfirmationClassifier
+from app.services.availability_parser import parse_availability
+from app.services.inbound_queue_service import InboundMessageNotRetryable
+from app.services.inbound_planner import (
+    InboundState,
+    plan_inbound_stages,
+    STEP_CONFIRM,
+    STEP_CONFIRMATION_TURN,
+    STEP_CALENDAR,
+    STEP_STORE_SLOTS,
+    STEP_ASK_AVAILABILITY,
+    STEP_AVAILABILITY_TURN,
+    STEP_READY,
+    STEP_SCHEDULE
+)
+from zoneinfo import ZoneInfo
 from app.services.token_manager import TokenManager
 from app.services.texting_service import TextingService
-from app.services.websocket_service import send_chat_message
+from app.services.websocket_service import send_chat_message, send_event
 from uuid import uuid4, UUID
 from app.models.time_slot import TimeSlot
 from datetime import datetime, timedelta, timezone
@@ -16,10 +35,16 @@ from fastapi import HTTPException
 import logging
 from pydantic import BaseModel, Field, validator
 from app.services.prompts import AVAILABLE_PROMPTS
+from app.services.tool_executor import ToolExecutor, ToolCallResult
+from app.services.scheduling_engine import find_candidate_slots, DEFAULT_DURATION_MINUTES, DEFAULT_TOP_K, DEFAULT_SEARCH_DAYS
+from app.services.availability_bitmap import find_candidate_slots_bitmap
 import asyncio
-from openai import OpenAI
+from openai import APIConnectionError
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
+from openai.types.chat.chat_completion_message_tool_call import Function
+from app.services.llm_client import API_URL, get_llm_client, get_llm_semaphore
 
-API_URL = "https://openrouter.ai/api/v1"
 MODEL = "qwen/qwen-turbo"
 
 logger = logging.getLogger(__name__)
@@ -69,20 +94,24 @@ class OpenRouterService:
         db_service: DatabaseService,
         google_calendar_service: GoogleCalendarService,
         token_manager: TokenManager,
-        texting_service: TextingService = None
+        texting_service: TextingService = None,
+        calendar_cache_service: CalendarCacheService = None,
+        contact_search_service: ContactSearchService = None,
+        chat_memory_service: ChatMemoryService = None
     ):
         self.api_url = API_URL
         self.model = MODEL
         self.api_key = settings.OPENROUTER_API_KEY
         if not self.api_key:
             raise RuntimeError("OPENROUTER_API_KEY not set in environment")
-        self._current_event_id: Optional[str] = None
-        self._current_owner_id: Optional[str] = None
-        self._current_participants: Optional[dict[str, dict]] = None  # Dict of phone_number -> participant for current event
         self.db_service = db_service
         self.google_calendar_service = google_calendar_service
         self.token_manager = token_manager
         self.texting_service = texting_service
+        self.calendar_cache_service = calendar_cache_service or CalendarCacheService(db_service, google_calendar_service)
+        self.contact_search_service = contact_search_service or ContactSearchService(db_service)
+        self.chat_memory_service = chat_memory_service or ChatMemoryService(db_service, MODEL)
+        self.confirmation_classifier = ConfirmationClassifier(settings.CONFIRMATION_RULES_MIN_CONFIDENCE)
         self.available_tools = AVAILABLE_TOOLS
         self.stage_number = 0
 
@@ -97,6 +126,7 @@ class OpenRouterService:
         self.TOOL_MAPPINGS = {
             "create_draft_event": self.create_draft_event,
             "search_contacts": self.search_contacts,
+            "search_contacts_batch": self.search_contacts_batch,
             "check_user_registration": self.check_user_registration,
             "create_event_participant": self.create_event_participant,
             "create_or_get_conversation": self.create_or_get_conversation,
@@ -113,38 +143,47 @@ class OpenRouterService:
             "get_event_availabilities": self.get_event_availabilities,
             "stop_loop": self.stop_loop
         }
+        self.tool_executor = ToolExecutor(self.TOOL_MAPPINGS)
+
+    @property
+    def context(self) -> AgentContext:
+        # State of the run in progress; the service itself is shared across concurrent runs
+        return get_agent_context()
 
     @property
     def current_event_id(self) -> Optional[str]:
         # Get the ID of the event currently being worked on
-        return self._current_event_id
+        return self.context.event_id
 
     def set_current_event(self, event_id: str) -> None:
         # Set the ID of the event currently being worked on
-        self._current_event_id = event_id
-        self._current_participants = None  # Clear cached participants
+        self.context.event_id = event_id
+        self.context.participants = None  # Clear cached participants
 
     def clear_current_event(self) -> None:
         # Clear the current event ID and related data
-        self._current_event_id = None
-        self._current_owner_id = None
-        self._current_participants = None
+        self.context.event_id = None
+        self.context.owner_id = None
+        self.context.participants = None
 
-    async def _get_current_participants(self) -> dict[str, dict]:
+    async def _get_current_participants(self, phone_number: str = None) -> dict[str, dict]:
         """Get participants for current event, using cache if available.
-        Returns a dictionary mapping phone numbers to participant data."""
+        Returns a dictionary mapping phone numbers to participant data.
+        A phone_number missing from the cache reloads it, since tools in the same step
+        may have created the participant after the cache was filled."""
         if not self.current_event_id:
             raise RuntimeError("No current event set")
             
-        if self._current_participants is None:
+        context = self.context
+        if context.participants is None or (phone_number and phone_number not in context.participants):
             # Get participants from database
-            participants_list = await self.db_service.get_event_participants(self.current_event_id)
+            participants_list = await self.db_service.get_event_participants(context.event_id)
             # Convert to dictionary with phone numbers as keys
-            self._current_participants = {
+            context.participants = {
                 p["phone_number"]: p for p in participants_list
             }
             
-        return self._current_participants
+        return context.participants
 
     def _handle_error(self, error: Exception, context: str) -> None:
         """Standardized error handling for the service"""
@@ -155,33 +194,104 @@ class OpenRouterService:
             logger.error(f"{context}: Unexpected error: {str(error)}")
             raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
-    async def prompt_agent(self, messages: list[dict[str, str]], tools: list[dict[str, Any]]) -> tuple[Dict[str, Any], Dict[str, int]]:
-        """Send a prompt to the OpenRouter agent and get a response"""
-        try:         
-            client = OpenAI(
-                api_key=self.api_key,
-                base_url="https://openrouter.ai/api/v1",
-            )
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=tools
-            )
+    async def prompt_agent(
+        self,
+        messages: list[dict[str, str]],
+        tools: list[dict[str, Any]],
+        stream_to: Optional[str] = None
+    ) -> tuple[Dict[str, Any], Dict[str, int]]:
+        """Send a prompt to the OpenRouter agent and get a response.
+
+        If stream_to is a user ID, the completion is streamed and token deltas and
+        tool-call progress are pushed to that user's WebSocket as they arrive. The
+        return value is the same assembled message and usage in both modes.
+        """
+        try:
+            # Shared pooled client; the semaphore bounds in-flight completions per process
+            async with get_llm_semaphore():
+                if stream_to:
+                    return await self._stream_completion(messages, tools, stream_to)
+                response = await get_llm_client().chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    tools=tools
+                )
             return response.choices[0].message, response.usage
             
-        except requests.exceptions.RequestException as e:
+        except APIConnectionError as e:
             logger.error(f"OpenRouter API request failed: {str(e)}")
             raise RuntimeError(f"Failed to communicate with OpenRouter API: {str(e)}")
         except Exception as e:
             logger.error(f"Error processing OpenRouter response: {str(e)}")
             raise RuntimeError(f"Failed to process OpenRouter response: {str(e)}")
 
+    async def _stream_completion(
+        self,
+        messages: list[dict[str, str]],
+        tools: list[dict[str, Any]],
+        user_id: str
+    ) -> tuple[ChatCompletionMessage, CompletionUsage]:
+        """Consume the OpenRouter SSE stream, forwarding deltas to the user's WebSocket."""
+        stream = await get_llm_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=tools,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        content_parts = []
+        tool_calls: dict[int, dict] = {}  # Tool calls arrive in fragments keyed by index
+        usage = None
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content_parts.append(delta.content)
+                await send_event(user_id, {"type": "chat_delta", "delta": delta.content})
+            for fragment in delta.tool_calls or []:
+                call = tool_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+                if fragment.id:
+                    call["id"] = fragment.id
+                if fragment.function and fragment.function.name:
+                    call["name"] += fragment.function.name
+                    await send_event(user_id, {"type": "tool_call", "status": "planned", "name": call["name"]})
+                if fragment.function and fragment.function.arguments:
+                    call["arguments"] += fragment.function.arguments
+
+        message = ChatCompletionMessage(
+            role="assistant",
+            content="".join(content_parts) or None,
+            tool_calls=[
+                ChatCompletionMessageToolCall(
+                    id=call["id"] or str(uuid4()),
+                    type="function",
+                    function=Function(name=call["name"], arguments=call["arguments"] or "{}")
+                )
+                for _, call in sorted(tool_calls.items())
+            ] or None
+        )
+        return message, usage or CompletionUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+
+    async def _run_tool_calls(self, response) -> list[ToolCallResult]:
+        """Execute a response's tool calls, raising the first error in call order."""
+        if not response.tool_calls:
+            return []
+        results = await self.tool_executor.run(response.tool_calls)
+        for r in results:
+            # Calls to tools we don't expose are skipped, as before
+            if r.error and r.name in self.TOOL_MAPPINGS:
+                raise r.error
+        return results
+
     async def create_draft_event(self, creator_id: UUID, title: str, description: Optional[str] = None) -> dict:
         """Create a draft event"""
         try:
             event = await self.db_service.create_draft_event(creator_id, title, description)
             self.set_current_event(event["id"])
-            self._current_owner_id = creator_id  # Store the registered user's ID
+            self.context.owner_id = creator_id  # Store the registered user's ID
             return event
         except Exception as e:
             self._handle_error(e, "Failed to create draft event")
@@ -195,19 +305,47 @@ class OpenRouterService:
         days_ago: int = 30
     ) -> list[dict]:
         # Search contacts with flexible filtering
-        if not self._current_owner_id:
+        if not self.context.owner_id:
             print("No current owner set - create an event first")
             raise RuntimeError("No current owner set - create an event first")
         
-        return await self.db_service.search_contacts(
-            self._current_owner_id,  # Use the registered user's ID to find their contacts
+        # recent_only/days_ago are not implemented by either backend yet
+        if settings.CONTACT_SEARCH_BACKEND == "database":
+            return await self.db_service.search_contacts(
+                self.context.owner_id,  # Use the registered user's ID to find their contacts
+                query,
+                min_relationship_score,
+                recent_only,
+                limit,
+                days_ago
+            )
+        return await self.contact_search_service.search(
+            self.context.owner_id,
             query,
             min_relationship_score,
-            recent_only,
-            limit,
-            days_ago
+            limit
         )
     
+    async def search_contacts_batch(
+        self,
+        queries: list[str],
+        limit_per_query: int = 5
+    ) -> dict[str, list[dict]]:
+        """Search contacts for several names or numbers in one call, grouped by query."""
+        if not self.context.owner_id:
+            raise RuntimeError("No current owner set - create an event first")
+
+        queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+        if settings.CONTACT_SEARCH_BACKEND == "database":
+            return await self.db_service.search_contacts_batch(
+                self.context.owner_id,
+                queries,
+                limit_per_query
+            )
+        # One index load serves every query
+        index = await self.contact_search_service.get_index(self.context.owner_id)
+        return {query: index.search(query, limit=limit_per_query) for query in queries}
+
     async def check_user_registration(self, phone_number: str, name: str = None) -> dict:
         """Check if a phone number belongs to a registered user and return their registration details and Google Calendar access status."""
         try:
@@ -218,7 +356,7 @@ class OpenRouterService:
                 return {
                     "is_registered": False,
                     "user_id": None,
-                    "owner_id": self._current_owner_id,
+                    "owner_id": self.context.owner_id,
                     "name": name,
                     "phone_number": phone_number,
                     "has_google_calendar": False
@@ -237,7 +375,7 @@ class OpenRouterService:
                 "is_registered": True,
                 "user_id": user["id"],
                 "name": user["name"],  # Use registered user's name from database
-                "owner_id": self._current_owner_id,
+                "owner_id": self.context.owner_id,
                 "phone_number": phone_number,
                 "has_google_calendar": has_google_calendar
             }
@@ -269,8 +407,8 @@ class OpenRouterService:
         )
         
         # Update cache if it exists
-        if self._current_participants is not None:
-            self._current_participants[phone_number] = participant
+        if self.context.participants is not None:
+            self.context.participants[phone_number] = participant
             
         return participant
 
@@ -286,7 +424,7 @@ class OpenRouterService:
             raise RuntimeError("No current event set - create an event first")
             
         # Get all event participants and find the matching one
-        participants = await self._get_current_participants()
+        participants = await self._get_current_participants(phone_number)
         participant = participants.get(phone_number)
         print(f"Participant: {participant}")
         if not participant:
@@ -339,7 +477,7 @@ class OpenRouterService:
             raise RuntimeError("No current event set - create an event first")
             
         # Get all event participants and find the matching one
-        participants = await self._get_current_participants()
+        participants = await self._get_current_participants(phone_number)
         participant = participants.get(phone_number)
         if not participant:
             raise RuntimeError(f"No participant found with phone number {phone_number}")
@@ -375,8 +513,8 @@ class OpenRouterService:
         )
         
         # Update cache if it exists
-        if self._current_participants is not None:
-            self._current_participants[phone_number].update(update_data)
+        if self.context.participants is not None:
+            self.context.participants[phone_number].update(update_data)
             
         # Update conversation status
         if confirmation:
@@ -397,7 +535,7 @@ class OpenRouterService:
                 phone_number,
                 update_data
             )
-            self._current_participants[phone_number].update(update_data)
+            self.context.participants[phone_number].update(update_data)
         else:
             await self.db_service.update_conversation(
                 self.current_event_id,
@@ -415,7 +553,7 @@ class OpenRouterService:
                 phone_number,
                 update_data
             )
-            self._current_participants[phone_number].update(update_data)
+            self.context.participants[phone_number].update(update_data)
         return {
             "success": True,
             "confirmation": confirmation,
@@ -439,6 +577,7 @@ class OpenRouterService:
             
             # Send the message
             await self.texting_service.send_text(phone_number, message, final=final)
+            self.context.side_effects.append(f"send_text:{phone_number}")
 
             # Update last message in conversation
             if active_conversation:
@@ -474,23 +613,46 @@ class OpenRouterService:
             print(f"User {user_id} not found or not registered with Google Calendar")
             raise RuntimeError(f"User {user_id} not found or not registered with Google Calendar")
         print(f"Tokens: {tokens}")
-        # Get events from Google Calendar
-        events = await self.google_calendar_service.get_all_events(
-            tokens['google_access_token'],
-            start_date,
-            end_date
-        )
-        print(f"Events: {events}")
+        busy_intervals = None
+        if settings.CALENDAR_CACHE_ENABLED:
+            # Cached intervals, brought up to date with incremental sync when stale
+            try:
+                busy_intervals = await self.calendar_cache_service.get_busy_intervals(
+                    user_id,
+                    tokens['google_access_token'],
+                    start_date,
+                    end_date
+                )
+            except Exception as e:
+                logger.warning(f"Calendar cache lookup failed for user {user_id}: {str(e)}")
+        if busy_intervals is None and settings.GOOGLE_CALENDAR_USE_FREEBUSY:
+            # One freeBusy.query across all calendars returns merged busy intervals directly
+            try:
+                busy_intervals = await self.google_calendar_service.get_free_busy(
+                    tokens['google_access_token'],
+                    start_date,
+                    end_date
+                )
+            except Exception as e:
+                logger.warning(f"FreeBusy lookup failed for user {user_id}, falling back to events: {str(e)}")
+        if busy_intervals is None:
+            # Fallback: get events from Google Calendar
+            events = await self.google_calendar_service.get_all_events(
+                tokens['google_access_token'],
+                start_date,
+                end_date
+            )
+            print(f"Events: {events}")
+            busy_intervals = [{"start": event["start"], "end": event["end"]} for event in events]
         
-        # Convert events to busy time slots
+        # Convert busy intervals to busy time slots
         busy_slots = []
-        for event in events:
-            # Skip events that are marked as free
+        for interval in busy_intervals:
             busy_slots.append({
                 "id": str(uuid4()),
                 "participant_id": user_id,
-                "start_time": event['start'],  # Now a string
-                "end_time": event['end'],      # Now a string
+                "start_time": interval['start'],  # Now a string
+                "end_time": interval['end'],      # Now a string
                 "source": "calendar"
             })
         print(f"Busy slots: {busy_slots}")
@@ -624,6 +786,7 @@ class OpenRouterService:
                 location=location,
                 description=event["description"]
             )
+            self.context.side_effects.append(f"add_event:{creator['id']}")
             print("added event to google calendar")
 
             for attendee in attendees:
@@ -637,6 +800,7 @@ class OpenRouterService:
                     location=location,
                     description=event["description"]
                 )
+                self.context.side_effects.append(f"add_event:{attendee['id']}")
             # Update event with final details
             update_data = {
                 "status": "scheduled",
@@ -809,8 +973,9 @@ class OpenRouterService:
             if not target_participants:
                 raise RuntimeError("No matching participants found for provided phone numbers")
                 
-            # Get busy times for all participants
-            busy_times = await self.db_service.get_all_participants_busy_times(event_id)
+            # Best time found so far, even if not everyone can make it
+            candidate_slots = await self.find_event_candidate_slots(event_id)
+            best_slot = candidate_slots[0] if candidate_slots else None
             
             # Format messages based on conflict type
             messages = {}
@@ -821,6 +986,11 @@ class OpenRouterService:
                         "Could you please provide more availability options? "
                         "Feel free to suggest any times that work for you."
                     )
+                    if best_slot:
+                        message += (
+                            f" The closest option so far is {best_slot['start_time']} - {best_slot['end_time']}, "
+                            "would that work?"
+                        )
                 elif conflict_type == "insufficient_availability":
                     message = (
                         f"Hi {participant['name']}! We need more availability options for '{event['title']}'. "
@@ -888,6 +1058,7 @@ class OpenRouterService:
                 "success": True,
                 "event_id": event_id,
                 "conflict_type": conflict_type,
+                "candidate_slots": candidate_slots,
                 "conversations": conversation_results
             }
             
@@ -1038,7 +1209,7 @@ class OpenRouterService:
             raise RuntimeError("No current event set - create an event first")
             
         # Get all event participants and find the matching one
-        participants = await self._get_current_participants()
+        participants = await self._get_current_participants(phone_number)
         participant = participants.get(phone_number)
         if not participant:
             raise RuntimeError(f"No participant found with phone number {phone_number}")
@@ -1089,16 +1260,53 @@ class OpenRouterService:
     async def send_chat_message_to_user(self, user_id: str, message: str) -> dict:
         """Send a chat message to the user via WebSocket if more information is needed."""
         await send_chat_message(user_id, message)
+        self.context.side_effects.append(f"chat_message:{user_id}")
         return {"success": True, "message": message}
     
     async def get_event_availabilities(self, event_id: str) -> dict:
-        # Add availability information
-        busy_times = await self.db_service.get_all_participants_busy_times(event_id)
-        unregistered_time_slots = await self.db_service.get_all_unregistered_time_slots(event_id)
+        # Ranked candidates instead of every raw slot keeps the tool result small
         return {
-            "busy_times": busy_times,
-            "unregistered_time_slots": unregistered_time_slots
+            "candidate_slots": await self.find_event_candidate_slots(event_id)
         }
+
+    async def find_event_candidate_slots(
+        self,
+        event_id: str,
+        duration_minutes: int = DEFAULT_DURATION_MINUTES,
+        top_k: int = DEFAULT_TOP_K
+    ) -> list[dict]:
+        """Rank the best meeting times for an event from its stored busy and available slots."""
+        event, participants, busy_times, unregistered_time_slots = await asyncio.gather(
+            self.db_service.get_event_by_id(event_id),
+            self.db_service.get_event_participants(event_id),
+            self.db_service.get_all_participants_busy_times(event_id),
+            self.db_service.get_all_unregistered_time_slots(event_id)
+        )
+        if not event:
+            raise RuntimeError(f"Event {event_id} not found")
+
+        # Keyed by name and phone number so the model can follow up with whoever is missing
+        participant_slots = {"creator": busy_times.get(event["creator_id"], [])}
+        for p in participants or []:
+            if p["status"] == "declined":
+                continue
+            label = f"{p['name']} ({p['phone_number']})" if p.get("name") else p["phone_number"]
+            if p["registered"]:
+                participant_slots[label] = busy_times.get(p.get("user_id"), [])
+            else:
+                participant_slots[label] = unregistered_time_slots.get(p["phone_number"], [])
+
+        find_slots = (
+            find_candidate_slots_bitmap
+            if len(participant_slots) >= settings.SCHEDULING_BITMAP_MIN_PARTICIPANTS
+            else find_candidate_slots
+        )
+        candidates = find_slots(
+            participant_slots,
+            duration_minutes=duration_minutes,
+            top_k=top_k
+        )
+        return [candidate.to_dict() for candidate in candidates]
     
     async def stop_loop(self):
         return True
@@ -1107,6 +1315,7 @@ class OpenRouterService:
         "agent_loop": [
             "create_draft_event",
             "search_contacts",
+            "search_contacts_batch",
             "check_user_registration",
             "create_event_participant",
             "create_or_get_conversation",
@@ -1117,7 +1326,8 @@ class OpenRouterService:
         ],
         "confirmation": [
             "handle_confirmation",
-            "send_text"
+            "send_text",
+            "create_unregistered_time_slots"
         ],
         "availability_registered": [
             "get_google_calendar_busy_times",
@@ -1132,12 +1342,23 @@ class OpenRouterService:
         ],
         "scheduling": [
             "schedule_event",
+            "handle_scheduling_conflict",
             "send_text",
             "send_chat_message_to_user",
         ]
     }
 
-    async def run_agent_loop(self, user_input: str, creator_id: str, stage_limit=2, stage_idx=0, max_steps=12):
+    @with_agent_context
+    async def run_agent_loop(
+        self,
+        user_input: str,
+        creator_id: str,
+        stage_limit=2,
+        stage_idx=0,
+        max_steps=12,
+        stream=False,
+        history: Optional[list[dict]] = None
+    ):
         """Run the agent loop for event creation and scheduling.
         
         Args:
@@ -1145,13 +1366,15 @@ class OpenRouterService:
             creator_id: ID of the event creator
             stage_limit: Maximum number of stages to process
             stage_idx: Starting stage index
+            stream: Stream token deltas and tool-call progress to the creator's WebSocket
+            history: Earlier conversation (summary and recent turns) placed before user_input
         """
         print("running agent loop")
         messages = []  # Messages to be sent to the agent
         phone_numbers = set()  # Track phone numbers involved
         response = None  # Last response from agent
         step = 0  # Step counter
-        self._current_owner_id = creator_id
+        self.context.owner_id = creator_id
         tool_call_history = []
         total_prompt_tokens = 0
         total_completion_tokens = 0
@@ -1188,6 +1411,7 @@ class OpenRouterService:
                             
                             {AVAILABLE_PROMPTS[current_stage]}"""
                         },
+                        *(history or []),
                         {
                             "role": "user",
                             "content": user_input
@@ -1195,66 +1419,47 @@ class OpenRouterService:
                     ]
                     print("messages", messages)
                 else:
-                    # Add tool call results to messages
-                    if response and hasattr(response, 'tool_calls'):
-                        for tool_call in response.tool_calls:
-                            tool_name = tool_call.function.name
-                            tool_args = json.loads(tool_call.function.arguments)
-                            
-                            if tool_name in self.TOOL_MAPPINGS:
-                                try:
-                                    print("<<<<<<<<<<<<<<<<<<<<")
-                                    print("tool_name", tool_name)
-                                    print("tool_args", tool_args)
-                                    result = await self.TOOL_MAPPINGS[tool_name](**tool_args)
-                                    print("result", result)
-                                    print(">>>>>>>>>>>>>>>>>>>>>")
-                                    messages.append({
-                                        "role": "assistant",
-                                        "content": None,
-                                        "tool_calls": [{
-                                            "id": str(uuid4()),
-                                            "type": "function",
-                                            "function": {
-                                                "name": tool_name,
-                                                "arguments": json.dumps(tool_args)
-                                            }
-                                        }]
-                                    })
-                                    messages.append({
-                                        "role": "tool",
-                                        "tool_call_id": str(uuid4()),
-                                        "content": json.dumps(result)
-                                    })
-                                    
-                                    # Track phone numbers from tool calls
-                                    if "phone_number" in tool_args:
-                                        phone_numbers.add(tool_args["phone_number"])
-                                        
-                                    # Check if we should stop the loop
-                                    if tool_name == "stop_loop":
-                                        return {
-                                            "success": True,
-                                            "phone_numbers": list(phone_numbers),
-                                            "tool_call_history": tool_call_history,
-                                            "total_prompt_tokens": total_prompt_tokens,
-                                            "total_completion_tokens": total_completion_tokens
-                                        }
-                                        
-                                except Exception as e:
-                                    logger.error(f"Error executing tool {tool_name}: {str(e)}")
-                                    print("error executing tool", e)
-                                    messages.append({
-                                        "role": "assistant",
-                                        "content": f"Error executing {tool_name}: {str(e)}"
-                                    })
-                                    continue
+                    # Run the step's tool calls (independent ones concurrently) and add results to messages
+                    if response and response.tool_calls:
+                        on_event = None
+                        if stream:
+                            async def on_event(status: str, name: str):
+                                await send_event(creator_id, {"type": "tool_call", "status": status, "name": name})
+                        results = await self.tool_executor.run(response.tool_calls, on_event=on_event)
+
+                        messages.append({
+                            "role": "assistant",
+                            "content": response.content,
+                            "tool_calls": [{
+                                "id": r.id,
+                                "type": "function",
+                                "function": {
+                                    "name": r.name,
+                                    "arguments": json.dumps(r.arguments)
+                                }
+                            } for r in results]
+                        })
+                        for r in results:
+                            messages.append(r.to_tool_message())
+                            # Track phone numbers from tool calls
+                            if "phone_number" in r.arguments:
+                                phone_numbers.add(r.arguments["phone_number"])
+
+                        # Check if we should stop the loop
+                        if any(r.name == "stop_loop" and not r.error for r in results):
+                            return {
+                                "success": True,
+                                "phone_numbers": list(phone_numbers),
+                                "tool_call_history": tool_call_history,
+                                "total_prompt_tokens": total_prompt_tokens,
+                                "total_completion_tokens": total_completion_tokens
+                            }
 
                 # Get response from agent
                 print("====================")
                 print("messages", messages)
                 print("====================")
-                response, usage = await self.prompt_agent(messages, tools)
+                response, usage = await self.prompt_agent(messages, tools, stream_to=creator_id if stream else None)
                 print("====================")
                 print("response", response)
                 print("====================")
@@ -1262,7 +1467,7 @@ class OpenRouterService:
                 total_completion_tokens += usage.completion_tokens
 
                 # Track tool calls
-                if hasattr(response, 'tool_calls'):
+                if response.tool_calls:
                     for tool_call in response.tool_calls:
                         tool_call_history.append({
                             "name": tool_call.function.name,
@@ -1290,10 +1495,30 @@ class OpenRouterService:
             "success": True,
             "phone_numbers": list(phone_numbers),
             "tool_call_history": tool_call_history,
+            "final_response": response.content if response and not response.tool_calls else None,
             "total_prompt_tokens": total_prompt_tokens,
             "total_completion_tokens": total_completion_tokens
         }
 
+    def _event_timezone(self, event: Optional[dict]):
+        """Timezone for reading participants' times: the event's, the configured default, or the server's."""
+        name = (event or {}).get("timezone") or settings.AVAILABILITY_DEFAULT_TIMEZONE
+        if name:
+            try:
+                return ZoneInfo(name)
+            except Exception:
+                logger.warning(f"Unknown timezone {name}, using server time")
+        return datetime.now().astimezone().tzinfo
+
+    async def find_active_conversation(self, phone_number: str) -> Optional[dict]:
+        """Get the active or pending conversation an inbound text from this number belongs to."""
+        conversations = await self.db_service.get_conversations_by_phone(phone_number)
+        return next(
+            (c for c in conversations if c["status"] == "active" or c["status"] == "pending"),
+            None
+        )
+
+    @with_agent_context
     async def handle_inbound_message(self, phone_number: str, message: str) -> dict:
         """Handle an incoming text message from a participant.
         
@@ -1303,7 +1528,14 @@ class OpenRouterService:
             
         Returns:
             dict: Response containing message details and any additional data
+
+        Raises:
+            InboundMessageNotRetryable: If processing failed after texts were sent or
+                calendar events added, which a retry would repeat
+            Exception: Any other error while processing, after the conversation is set
+                back to active, so the inbound queue retries the message
         """
+        active_conversation = None
         try:
             print("====================")
             print("Inbound message received:")
@@ -1312,13 +1544,7 @@ class OpenRouterService:
             print("====================")
 
             # Find active conversation for this phone number
-            conversations = await self.db_service.get_conversations_by_phone(phone_number)
-            print("Found conversations:", conversations)
-            
-            active_conversation = next(
-                (c for c in conversations if c["status"] == "active" or c["status"] == "pending"),
-                None
-            )
+            active_conversation = await self.find_active_conversation(phone_number)
             print("Active conversation:", active_conversation)
             
             if not active_conversation:
@@ -1357,255 +1583,161 @@ class OpenRouterService:
                 \nCurrent datetime: {current_datetime}
                 """
             
-            # Handle different participant statuses
-            print("participant", participant)
-            if participant["status"] == "pending_confirmation":
-                # Handle confirmation response
-                print("handling confirmation response")
-                messages = [
-                    {
-                        "role": "system",
-                        "content": AVAILABLE_PROMPTS["confirmation"]
-                    },
-                    {
-                        "role": "user",
-                        "content": context
-                    }
-                ]
-                tools = [
-                    AVAILABLE_TOOLS[TOOL_INDICES[tool_name]] 
-                    for tool_name in self.TOOLS_FOR_STAGE["confirmation"] 
-                    if tool_name in self.TOOL_MAPPINGS
-                ]
-                
-                response, usage = await self.prompt_agent(messages, tools)
-                
-                if hasattr(response, 'tool_calls') and response.tool_calls:
-                    for tool_call in response.tool_calls:
-                        tool_name = tool_call.function.name
-                        tool_args = json.loads(tool_call.function.arguments)
-                        
-                        if tool_name in self.TOOL_MAPPINGS:
-                            await self.TOOL_MAPPINGS[tool_name](**tool_args)
-                
-                # After handling confirmation, check if we need to move to availability
-                participant = await self.db_service.get_event_participant_by_phone(active_conversation["event_id"], phone_number)
-                if participant["status"] == "pending_availability":
-                    if participant["registered"]:
-                        print("handling registered user availability")
-                        # Handle registered user availability
-                        context += f"\nParticipant ID: {participant['user_id']}"
-                        messages = [
-                            {
-                                "role": "system",
-                                "content": AVAILABLE_PROMPTS["availability_registered"]
-                            },
-                            {
-                                "role": "user",
-                                "content": context
-                            }
-                        ]
-                        tools = [
-                            AVAILABLE_TOOLS[TOOL_INDICES[tool_name]] 
-                            for tool_name in self.TOOLS_FOR_STAGE["availability_registered"] 
-                            if tool_name in self.TOOL_MAPPINGS
-                        ]
-                        
-                        response, usage = await self.prompt_agent(messages, tools)
-                        
-                        if hasattr(response, 'tool_calls') and response.tool_calls:
-                            for tool_call in response.tool_calls:
-                                tool_name = tool_call.function.name
-                                tool_args = json.loads(tool_call.function.arguments)
-                                
-                                if tool_name in self.TOOL_MAPPINGS:
-                                    await self.TOOL_MAPPINGS[tool_name](**tool_args)
-                        
-                        # Update participant status
-                        update_data = {
-                            "status": "pending_scheduling",
-                            "response_text": message,
-                            "updated_at": now.isoformat(),
-                        }
-                        await self.db_service.update_event_participant(
-                            self._current_event_id,
-                            phone_number,
-                            update_data
-                        )
-                        if self._current_participants:
-                            self._current_participants[phone_number].update(update_data)
-                            
-                    else:
-                        # Handle unregistered user availability
-                        print("handling unregistered user availability")
-                        messages = [
-                            {
-                                "role": "system",
-                                "content": AVAILABLE_PROMPTS["availability_unregistered"]
-                            },
-                            {
-                                "role": "user",
-                                "content": context
-                            }
-                        ]
-                        tools = [
-                            AVAILABLE_TOOLS[TOOL_INDICES[tool_name]] 
-                            for tool_name in self.TOOLS_FOR_STAGE["availability_unregistered"] 
-                            if tool_name in self.TOOL_MAPPINGS
-                        ]
-                        
-                        response, usage = await self.prompt_agent(messages, tools)
-                        
-                        if hasattr(response, 'tool_calls') and response.tool_calls:
-                            for tool_call in response.tool_calls:
-                                tool_name = tool_call.function.name
-                                tool_args = json.loads(tool_call.function.arguments)
-                                
-                                if tool_name in self.TOOL_MAPPINGS:
-                                    await self.TOOL_MAPPINGS[tool_name](**tool_args)
-                
-            elif participant["status"] == "pending_availability":
-                # Handle availability response
-                print("handling availability response")
-                messages = [
-                    {
-                        "role": "system",
-                        "content": AVAILABLE_PROMPTS["availability"]
-                    },
-                    {
-                        "role": "user",
-                        "content": context
-                    }
-                ]
-                tools = [
-                    AVAILABLE_TOOLS[TOOL_INDICES[tool_name]] 
-                    for tool_name in self.TOOLS_FOR_STAGE["availability"] 
-                    if tool_name in self.TOOL_MAPPINGS
-                ]
-                
-                response, usage = await self.prompt_agent(messages, tools)
-                
-                if hasattr(response, 'tool_calls') and response.tool_calls:
-                    for tool_call in response.tool_calls:
-                        tool_name = tool_call.function.name
-                        tool_args = json.loads(tool_call.function.arguments)
-                        
-                        if tool_name in self.TOOL_MAPPINGS:
-                            await self.TOOL_MAPPINGS[tool_name](**tool_args)
-                
-                # Update participant status
-                update_data = {
-                    "status": "pending_scheduling",
-                    "response_text": message,
-                    "updated_at": now.isoformat(),
-                }
-                await self.db_service.update_event_participant(
-                    self._current_event_id,
-                    phone_number,
-                    update_data
-                )
-                
-            # Check if all participants are ready for scheduling
-            print("checking if all participants are ready for scheduling")
-            participants = await self.db_service.get_event_participants(self._current_event_id)
-            if all(p["status"] == "pending_scheduling" for p in participants):
-                print("all participants are ready for scheduling")
-                # Get all participant times
-                participant_times = {}
-                for p in participants:
-                    if p["registered"]:
-                        participant_times[p["name"]] = await self.db_service.get_participant_busy_times(
-                            self._current_event_id,
-                            p["user_id"]
-                        )
-                    else:
-                        participant_times[p["name"]] = await self.db_service.get_unregistered_time_slots(
-                            self._current_event_id,
-                            p["phone_number"]
-                        )
-                print("participant_times", participant_times)
-                
-                # Get creator times
-                creator_times = await self.db_service.get_participant_busy_times(
-                    self._current_event_id,
-                    event["creator_id"]
-                )
-                
-                # Add times to context
-                context += f"\nParticipant times: {participant_times}"
-                context += f"\nCreator times: {creator_times}"
-                
-                # Schedule event
-                messages = [
-                    {
-                        "role": "system",
-                        "content": AVAILABLE_PROMPTS["scheduling"]
-                    },
-                    {
-                        "role": "user",
-                        "content": context
-                    }
-                ]
-                tools = [
-                    AVAILABLE_TOOLS[TOOL_INDICES[tool_name]] 
-                    for tool_name in self.TOOLS_FOR_STAGE["scheduling"] 
-                    if tool_name in self.TOOL_MAPPINGS
-                ]
-                
-                response, usage = await self.prompt_agent(messages, tools)
-                
-                if hasattr(response, 'tool_calls') and response.tool_calls:
-                    creator_message = None
-                    for tool_call in response.tool_calls:
-                        tool_name = tool_call.function.name
-                        tool_args = json.loads(tool_call.function.arguments)
-                        
-                        if tool_name in self.TOOL_MAPPINGS:
-                            print("<<<<<<<<<<<<<<<<<<<<")
-                            print("tool_name", tool_name)
-                            print("tool_args", tool_args)
-                            result = await self.TOOL_MAPPINGS[tool_name](**tool_args)
-                            print("result", result)
-                            print(">>>>>>>>>>>>>>>>>>>")
-                            if tool_name == "schedule_event":
-                                creator_message = result.get("creator_message")
-                    
-                    # Update participant status to confirmed
+            # Plan the stages this reply can reach; rules and the local parser settle what
+            # they can, and only the stages that need judgement cost an LLM turn
+            state = InboundState(status=participant["status"], registered=bool(participant["registered"]))
+            if state.status == "pending_confirmation" and settings.CONFIRMATION_RULES_ENABLED:
+                state.confirmed = self.confirmation_classifier.resolve(message)
+            if (
+                settings.AVAILABILITY_PARSER_ENABLED
+                and not state.registered
+                and state.status in ("pending_confirmation", "pending_availability")
+            ):
+                time_slots = parse_availability(message, datetime.now(self._event_timezone(event)))
+                state.has_slots = bool(time_slots)
+            else:
+                time_slots = None
+
+            plan = plan_inbound_stages(state)
+            logger.debug(f"Inbound plan: {plan}")
+            while plan:
+                step = plan.pop(0)
+                if step == STEP_CONFIRM:
+                    await self.handle_confirmation(phone_number, state.confirmed, message)
+                elif step == STEP_CONFIRMATION_TURN:
+                    # One turn confirms and, for unregistered participants, asks for or stores availability
+                    exclude = ("create_unregistered_time_slots",) if state.registered else ()
+                    results = await self._run_stage_turn("confirmation", context, exclude)
+                    confirmation = next((r.result for r in results if r.name == "handle_confirmation"), None)
+                    if not confirmation:
+                        break  # Still unclear; the participant stays pending_confirmation
+                    state.confirmed = None
+                    state.confirming = confirmation["confirmation"]
+                    state.status = "pending_availability" if confirmation["confirmation"] else "declined"
+                    state.asked = any(r.name == "send_text" for r in results)
+                    state.stored = any(r.name == "create_unregistered_time_slots" for r in results)
+                    plan = plan_inbound_stages(state)
+                elif step == STEP_CALENDAR:
+                    print("handling registered user availability")
+                    window_start = datetime.now().astimezone()
+                    await self.get_google_calendar_busy_times(
+                        participant["user_id"],
+                        window_start.isoformat(),
+                        (window_start + timedelta(days=DEFAULT_SEARCH_DAYS)).isoformat()
+                    )
+                elif step == STEP_STORE_SLOTS:
+                    logger.debug(f"Parsed availability locally: {time_slots}")
+                    await self.create_unregistered_time_slots(phone_number, time_slots)
+                elif step == STEP_ASK_AVAILABILITY:
+                    print("handling unregistered user availability")
+                    await self._run_stage_turn("availability_unregistered", context)
+                elif step == STEP_AVAILABILITY_TURN:
+                    print("handling availability response")
+                    stage_context = context
+                    if state.registered:
+                        stage_context += f"\nParticipant ID: {participant['user_id']}"
+                    await self._run_stage_turn("availability", stage_context)
+                elif step == STEP_READY:
                     update_data = {
-                        "status": "confirmed",
+                        "status": "pending_scheduling",
                         "response_text": message,
                         "updated_at": now.isoformat(),
                     }
                     await self.db_service.update_event_participant(
-                        self._current_event_id,
+                        self.context.event_id,
                         phone_number,
                         update_data
                     )
-                    if self._current_participants:
-                        self._current_participants[phone_number].update(update_data)
-                    
-                    return {
-                        "message": message,
-                        "from_number": phone_number,
-                        "creator_message": creator_message
-                    }
-            
-            elif participant["status"] in ["confirmed", "declined"]:
-                return {"message": message, "from_number": phone_number}
-            
+                    if self.context.participants:
+                        self.context.participants[phone_number].update(update_data)
+                    state.status = "pending_scheduling"
+                elif step == STEP_SCHEDULE:
+                    result = await self._schedule_if_ready(phone_number, message, context, now)
+                    if result:
+                        return result
+
             return {"message": message, "from_number": phone_number}
             
         except Exception as e:
             logger.error(f"Error processing inbound message: {str(e)}")
             # Keep conversation active if there's an error
             if active_conversation:
-                await self.db_service.update_conversation(
-                    active_conversation["event_id"],
-                    phone_number,
-                    "active",
-                    active_conversation["user_name"]
-                )
-            return {"message": message, "from_number": phone_number}
+                try:
+                    await self.db_service.update_conversation(
+                        active_conversation["event_id"],
+                        phone_number,
+                        "active",
+                        active_conversation["user_name"]
+                    )
+                except Exception as restore_error:
+                    logger.error(f"Failed to reactivate conversation for {phone_number}: {str(restore_error)}")
+            side_effects = self.context.side_effects
+            if side_effects:
+                raise InboundMessageNotRetryable(
+                    f"{str(e)} (after {', '.join(side_effects)}; not retrying)"
+                ) from e
+            raise
+
+    async def _run_stage_turn(self, stage: str, context: str, exclude: tuple = ()) -> list[ToolCallResult]:
+        """One LLM turn for an inbound-text stage: its prompt, its tools, then run the tool calls."""
+        messages = [
+            {
+                "role": "system",
+                "content": AVAILABLE_PROMPTS[stage]
+            },
+            {
+                "role": "user",
+                "content": context
+            }
+        ]
+        tools = [
+            AVAILABLE_TOOLS[TOOL_INDICES[tool_name]] 
+            for tool_name in self.TOOLS_FOR_STAGE[stage] 
+            if tool_name in self.TOOL_MAPPINGS and tool_name not in exclude
+        ]
+        response, usage = await self.prompt_agent(messages, tools)
+        return await self._run_tool_calls(response)
+
+    async def _schedule_if_ready(self, phone_number: str, message: str, context: str, now: datetime) -> Optional[dict]:
+        """Schedule the event with one LLM turn once every participant is pending_scheduling."""
+        # Check if all participants are ready for scheduling
+        print("checking if all participants are ready for scheduling")
+        participants = await self.db_service.get_event_participants(self.context.event_id)
+        if not all(p["status"] == "pending_scheduling" for p in participants):
+            return None
+        print("all participants are ready for scheduling")
+        # Rank candidate times locally; the model only chooses among the best few
+        candidate_slots = await self.find_event_candidate_slots(self.context.event_id)
+        logger.debug(f"Candidate slots: {candidate_slots}")
+        context += f"\nCandidate times (best first): {json.dumps(candidate_slots)}"
+
+        results = await self._run_stage_turn("scheduling", context)
+        if not results:
+            return None
+        creator_message = None
+        for r in results:
+            if r.name == "schedule_event":
+                creator_message = r.result.get("creator_message")
+
+        # Update participant status to confirmed
+        update_data = {
+            "status": "confirmed",
+            "response_text": message,
+            "updated_at": now.isoformat(),
+        }
+        await self.db_service.update_event_participant(
+            self.context.event_id,
+            phone_number,
+            update_data
+        )
+        if self.context.participants:
+            self.context.participants[phone_number].update(update_data)
+
+        return {
+            "message": message,
+            "from_number": phone_number,
+            "creator_message": creator_message
+        }
 
     async def handle_chat_request(self, request: dict) -> dict:
         """Handle a chat request from the user.
@@ -1614,6 +1746,7 @@ class OpenRouterService:
             request: Dictionary containing:
                 - request: The user's message
                 - creator_id: ID of the user making the request
+                - stream: Optional flag to stream progress over the user's WebSocket
                 
         Returns:
             Dictionary containing the response
@@ -1622,6 +1755,7 @@ class OpenRouterService:
             print("starting handle_chat_request")
             message = request.get("request")
             creator_id = request.get("creator_id")
+            stream = bool(request.get("stream", False))
             
             if not creator_id or not message:
                 print("creator_id and request are required")
@@ -1631,6 +1765,10 @@ class OpenRouterService:
             chat_session = await self.db_service.get_or_create_chat_session(creator_id)
             print("chat_session", chat_session)
             
+            # Earlier turns (rolling summary plus the most recent messages), read before
+            # this message is added so it isn't sent twice
+            history = await self.chat_memory_service.build_context(chat_session["id"])
+
             # Add user message to session
             await self.db_service.extend_chat_session_message(
                 chat_session["id"],
@@ -1639,8 +1777,21 @@ class OpenRouterService:
             print("added user message to session")
             
             # Run the agent loop with the message
-            result = await self.run_agent_loop(message, creator_id)
+            result = await self.run_agent_loop(message, creator_id, stream=stream, history=history)
             print("response", result)
+            if stream:
+                await send_event(creator_id, {"type": "chat_done", "success": result["success"]})
+
+            # Keep the assistant's side of the conversation so later turns remember it
+            replies = [
+                {"role": "assistant", "content": call["arguments"]["message"]}
+                for call in result.get("tool_call_history", [])
+                if call["name"] == "send_chat_message_to_user" and call["arguments"].get("message")
+            ]
+            if result.get("final_response"):
+                replies.append({"role": "assistant", "content": result["final_response"]})
+            await self.db_service.extend_chat_session_message(chat_session["id"], replies)
+            self.chat_memory_service.schedule_update(chat_session["id"])
             
             return {
                 "success": True,
@@ -0,0 +1,181 @@
+"""Deterministic slot finding over participants' busy and available times."""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+DEFAULT_DURATION_MINUTES = 60
+DEFAULT_SEARCH_DAYS = 7
+DEFAULT_TOP_K = 3
+# Candidate start times are aligned to this grid
+SLOT_ALIGNMENT_MINUTES = 30
+
+Interval = tuple[datetime, datetime]
+
+@dataclass
+class CandidateSlot:
+    """A meeting time and who is free for all of it."""
+    start: datetime
+    end: datetime
+    available: list[str]
+    unavailable: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "start_time": self.start.isoformat(),
+            "end_time": self.end.isoformat(),
+            "available": self.available,
+            "unavailable": self.unavailable,
+            "everyone_available": not self.unavailable
+        }
+
+def parse_time(value) -> datetime:
+    """Parse an ISO string or datetime; naive values are taken as server local time."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return value
+
+def merge_intervals(intervals: list[Interval]) -> list[Interval]:
+    """Sort and merge overlapping or touching intervals."""
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def subtract_intervals(base: list[Interval], remove: list[Interval]) -> list[Interval]:
+    """Subtract merged intervals from merged intervals in one linear pass."""
+    result: list[Interval] = []
+    i = 0
+    for start, end in base:
+        while i < len(remove) and remove[i][1] <= start:
+            i += 1
+        j = i
+        cursor = start
+        while j < len(remove) and remove[j][0] < end:
+            if remove[j][0] > cursor:
+                result.append((cursor, remove[j][0]))
+            cursor = max(cursor, remove[j][1])
+            j += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+def _slot_intervals(slots: list[dict], window: Interval, slot_type: Optional[str] = None) -> list[Interval]:
+    intervals = []
+    for slot in slots:
+        if slot_type and slot.get("slot_type", "busy") != slot_type:
+            continue
+        try:
+            start, end = parse_time(slot["start_time"]), parse_time(slot["end_time"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        start, end = max(start, window[0]), min(end, window[1])
+        if start < end:
+            intervals.append((start, end))
+    return merge_intervals(intervals)
+
+def free_intervals(slots: list[dict], window: Interval) -> list[Interval]:
+    """Free time for one participant within the window.
+
+    Slots marked "available" bound the free time when present, even if none of them
+    fall in the window; otherwise the whole window is assumed free. Busy slots (the
+    default slot_type) are then removed.
+    """
+    declared = any(slot.get("slot_type", "busy") == "available" for slot in slots)
+    available = _slot_intervals(slots, window, "available") if declared else [window]
+    busy = _slot_intervals(slots, window, "busy")
+    return subtract_intervals(available, busy)
+
+def align_slot_start(value: datetime) -> datetime:
+    """Round up to the next SLOT_ALIGNMENT_MINUTES boundary."""
+    step = timedelta(minutes=SLOT_ALIGNMENT_MINUTES)
+    floor = value.replace(second=0, microsecond=0)
+    floor -= timedelta(minutes=floor.minute % SLOT_ALIGNMENT_MINUTES)
+    return floor if floor == value else floor + step
+
+def find_candidate_slots(
+    participant_slots: dict[str, list[dict]],
+    window_start: datetime = None,
+    window_end: datetime = None,
+    duration_minutes: int = DEFAULT_DURATION_MINUTES,
+    top_k: int = DEFAULT_TOP_K
+) -> list[CandidateSlot]:
+    """Rank meeting slots by how many participants are free, earliest first on ties.
+
+    Sweeps the start/end points of every participant's free intervals once
+    (O(n log n) in the total number of intervals) to find the stretches where the
+    set of free participants is constant, then returns up to top_k slots of the
+    requested duration from the best stretches.
+
+    Args:
+        participant_slots: Participant key (name, id or phone number) -> busy/available slots
+        window_start: Earliest start, defaults to now
+        window_end: Latest end, defaults to DEFAULT_SEARCH_DAYS after window_start
+        duration_minutes: Length of the meeting
+        top_k: Number of candidates to return
+    """
+    window_start = align_slot_start(parse_time(window_start or datetime.now()))
+    window_end = parse_time(window_end) if window_end else window_start + timedelta(days=DEFAULT_SEARCH_DAYS)
+    duration = timedelta(minutes=duration_minutes)
+    if window_end - window_start < duration or not participant_slots:
+        return []
+
+    points = []
+    for key, slots in participant_slots.items():
+        for start, end in free_intervals(slots or [], (window_start, window_end)):
+            # Ends sort before starts at the same instant so touching intervals don't overlap
+            points.append((start, 1, key))
+            points.append((end, 0, key))
+    points.sort(key=lambda p: (p[0], p[1]))
+
+    # Stretches with a constant set of free participants, adjacent equal sets merged
+    stretches: list[tuple[datetime, datetime, frozenset]] = []
+    free: set[str] = set()
+    for i, (time, is_start, key) in enumerate(points):
+        if is_start:
+            free.add(key)
+        else:
+            free.discard(key)
+        next_time = points[i + 1][0] if i + 1 < len(points) else None
+        if not free or next_time is None or next_time == time:
+            continue
+        current = frozenset(free)
+        if stretches and stretches[-1][1] == time and stretches[-1][2] == current:
+            stretches[-1] = (stretches[-1][0], next_time, current)
+        else:
+            stretches.append((time, next_time, current))
+
+    everyone = sorted(participant_slots)
+    candidates = []
+    for i, (start, end, members) in enumerate(stretches):
+        # A slot may run on into following stretches where the same people are still free
+        j = i
+        while j + 1 < len(stretches) and stretches[j + 1][0] == stretches[j][1] and members <= stretches[j + 1][2]:
+            j += 1
+        slot_start = align_slot_start(start)
+        # Several back-to-back options from a long stretch, at most top_k of them
+        for _ in range(top_k):
+            if slot_start >= end or slot_start + duration > stretches[j][1]:
+                break
+            candidates.append((-len(members), slot_start, members))
+            slot_start += duration
+
+    # Best first, skipping options that overlap one already chosen
+    chosen = []
+    for _, slot_start, members in sorted(candidates, key=lambda c: (c[0], c[1])):
+        if any(abs(slot_start - c.start) < duration for c in chosen):
+            continue
+        chosen.append(CandidateSlot(
+            start=slot_start,
+            end=slot_start + duration,
+            available=sorted(members),
+            unavailable=[key for key in everyone if key not in members]
+        ))
+        if len(chosen) == top_k:
+            break
+    return chosen
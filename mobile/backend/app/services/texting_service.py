@@ -1,9 +1,11 @@
 import aiohttp
 import logging
 from typing import Optional
+from fastapi import HTTPException
 
 from app.core.config import settings
 from app.services.database_service import DatabaseService
+from app.services.inbound_queue_service import InboundQueueService
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,8 @@ class TextingService:
 
         self.db_service = db_service
         self.openrouter_service = openrouter_service
+        # Replies are persisted by the webhook and processed by the queue's workers
+        self.inbound_queue = InboundQueueService(db_service, self._process_reply)
 
     async def send_text( self, to_number: str, message: str, final: bool = False ) -> dict:
 
@@ -46,14 +50,29 @@ class TextingService:
 
         if self.db_service and self.openrouter_service:
             try:
-                return await self.openrouter_service.handle_inbound_message(from_number, reply)
+                # Acknowledge as soon as the text is stored; the agent runs on a queue worker
+                queued = await self.inbound_queue.enqueue(request, from_number, reply)
+                return {"message": reply, "from_number": from_number, **queued}
             except Exception as e:
                 logger.error(f"Error in handle_text_reply → {e}")
-                return {"message": reply, "from_number": from_number}
+                # Not stored: fail the webhook so the provider retries; the idempotency key
+                # keeps a retry from queueing the text twice
+                raise HTTPException(status_code=503, detail="Could not queue inbound message")
 
         # Fallback: just echo back
         return {"message": reply, "from_number": from_number}
 
+    async def _process_reply(self, from_number: str, reply: str) -> None:
+        await self.openrouter_service.handle_inbound_message(from_number, reply)
+
+    def start(self) -> None:
+        """Start the inbound reply workers."""
+        self.inbound_queue.start()
+
+    async def close(self) -> None:
+        """Stop inbound reply workers at shutdown."""
+        await self.inbound_queue.close()
+
 
     async def send_test_text(self, to_number: str, message: str) -> dict:
         url = "https://textbelt.com/text"
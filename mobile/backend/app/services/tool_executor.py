@@ -0,0 +1,123 @@
+"""Execution of the tool calls returned by the agent in a single step."""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tools with no side effects on other calls in the same step, apart from calls that
+# touch the same participant or conversation (see ORDERING_KEYS). Any tool not listed
+# here is a barrier: it runs alone, after everything before it and before everything after.
+INDEPENDENT_TOOLS = {
+    "search_contacts",
+    "search_contacts_batch",
+    "check_user_registration",
+    "create_event_participant",
+    "create_or_get_conversation",
+    "handle_confirmation",
+    "send_text",
+    "get_google_calendar_busy_times",
+    "get_creator_google_calendar_busy_times",
+    "create_unregistered_time_slots",
+    "create_final_time_slots",
+    "get_event_availabilities",
+}
+
+# Tool arguments identifying the participant/conversation a call touches. Independent
+# calls sharing any of these values run one after another, in call order.
+ORDERING_KEYS = ("phone_number", "user_id")
+
+@dataclass
+class ToolCallResult:
+    """Outcome of one tool call, kept in the position the model issued it."""
+    id: str
+    name: str
+    arguments: dict
+    result: Any = None
+    error: Optional[Exception] = None
+
+    def to_tool_message(self) -> dict:
+        """Format as the tool message answering this call."""
+        content = f"Error executing {self.name}: {str(self.error)}" if self.error else json.dumps(self.result, default=str)
+        return {"role": "tool", "tool_call_id": self.id, "content": content}
+
+class ToolExecutor:
+    """Runs a step's tool calls, overlapping the independent ones with asyncio.gather."""
+
+    def __init__(self, tool_mappings: dict[str, Callable[..., Awaitable[Any]]], independent_tools: set[str] = INDEPENDENT_TOOLS):
+        self.tool_mappings = tool_mappings
+        self.independent_tools = independent_tools
+
+    async def run(
+        self,
+        tool_calls: list,
+        on_event: Optional[Callable[[str, str], Awaitable[Any]]] = None
+    ) -> list[ToolCallResult]:
+        """Execute tool calls and return their results in the original call order.
+
+        Args:
+            tool_calls: Tool calls from the model response (objects with id and function.name/arguments)
+            on_event: Optional callback receiving (status, tool_name) as calls start and finish
+        """
+        results = []
+        for tool_call in tool_calls:
+            try:
+                arguments = json.loads(tool_call.function.arguments or "{}")
+            except json.JSONDecodeError as e:
+                results.append(ToolCallResult(tool_call.id, tool_call.function.name, {}, error=e))
+                continue
+            results.append(ToolCallResult(tool_call.id, tool_call.function.name, arguments))
+
+        batch = []
+        for result in results:
+            if result.error:
+                continue
+            if result.name in self.independent_tools:
+                batch.append(result)
+                continue
+            # Barrier: drain everything queued so far, then run this call on its own
+            await self._run_batch(batch, on_event)
+            batch = []
+            await self._execute(result, on_event)
+        await self._run_batch(batch, on_event)
+        return results
+
+    async def _run_batch(self, batch: list[ToolCallResult], on_event) -> None:
+        # Chain calls that share a participant/conversation key; chains run concurrently
+        chains: list[tuple[set, list[ToolCallResult]]] = []
+        position = {id(result): i for i, result in enumerate(batch)}
+        for result in batch:
+            keys = {result.arguments[k] for k in ORDERING_KEYS if result.arguments.get(k)}
+            related = [chain for chain in chains if chain[0] & keys]
+            merged_keys, merged_calls = set(keys), [result]
+            for chain in related:
+                chains.remove(chain)
+                merged_keys |= chain[0]
+                merged_calls.extend(chain[1])
+            merged_calls.sort(key=lambda call: position[id(call)])
+            chains.append((merged_keys, merged_calls))
+
+        async def run_chain(calls: list[ToolCallResult]) -> None:
+            for call in calls:
+                await self._execute(call, on_event)
+
+        await asyncio.gather(*(run_chain(calls) for _, calls in chains))
+
+    async def _execute(self, call: ToolCallResult, on_event) -> None:
+        tool = self.tool_mappings.get(call.name)
+        if tool is None:
+            call.error = RuntimeError(f"Unknown tool: {call.name}")
+            return
+        if on_event:
+            await on_event("started", call.name)
+        try:
+            logger.debug(f"Calling tool {call.name} with {call.arguments}")
+            call.result = await tool(**call.arguments)
+            logger.debug(f"Tool {call.name} returned {call.result}")
+        except Exception as e:
+            logger.error(f"Error executing tool {call.name}: {str(e)}")
+            call.error = e
+        if on_event:
+            await on_event("failed" if call.error else "completed", call.name)
@@ -82,6 +82,31 @@ SEARCH_CONTACTS_TOOL = {
     }
 }
 
+SEARCH_CONTACTS_BATCH_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "search_contacts_batch",
+        "description": "Search for several contacts at once by name or phone number. Use this instead of multiple search_contacts calls when more than one person is mentioned. Returns the matching contacts grouped by query.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "queries": {
+                    "type": "array",
+                    "description": "One name or phone number per person to find",
+                    "items": {
+                        "type": "string"
+                    }
+                },
+                "limit_per_query": {
+                    "type": "integer",
+                    "description": "Maximum number of contacts to return for each query (default 5)"
+                }
+            },
+            "required": ["queries"]
+        }
+    }
+}
+
 GET_GOOGLE_CALENDAR_BUSY_TIMES_TOOL = {
     "type": "function",
     "function": {
@@ -482,7 +507,7 @@ GET_EVENT_AVAILABILITIES_TOOL = {
     "type": "function",
     "function": {
         "name": "get_event_availabilities",
-        "description": "Get the availabilities of all participants for an event",
+        "description": "Get the best candidate times for an event, ranked by how many participants are available",
         "parameters": {
             "type": "object", 
             "properties": {
@@ -525,6 +550,7 @@ AVAILABLE_TOOLS = [
     SEND_CHAT_MESSAGE_TO_USER_TOOL,
     GET_EVENT_AVAILABILITIES_TOOL,
     STOP_LOOP_TOOL,
+    SEARCH_CONTACTS_BATCH_TOOL,
 ]
 
 # Dictionary mapping tool names to their indices in AVAILABLE_TOOLS
@@ -546,4 +572,5 @@ TOOL_INDICES = {
     "send_chat_message_to_user": 14,
     "get_event_availabilities": 15,
     "stop_loop": 16,
+    "search_contacts_batch": 17,
 } 
\ No newline at end of file
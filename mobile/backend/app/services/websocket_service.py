@@ -20,4 +20,20 @@ async def send_chat_message(user_id: str, message: str):
             logger.warning(f"No active WebSocket connection for user {user_id}")
     except Exception as e:
         logger.error(f"Error sending chat message to user {user_id}: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+async def send_event(user_id: str, event: dict) -> bool:
+    """Push a streaming event (token delta, tool progress, ...) to a user's WebSocket.
+
+    Unlike send_chat_message this never raises: a missing or broken connection
+    must not interrupt the agent run that is producing the events.
+    """
+    websocket = active_connections.get(user_id)
+    if websocket is None:
+        return False
+    try:
+        await websocket.send_json(event)
+        return True
+    except Exception as e:
+        logger.warning(f"Dropping {event.get('type')} event for user {user_id}: {str(e)}")
+        return False
@@ -0,0 +1,72 @@
+"""Group availability benchmark: the interval sweep vs the NumPy bitmap.
+
+Generates synthetic busy/available slots for groups of 10, 100 and 1,000
+participants over a multi-week window and times
+  - candidate search: the interval sweep vs the availability bitmap, end to end
+  - the bitmap's two phases: building it and ranking candidates on it
+No database or network access is needed.
+
+Usage (from mobile/backend):
+    python -m benchmarks.bench_availability_bitmap --days 21 --slots 40
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.services.availability_bitmap import AvailabilityBitmap, find_candidate_slots_bitmap
+from app.services.scheduling_engine import find_candidate_slots
+
+GROUP_SIZES = (10, 100, 1000)
+
+
+def make_slots(participants: int, slots_per_participant: int, window_start: datetime, days: int) -> dict[str, list[dict]]:
+    rng = random.Random(participants)
+    group = {}
+    for p in range(participants):
+        slots = []
+        for _ in range(slots_per_participant):
+            start = window_start + timedelta(minutes=15 * rng.randrange(days * 96))
+            end = start + timedelta(minutes=15 * rng.randint(2, 12))
+            slots.append({
+                "start_time": start.isoformat(),
+                "end_time": end.isoformat(),
+                "slot_type": "available" if rng.random() < 0.1 else "busy"
+            })
+        group[f"participant-{p}"] = slots
+    return group
+
+
+def timed(fn, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=21, help="Length of the scheduling window")
+    parser.add_argument("--slots", type=int, default=40, help="Slots per participant")
+    args = parser.parse_args()
+
+    window_start = datetime.now().astimezone().replace(minute=0, second=0, microsecond=0)
+    window_end = window_start + timedelta(days=args.days)
+
+    print(
+        f"{'participants':>12} | {'sweep':>8} | {'bitmap':>8} | {'build':>8} | {'rank':>8}"
+    )
+    for size in GROUP_SIZES:
+        group = make_slots(size, args.slots, window_start, args.days)
+        sweep = timed(find_candidate_slots, group, window_start, window_end)
+        bitmap = timed(find_candidate_slots_bitmap, group, window_start, window_end)
+        build = timed(AvailabilityBitmap.from_slots, group, window_start, window_end)
+        prebuilt = AvailabilityBitmap.from_slots(group, window_start, window_end)
+        rank = timed(prebuilt.find_candidate_slots)
+        print(
+            f"{size:>12} | {sweep * 1000:>6.1f}ms | {bitmap * 1000:>6.1f}ms | "
+            f"{build * 1000:>6.1f}ms | {rank * 1000:>6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Concurrent throughput benchmark for the DatabaseService data layer.
+
+Compares the previous blocking supabase-py path (a sync `execute()` inside a
+coroutine) against the pooled async PostgREST client, issuing the same
+`get_user_by_id` lookup from many concurrent tasks.
+
+Usage (from mobile/backend, with the usual .env in place):
+    python -m benchmarks.bench_database_concurrency --user-id <uuid> --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+from supabase import create_client
+
+from app.core.config import settings
+from app.services.database_service import DatabaseService
+
+
+async def run_blocking(user_id: str, requests: int, concurrency: int) -> float:
+    # Mirrors the old DatabaseService: sync client called from async code
+    client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup():
+        async with semaphore:
+            client.table("users").select("*").eq("id", user_id).execute()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(lookup() for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+async def run_async(user_id: str, requests: int, concurrency: int) -> float:
+    db_service = DatabaseService()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup():
+        async with semaphore:
+            await db_service.get_user_by_id(user_id)
+
+    try:
+        # Warm the pool so the first handshake isn't measured
+        await db_service.get_user_by_id(user_id)
+        start = time.perf_counter()
+        await asyncio.gather(*(lookup() for _ in range(requests)))
+        return time.perf_counter() - start
+    finally:
+        await db_service.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", required=True, help="ID of an existing user row to look up")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    for label, runner in (("blocking (before)", run_blocking), ("async pooled (after)", run_async)):
+        elapsed = await runner(args.user_id, args.requests, args.concurrency)
+        print(f"{label:>22}: {args.requests} requests in {elapsed:.2f}s -> {args.requests / elapsed:.1f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
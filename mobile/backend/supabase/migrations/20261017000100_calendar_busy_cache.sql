@@ -0,0 +1,23 @@
+-- Per-calendar sync state for Google Calendar incremental sync
+create table if not exists calendar_sync_state (
+    user_id uuid not null references users(id) on delete cascade,
+    calendar_id text not null,
+    sync_token text,
+    covered_from timestamptz not null,
+    synced_at timestamptz not null default now(),
+    expires_at timestamptz not null,
+    primary key (user_id, calendar_id)
+);
+
+-- Cached busy intervals, one row per opaque event
+create table if not exists calendar_busy_intervals (
+    user_id uuid not null references users(id) on delete cascade,
+    calendar_id text not null,
+    event_id text not null,
+    start_time timestamptz not null,
+    end_time timestamptz not null,
+    primary key (user_id, calendar_id, event_id)
+);
+
+create index if not exists calendar_busy_intervals_user_range_idx
+    on calendar_busy_intervals (user_id, start_time, end_time);
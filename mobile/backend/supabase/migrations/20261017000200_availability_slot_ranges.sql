@@ -0,0 +1,94 @@
+-- Normalized, range-indexed copy of the slots stored as JSON arrays on
+-- availability.busy_slots and unregistered_time_slots.time_slots, so range
+-- queries only return overlapping slots.
+create extension if not exists btree_gist;
+
+create table if not exists availability_slot_ranges (
+    event_id uuid not null,
+    -- participant_id for registered users, phone_number otherwise
+    owner_key text not null,
+    source_table text not null check (source_table in ('availability', 'unregistered_time_slots')),
+    slot jsonb not null,
+    time_range tstzrange not null
+);
+
+create index if not exists availability_slot_ranges_lookup_idx
+    on availability_slot_ranges using gist (event_id, source_table, owner_key, time_range);
+
+create or replace function sync_availability_slot_ranges() returns trigger
+language plpgsql as $$
+declare
+    slots jsonb;
+    key text;
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        delete from availability_slot_ranges
+        where event_id = old.event_id
+          and source_table = tg_table_name
+          and owner_key = case when tg_table_name = 'availability'
+                               then old.participant_id::text else old.phone_number end;
+    end if;
+    if tg_op = 'DELETE' then
+        return old;
+    end if;
+
+    if tg_table_name = 'availability' then
+        slots := new.busy_slots;
+        key := new.participant_id::text;
+    else
+        slots := new.time_slots;
+        key := new.phone_number;
+    end if;
+
+    insert into availability_slot_ranges (event_id, owner_key, source_table, slot, time_range)
+    select new.event_id, key, tg_table_name, s,
+           tstzrange((s->>'start_time')::timestamptz, (s->>'end_time')::timestamptz, '[]')
+    from jsonb_array_elements(coalesce(slots, '[]'::jsonb)) as s
+    where s ? 'start_time' and s ? 'end_time'
+      and (s->>'end_time')::timestamptz >= (s->>'start_time')::timestamptz;
+    return new;
+end;
+$$;
+
+drop trigger if exists availability_slot_ranges_sync on availability;
+create trigger availability_slot_ranges_sync
+    after insert or update or delete on availability
+    for each row execute function sync_availability_slot_ranges();
+
+drop trigger if exists unregistered_slot_ranges_sync on unregistered_time_slots;
+create trigger unregistered_slot_ranges_sync
+    after insert or update or delete on unregistered_time_slots
+    for each row execute function sync_availability_slot_ranges();
+
+-- Backfill existing rows
+truncate availability_slot_ranges;
+insert into availability_slot_ranges (event_id, owner_key, source_table, slot, time_range)
+select a.event_id, a.participant_id::text, 'availability', s,
+       tstzrange((s->>'start_time')::timestamptz, (s->>'end_time')::timestamptz, '[]')
+from availability a, jsonb_array_elements(coalesce(a.busy_slots, '[]'::jsonb)) as s
+where s ? 'start_time' and s ? 'end_time'
+  and (s->>'end_time')::timestamptz >= (s->>'start_time')::timestamptz;
+insert into availability_slot_ranges (event_id, owner_key, source_table, slot, time_range)
+select u.event_id, u.phone_number, 'unregistered_time_slots', s,
+       tstzrange((s->>'start_time')::timestamptz, (s->>'end_time')::timestamptz, '[]')
+from unregistered_time_slots u, jsonb_array_elements(coalesce(u.time_slots, '[]'::jsonb)) as s
+where s ? 'start_time' and s ? 'end_time'
+  and (s->>'end_time')::timestamptz >= (s->>'start_time')::timestamptz;
+
+-- Slots of the given owners overlapping [p_start, p_end], inclusive like the old Python filter
+create or replace function get_availability_slots_in_range(
+    p_event_id uuid,
+    p_source_table text,
+    p_owner_keys text[],
+    p_start timestamptz,
+    p_end timestamptz
+) returns table (owner_key text, slot jsonb)
+language sql stable as $$
+    select r.owner_key, r.slot
+    from availability_slot_ranges r
+    where r.event_id = p_event_id
+      and r.source_table = p_source_table
+      and r.owner_key = any(p_owner_keys)
+      and r.time_range && tstzrange(p_start, p_end, '[]')
+    order by r.owner_key, lower(r.time_range);
+$$;
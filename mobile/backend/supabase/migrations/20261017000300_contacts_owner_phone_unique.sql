@@ -0,0 +1,3 @@
+-- Conflict target for bulk contact upserts
+create unique index if not exists contacts_owner_phone_number_key
+    on contacts (owner_id, phone_number);
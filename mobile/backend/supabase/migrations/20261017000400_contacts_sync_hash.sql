@@ -0,0 +1,5 @@
+-- Per-contact hash of the device record, used by the delta sync handshake
+alter table contacts add column if not exists sync_hash text;
+
+create index if not exists contacts_owner_device_contact_idx
+    on contacts (owner_id, device_contact_id);
@@ -0,0 +1,50 @@
+-- Indexed contact search: trigram similarity on names, suffix match on phone digits
+create extension if not exists pg_trgm;
+create extension if not exists btree_gin;
+
+alter table contacts add column if not exists phone_digits_reversed text
+    generated always as (reverse(regexp_replace(coalesce(phone_number, ''), '[^0-9]', '', 'g'))) stored;
+
+create index if not exists contacts_owner_name_trgm_idx
+    on contacts using gin (owner_id, lower(name) gin_trgm_ops);
+
+create index if not exists contacts_owner_phone_suffix_idx
+    on contacts (owner_id, phone_digits_reversed);
+
+-- Ranked search over one owner's contacts. A query with 3+ digits matches phone
+-- numbers ending in those digits; names match on trigram (word) similarity.
+create or replace function search_contacts_ranked(
+    p_owner_id uuid,
+    p_query text default null,
+    p_min_relationship_score double precision default null,
+    p_limit integer default 15
+) returns table (contact jsonb, similarity real)
+language sql stable as $$
+    with q as (
+        select lower(coalesce(p_query, '')) as name_q,
+               reverse(regexp_replace(coalesce(p_query, ''), '[^0-9]', '', 'g')) as digits_r
+    )
+    select to_jsonb(c) - 'phone_digits_reversed' as contact,
+           greatest(
+               case when length(q.digits_r) >= 3
+                         and c.phone_digits_reversed >= q.digits_r
+                         and c.phone_digits_reversed < q.digits_r || ':'
+                    then 1.0 else 0.0 end,
+               case when q.name_q = '' then 0.0
+                    else greatest(similarity(lower(c.name), q.name_q), word_similarity(q.name_q, lower(c.name))) end
+           )::real as similarity
+    from contacts c, q
+    where c.owner_id = p_owner_id
+      and (p_min_relationship_score is null or c.relationship_score >= p_min_relationship_score)
+      and (
+          q.name_q = ''
+          -- ':' sorts right after '9', so this range is "starts with digits_r"
+          or (length(q.digits_r) >= 3
+              and c.phone_digits_reversed >= q.digits_r
+              and c.phone_digits_reversed < q.digits_r || ':')
+          or lower(c.name) % q.name_q
+          or q.name_q <% lower(c.name)
+      )
+    order by similarity desc, c.relationship_score desc nulls last
+    limit p_limit;
+$$;
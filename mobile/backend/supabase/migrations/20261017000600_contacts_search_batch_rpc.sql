@@ -0,0 +1,12 @@
+-- Several contact searches in one round trip, ranked per query
+create or replace function search_contacts_ranked_batch(
+    p_owner_id uuid,
+    p_queries text[],
+    p_limit_per_query integer default 5
+) returns table (query text, contact jsonb, similarity real)
+language sql stable as $$
+    select q.query, r.contact, r.similarity
+    from unnest(p_queries) with ordinality as q(query, position)
+    cross join lateral search_contacts_ranked(p_owner_id, q.query, null, p_limit_per_query) as r
+    order by q.position, r.similarity desc;
+$$;
@@ -0,0 +1,33 @@
+-- Append-only message history for chat sessions and SMS conversations.
+-- Replaces read-modify-write of the messages JSON arrays, which grew with
+-- history and lost updates under concurrent writers.
+create table if not exists messages (
+    seq bigint generated always as identity primary key,
+    session_type text not null check (session_type in ('chat_session', 'conversation')),
+    session_id uuid not null,
+    message jsonb not null,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists messages_session_seq_idx
+    on messages (session_type, session_id, seq);
+
+-- Backfill from the legacy JSON arrays, preserving order. Sessions that already
+-- have rows are skipped, so rerunning the migration doesn't duplicate history.
+insert into messages (session_type, session_id, message)
+select 'chat_session', s.id, m.message
+from chat_sessions s,
+     jsonb_array_elements(coalesce(s.messages::jsonb, '[]'::jsonb)) with ordinality as m(message, position)
+where not exists (
+    select 1 from messages x where x.session_type = 'chat_session' and x.session_id = s.id
+)
+order by s.id, m.position;
+
+insert into messages (session_type, session_id, message)
+select 'conversation', c.id, m.message
+from conversations c,
+     jsonb_array_elements(coalesce(c.messages::jsonb, '[]'::jsonb)) with ordinality as m(message, position)
+where not exists (
+    select 1 from messages x where x.session_type = 'conversation' and x.session_id = c.id
+)
+order by c.id, m.position;
@@ -0,0 +1,6 @@
+-- Rolling summary of chat session messages that have aged out of the verbatim
+-- window passed to the agent. summarized_through_seq is the last messages.seq
+-- folded into the summary, so each update only reads newer messages.
+alter table chat_sessions
+    add column if not exists summary text,
+    add column if not exists summarized_through_seq bigint not null default 0;
@@ -0,0 +1,76 @@
+-- Durable queue for inbound SMS. The /text/reply webhook only inserts here and
+-- acknowledges; workers claim and process rows. idempotency_key dedupes provider
+-- retries of the same message.
+create table if not exists inbound_messages (
+    id bigint generated always as identity primary key,
+    idempotency_key text not null unique,
+    phone_number text not null,
+    body text not null default '',
+    payload jsonb not null default '{}'::jsonb,
+    status text not null default 'pending'
+        check (status in ('pending', 'processing', 'done', 'failed')),
+    event_key text,  -- event the message was routed to when claimed
+    attempts integer not null default 0,
+    last_error text,
+    locked_at timestamptz,
+    created_at timestamptz not null default now(),
+    processed_at timestamptz
+);
+
+create index if not exists inbound_messages_open_idx
+    on inbound_messages (status, id) where status in ('pending', 'processing');
+
+-- Claim up to p_limit messages, at most one per event and none for an event that
+-- already has a message in flight, so each event's messages are processed in order
+-- across every worker process. Messages stuck in processing for longer than
+-- p_stale_seconds (a crashed worker) are claimed again.
+create or replace function claim_inbound_messages(
+    p_limit integer default 8,
+    p_stale_seconds integer default 300
+) returns setof inbound_messages
+language plpgsql as $$
+begin
+    -- Claims are short; serializing them keeps two workers from taking the same event
+    perform pg_advisory_xact_lock(hashtext('claim_inbound_messages'));
+
+    return query
+    with candidates as (
+        select m.id,
+               coalesce(
+                   (select c.event_id::text
+                    from conversations c
+                    where c.phone_number = m.phone_number
+                      and c.status in ('active', 'pending')
+                    limit 1),
+                   'phone:' || m.phone_number
+               ) as event_key
+        from inbound_messages m
+        where m.status = 'pending'
+           or (m.status = 'processing' and m.locked_at < now() - make_interval(secs => p_stale_seconds))
+    ),
+    busy as (
+        select distinct m.event_key
+        from inbound_messages m
+        where m.status = 'processing'
+          and m.locked_at >= now() - make_interval(secs => p_stale_seconds)
+          and m.event_key is not null
+    ),
+    heads as (
+        select distinct on (o.event_key) o.id, o.event_key
+        from candidates o
+        where o.event_key not in (select event_key from busy)
+        order by o.event_key, o.id
+    ),
+    picked as (
+        select h.id, h.event_key from heads h order by h.id limit p_limit
+    )
+    update inbound_messages m
+    set status = 'processing',
+        event_key = p.event_key,
+        locked_at = now(),
+        attempts = m.attempts + 1
+    from picked p
+    where m.id = p.id
+    returning m.*;
+end;
+$$;
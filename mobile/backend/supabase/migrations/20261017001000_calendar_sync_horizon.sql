@@ -0,0 +1,4 @@
+-- Upper bound of a calendar's cached window; full syncs stop at a horizon instead of
+-- expanding open-ended recurring events indefinitely. Existing rows have no bound and
+-- are rebuilt on their next lookup.
+alter table calendar_sync_state add column if not exists covered_to timestamptz;
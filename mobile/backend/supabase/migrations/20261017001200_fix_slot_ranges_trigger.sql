@@ -0,0 +1,43 @@
+-- sync_availability_slot_ranges is shared by availability and unregistered_time_slots,
+-- and each table lacks one of participant_id / phone_number. PL/pgSQL resolves every
+-- field reference in an expression against the row's actual type, so the previous
+-- single case expression failed with "record old has no field ..." on every UPDATE
+-- and DELETE. Each table's fields are now read only in its own branch.
+create or replace function sync_availability_slot_ranges() returns trigger
+language plpgsql as $$
+declare
+    slots jsonb;
+    key text;
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        if tg_table_name = 'availability' then
+            key := old.participant_id::text;
+        else
+            key := old.phone_number;
+        end if;
+        delete from availability_slot_ranges
+        where event_id = old.event_id
+          and source_table = tg_table_name
+          and owner_key = key;
+    end if;
+    if tg_op = 'DELETE' then
+        return old;
+    end if;
+
+    if tg_table_name = 'availability' then
+        slots := new.busy_slots;
+        key := new.participant_id::text;
+    else
+        slots := new.time_slots;
+        key := new.phone_number;
+    end if;
+
+    insert into availability_slot_ranges (event_id, owner_key, source_table, slot, time_range)
+    select new.event_id, key, tg_table_name, s,
+           tstzrange((s->>'start_time')::timestamptz, (s->>'end_time')::timestamptz, '[]')
+    from jsonb_array_elements(coalesce(slots, '[]'::jsonb)) as s
+    where s ? 'start_time' and s ? 'end_time'
+      and (s->>'end_time')::timestamptz >= (s->>'start_time')::timestamptz;
+    return new;
+end;
+$$;
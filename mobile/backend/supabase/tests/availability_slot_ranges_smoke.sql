@@ -0,0 +1,85 @@
+-- Smoke test for the availability_slot_ranges sync trigger.
+--
+-- Runs an insert, an upsert (on conflict do update) and a delete against both
+-- trigger tables and checks the ranges table after each, then rolls back.
+-- Temporary tables named like the real ones carry the trigger, so tg_table_name
+-- matches and the test doesn't depend on the rest of the schema.
+--
+-- Usage:
+--     psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f supabase/tests/availability_slot_ranges_smoke.sql
+begin;
+
+create temp table availability (
+    event_id uuid not null,
+    participant_id uuid not null,
+    busy_slots jsonb,
+    primary key (event_id, participant_id)
+);
+create temp table unregistered_time_slots (
+    event_id uuid not null,
+    phone_number text not null,
+    time_slots jsonb,
+    primary key (event_id, phone_number)
+);
+create trigger availability_slot_ranges_sync
+    after insert or update or delete on pg_temp.availability
+    for each row execute function sync_availability_slot_ranges();
+create trigger unregistered_slot_ranges_sync
+    after insert or update or delete on pg_temp.unregistered_time_slots
+    for each row execute function sync_availability_slot_ranges();
+
+create temp table smoke_ids as
+select '00000000-0000-0000-0000-00000000e001'::uuid as event_id,
+       '00000000-0000-0000-0000-00000000a001'::uuid as participant_id;
+
+create or replace function pg_temp.expect_ranges(p_source text, p_count integer) returns void
+language plpgsql as $$
+declare
+    actual integer;
+begin
+    select count(*) into actual
+    from availability_slot_ranges r, smoke_ids i
+    where r.event_id = i.event_id and r.source_table = p_source;
+    if actual <> p_count then
+        raise exception '% ranges for %: expected %', actual, p_source, p_count;
+    end if;
+end;
+$$;
+
+-- availability: insert, upsert, delete
+insert into pg_temp.availability
+select event_id, participant_id,
+       '[{"start_time": "2030-01-01T10:00:00Z", "end_time": "2030-01-01T11:00:00Z"}]'::jsonb
+from smoke_ids;
+select pg_temp.expect_ranges('availability', 1);
+
+insert into pg_temp.availability
+select event_id, participant_id,
+       '[{"start_time": "2030-01-01T12:00:00Z", "end_time": "2030-01-01T13:00:00Z"},
+         {"start_time": "2030-01-02T12:00:00Z", "end_time": "2030-01-02T13:00:00Z"}]'::jsonb
+from smoke_ids
+on conflict (event_id, participant_id) do update set busy_slots = excluded.busy_slots;
+select pg_temp.expect_ranges('availability', 2);
+
+delete from pg_temp.availability where event_id = (select event_id from smoke_ids);
+select pg_temp.expect_ranges('availability', 0);
+
+-- unregistered_time_slots: insert, upsert on (event_id, phone_number), delete
+insert into pg_temp.unregistered_time_slots
+select event_id, '+15555550100',
+       '[{"start_time": "2030-01-01T10:00:00Z", "end_time": "2030-01-01T11:00:00Z", "slot_type": "available"}]'::jsonb
+from smoke_ids;
+select pg_temp.expect_ranges('unregistered_time_slots', 1);
+
+insert into pg_temp.unregistered_time_slots
+select event_id, '+15555550100',
+       '[{"start_time": "2030-01-03T10:00:00Z", "end_time": "2030-01-03T11:00:00Z", "slot_type": "available"},
+         {"start_time": "2030-01-04T10:00:00Z", "end_time": "2030-01-04T11:00:00Z", "slot_type": "busy"}]'::jsonb
+from smoke_ids
+on conflict (event_id, phone_number) do update set time_slots = excluded.time_slots;
+select pg_temp.expect_ranges('unregistered_time_slots', 2);
+
+delete from pg_temp.unregistered_time_slots where event_id = (select event_id from smoke_ids);
+select pg_temp.expect_ranges('unregistered_time_slots', 0);
+
+rollback;
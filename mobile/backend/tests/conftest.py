@@ -0,0 +1,13 @@
+import os
+
+# Settings() requires these at import time; tests never reach the real services
+for name in (
+    "BACKEND_URL",
+    "OPENROUTER_API_KEY",
+    "GOOGLE_CLIENT_ID",
+    "GOOGLE_CLIENT_SECRET",
+    "SUPABASE_URL",
+    "SUPABASE_KEY",
+    "TEXTING_API_KEY",
+):
+    os.environ.setdefault(name, "http://localhost" if name.endswith("_URL") else "test")
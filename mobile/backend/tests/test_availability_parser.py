@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.availability_parser import parse_availability
+
+# A Monday morning
+NOW = datetime(2026, 10, 19, 9, 0, tzinfo=timezone.utc)
+
+
+def test_days_with_times():
+    assert parse_availability("free Tue after 6 or Thursday noon-2", NOW) == [
+        {"start_time": "2026-10-20T18:00:00+00:00", "end_time": "2026-10-20T23:00:00+00:00", "slot_type": "available"},
+        {"start_time": "2026-10-22T12:00:00+00:00", "end_time": "2026-10-22T14:00:00+00:00", "slot_type": "available"},
+    ]
+
+
+def test_range_ending_at_midnight():
+    assert parse_availability("free tue 10pm-12am", NOW) == [
+        {"start_time": "2026-10-20T22:00:00+00:00", "end_time": "2026-10-21T00:00:00+00:00", "slot_type": "available"},
+    ]
+
+
+@pytest.mark.parametrize("reply", ["free at midnight", "tue at midnight", "free after midnight", "free tue before 8am", "tue 5-5"])
+def test_empty_spans_are_not_parsed(reply):
+    assert parse_availability(reply, NOW) is None
+
+
+@pytest.mark.parametrize("reply", ["busy until 5 then free", "Tuesday busy"])
+def test_trailing_free_or_busy_falls_back(reply):
+    assert parse_availability(reply, NOW) is None
+
+
+def test_trailing_free_matching_the_reply_is_kept():
+    assert parse_availability("Thursday noon-2 works for me", NOW) == [
+        {"start_time": "2026-10-22T12:00:00+00:00", "end_time": "2026-10-22T14:00:00+00:00", "slot_type": "available"},
+    ]
+
+
+def test_unknown_words_fall_back():
+    assert parse_availability("free next tuesday after my dentist", NOW) is None
@@ -0,0 +1,62 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.services.calendar_cache_service import CalendarCacheService
+
+
+class FakeDatabase:
+    def __init__(self, state):
+        self.state = state
+        self.deleted = []
+        self.upserted = []
+
+    async def get_calendar_sync_states(self, user_id):
+        return [self.state]
+
+    async def delete_calendar_busy_intervals(self, user_id, calendar_id, event_ids):
+        self.deleted.extend(event_ids)
+
+    async def upsert_calendar_busy_intervals(self, user_id, calendar_id, intervals):
+        self.upserted.extend(i["id"] for i in intervals)
+
+    async def upsert_calendar_sync_state(self, *args):
+        return {}
+
+    async def get_calendar_busy_intervals(self, user_id, start_time, end_time):
+        return []
+
+
+class FakeGoogleCalendar:
+    def __init__(self, changes):
+        self.changes = changes
+
+    async def get_calendar_ids(self, access_token):
+        return ["primary"]
+
+    async def sync_events(self, access_token, calendar_id, sync_token=None, start_date=None, end_date=None):
+        assert sync_token, "expected an incremental sync"
+        return self.changes
+
+
+def test_event_moved_past_horizon_is_removed_from_cache():
+    now = datetime.now().astimezone()
+    covered_to = now + timedelta(days=30)
+    state = {
+        "calendar_id": "primary",
+        "sync_token": "token",
+        "synced_at": (now - timedelta(days=1)).isoformat(),
+        "expires_at": (now + timedelta(days=1)).isoformat(),
+        "covered_from": (now - timedelta(days=1)).isoformat(),
+        "covered_to": covered_to.isoformat(),
+    }
+    inside = {"id": "inside", "start": (now + timedelta(days=1)).isoformat(), "end": (now + timedelta(days=1, hours=1)).isoformat()}
+    moved = {"id": "moved", "start": (covered_to + timedelta(days=5)).isoformat(), "end": (covered_to + timedelta(days=5, hours=1)).isoformat()}
+    db = FakeDatabase(state)
+    google = FakeGoogleCalendar({"events": [inside, moved], "removed": ["cancelled"], "next_sync_token": "next"})
+
+    asyncio.run(CalendarCacheService(db, google).get_busy_intervals(
+        "user-1", "token", now.isoformat(), (now + timedelta(days=7)).isoformat()
+    ))
+
+    assert db.upserted == ["inside"]
+    assert sorted(db.deleted) == ["cancelled", "moved"]
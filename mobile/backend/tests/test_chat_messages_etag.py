@@ -0,0 +1,21 @@
+import pytest
+
+from app.api.routes.llm import if_none_match_matches
+
+ETAG = 'W/"session:None:50:42:50"'
+
+
+@pytest.mark.parametrize("header", [
+    ETAG,
+    '"session:None:50:42:50"',
+    '"other", W/"session:None:50:42:50"',
+    'W/"other",W/"session:None:50:42:50"',
+    "*",
+])
+def test_matches(header):
+    assert if_none_match_matches(header, ETAG)
+
+
+@pytest.mark.parametrize("header", [None, "", '"other"', 'W/"session:None:50:42:49"', "session:None:50:42:50"])
+def test_does_not_match(header):
+    assert not if_none_match_matches(header, ETAG)
@@ -0,0 +1,39 @@
+import pytest
+
+from app.services.confirmation_classifier import ConfirmationClassifier, classify_confirmation
+
+
+@pytest.mark.parametrize("reply", [
+    "Can't wait!",
+    "No problem",
+    "no worries",
+    "No doubt",
+    "im busy until 5 then free",
+    "no, I'd love to",
+    "nope, have work",
+    "I can't miss it!",
+    "I can't say no to that",
+    "not going to miss it",
+])
+def test_not_settled_by_rules(reply):
+    assert ConfirmationClassifier().resolve(reply) is None
+
+
+@pytest.mark.parametrize("reply", ["yes", "Yesss!", "Yes! Can't wait", "Yes see you then", "👍", "sounds good"])
+def test_confirmed(reply):
+    assert ConfirmationClassifier().resolve(reply) is True
+
+
+@pytest.mark.parametrize("reply", ["no", "Nope", "no thanks", "sorry, can't make it", "I can't, sorry!", "No I cant make it", "I cant make it unfortunately", "👎"])
+def test_declined(reply):
+    assert ConfirmationClassifier().resolve(reply) is False
+
+
+def test_single_word_negative_only_decisive_as_whole_reply():
+    assert classify_confirmation("busy").confirmed is False
+    assert classify_confirmation("busy that day sorry").confirmed is None
+
+
+def test_names_are_not_filler():
+    # "Joe" is someone being talked about, not a softener around "no"
+    assert classify_confirmation("no joe").confirmed is None
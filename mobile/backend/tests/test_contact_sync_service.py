@@ -0,0 +1,65 @@
+import asyncio
+
+from app.services.contact_sync_service import ContactSyncService, contact_hash
+from app.services.database_service import DatabaseService
+
+OWNER = "user-1"
+
+
+class InMemoryContacts(DatabaseService):
+    """DatabaseService with the contact queries sync_contacts and apply_delta use kept in memory."""
+
+    def __init__(self, contacts):
+        self.contacts = {c["id"]: c for c in contacts}
+
+    async def get_user_contacts(self, owner_id):
+        return list(self.contacts.values())
+
+    async def get_user_ids_by_phone(self, phone_numbers):
+        return {}
+
+    async def _upsert_contacts(self, rows, on_conflict, conflicts, report):
+        for row in rows:
+            self.contacts[row["id"]] = row
+        await report(len(rows))
+        return len(rows)
+
+    async def delete_contacts_by_device_ids(self, owner_id, device_contact_ids):
+        doomed = [i for i, c in self.contacts.items() if c["device_contact_id"] in device_contact_ids]
+        for i in doomed:
+            del self.contacts[i]
+        return len(doomed)
+
+    async def get_contact_sync_hashes(self, owner_id):
+        return {c["device_contact_id"]: c["sync_hash"] for c in self.contacts.values()}
+
+
+class NoSearchIndex:
+    def invalidate(self, user_id):
+        pass
+
+
+def device_contact(device_contact_id, name, phone_number):
+    return {
+        "name": name,
+        "phone_number": phone_number,
+        "device_contact_id": device_contact_id,
+        "sync_hash": contact_hash(name, phone_number)
+    }
+
+
+def test_delete_and_readd_with_same_number_in_one_delta():
+    stored = {"id": "row-1", "owner_id": OWNER, **device_contact("old-id", "Sam", "+15555550100")}
+    db = InMemoryContacts([stored])
+    service = ContactSyncService(db, NoSearchIndex())
+
+    result = asyncio.run(service.apply_delta(
+        OWNER,
+        upserts=[device_contact("new-id", "Sam", "+15555550100")],
+        deletes=["old-id"]
+    ))
+
+    assert result["conflicts"] == []
+    assert result["deleted"] == 1
+    assert result["created"] == 1
+    assert [c["device_contact_id"] for c in db.contacts.values()] == ["new-id"]
@@ -0,0 +1,88 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.inbound_queue_service import InboundQueueService
+from app.services.openrouter_service import OpenRouterService
+
+PHONE = "+15555550100"
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.finished = []
+
+    async def get_conversations_by_phone(self, phone_number):
+        return [{"event_id": "event-1", "status": "active", "user_name": "Sam", "last_message": "Coffee Friday?"}]
+
+    async def get_conversations(self, event_id, phone_number):
+        return await self.get_conversations_by_phone(phone_number)
+
+    async def get_event_by_id(self, event_id):
+        return {"id": event_id, "title": "Coffee", "creator_id": "user-1", "description": ""}
+
+    async def get_event_participant_by_phone(self, event_id, phone_number):
+        return {"phone_number": phone_number, "status": "pending_confirmation", "registered": False, "user_id": None}
+
+    async def get_user_by_id(self, user_id):
+        return {"id": user_id, "name": "Alex"}
+
+    async def update_conversation(self, *args, **kwargs):
+        return {}
+
+    async def finish_inbound_message(self, message_id, status, error=None):
+        self.finished.append((message_id, status))
+
+
+class FakeTexting:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, to_number, message, final=False):
+        self.sent.append((to_number, message))
+
+
+def tool_call(call_id, name, arguments):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+
+def make_service(db, texting, tool_calls):
+    service = OpenRouterService(db, google_calendar_service=None, token_manager=None, texting_service=texting)
+
+    async def prompt_agent(messages, tools, stream_to=None):
+        return SimpleNamespace(tool_calls=tool_calls, content=None), None
+
+    async def failing_confirmation(**kwargs):
+        raise RuntimeError("database unavailable")
+
+    service.prompt_agent = prompt_agent
+    service.TOOL_MAPPINGS["handle_confirmation"] = failing_confirmation
+    return service
+
+
+def process(service, db):
+    queue = InboundQueueService(db, service.handle_inbound_message)
+    asyncio.run(queue._process({"id": 1, "attempts": 1, "phone_number": PHONE, "body": "hmm let me think"}))
+
+
+def test_failure_after_text_sent_is_not_retried():
+    db, texting = FakeDatabase(), FakeTexting()
+    service = make_service(db, texting, [
+        tool_call("1", "send_text", {"phone_number": PHONE, "message": "No rush!"}),
+        tool_call("2", "handle_confirmation", {"phone_number": PHONE, "confirmation": True, "message": "hmm"}),
+    ])
+    process(service, db)
+    assert len(texting.sent) == 1
+    assert db.finished == [(1, "failed")]
+
+
+def test_failure_before_any_side_effect_is_retried():
+    db, texting = FakeDatabase(), FakeTexting()
+    service = make_service(db, texting, [
+        tool_call("1", "handle_confirmation", {"phone_number": PHONE, "confirmation": True, "message": "hmm"}),
+    ])
+    process(service, db)
+    assert texting.sent == []
+    assert db.finished == [(1, "pending")]
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.availability_bitmap import find_candidate_slots_bitmap
+from app.services.scheduling_engine import find_candidate_slots, free_intervals
+
+WINDOW_START = datetime(2030, 1, 7, 9, 0, tzinfo=timezone.utc)
+WINDOW_END = WINDOW_START + timedelta(days=2)
+
+
+def slot(start: datetime, hours: int, slot_type: str = "busy") -> dict:
+    return {
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(hours=hours)).isoformat(),
+        "slot_type": slot_type
+    }
+
+
+def test_available_slots_outside_window_leave_no_free_time():
+    slots = [slot(WINDOW_END + timedelta(days=1), 2, "available")]
+    assert free_intervals(slots, (WINDOW_START, WINDOW_END)) == []
+
+
+def test_no_available_slots_means_whole_window_free():
+    assert free_intervals([], (WINDOW_START, WINDOW_END)) == [(WINDOW_START, WINDOW_END)]
+
+
+def test_engines_agree_when_available_slots_fall_outside_window():
+    participants = {
+        "alex": [slot(WINDOW_START + timedelta(hours=1), 1)],
+        "sam": [slot(WINDOW_END + timedelta(days=1), 2, "available")],
+    }
+    sweep = find_candidate_slots(participants, WINDOW_START, WINDOW_END)
+    bitmap = find_candidate_slots_bitmap(participants, WINDOW_START, WINDOW_END)
+
+    assert sweep and bitmap
+    for candidates in (sweep, bitmap):
+        first = candidates[0].to_dict()
+        assert first["available"] == ["alex"]
+        assert first["unavailable"] == ["sam"]
+        assert not first["everyone_available"]
+    assert [c.start for c in sweep] == [c.start for c in bitmap]